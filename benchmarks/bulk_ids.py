@@ -0,0 +1,121 @@
+"""Benchmark of the bulk get-by-ids reads (the fetch-selected-ids routes) up to 10k ids.
+
+Compares the previous query, an IN list of every requested id limited to len(ids), with the
+repositories as they are now: deduplicated ids bound as one array (= ANY) and fetched in
+chunks. Requests mix a tenth of duplicate ids in, as clients resending selections do. Every
+case reports its median latency and the number of distinct SQL strings the engine sent,
+which is what the driver has to prepare: one per list length for IN, one in all for ANY.
+
+    python -m benchmarks.bulk_ids --sizes 100 1000 10000 --output bulk_ids.json
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+
+from sqlalchemy import event, select
+
+from benchmarks.query_plans import StatementRecorder
+from src.database.setup import SessionLocal, engine
+from src.models.stock_models import StockModel
+from src.models.warehouse_model import WarehouseModel
+from src.repositories.stock_repository import StockFetchQuery, StockStandardResponse, \
+    StockFetchSelectedByIDSRepository
+from src.repositories.warehouse_repository import WarehouseFetchQuery, WarehouseStandardResponse, \
+    WarehouseSelectedByIDSRepository
+
+# Project 1 sees every project, so the ids can come from the whole dataset
+PAYLOAD = {'sub': '1', 'email': 'bulk-ids@example.com', 'project_id': 1}
+
+
+async def in_list_warehouse(db, ids):
+    result = await WarehouseFetchQuery.fetch_query(db, len(ids), WarehouseModel.id.in_(ids))
+    return WarehouseStandardResponse.format_response(list(result.scalars().all()))
+
+
+async def in_list_stock(db, ids):
+    result = await StockFetchQuery.fetch_query(db, len(ids), StockModel.id.in_(ids))
+    return StockStandardResponse.format_response(list(result.unique().scalars().all()))
+
+
+CASES = {
+    'warehouse': (
+        WarehouseModel,
+        in_list_warehouse,
+        lambda db, ids: WarehouseSelectedByIDSRepository(db, PAYLOAD).fetch_selected_ids(ids),
+    ),
+    'stock': (
+        StockModel,
+        in_list_stock,
+        lambda db, ids: StockFetchSelectedByIDSRepository(db, PAYLOAD, ids).fetch_selected_ids(),
+    ),
+}
+
+
+def request_ids(pool: list[int], size: int) -> list[int]:
+    # Sizes vary a little between requests, as real selections do
+    size = min(size, len(pool)) - random.randint(0, max(size // 100, 1))
+    ids = random.sample(pool, max(size, 1))
+    return ids + random.choices(ids, k=len(ids) // 10)
+
+
+async def measure(run, pool: list[int], size: int, recorder: StatementRecorder, repeats: int) -> dict:
+    latencies = []
+    rows = 0
+    recorder.statements = []
+    for attempt in range(repeats + 1):
+        ids = request_ids(pool, size)
+        async with SessionLocal() as db:
+            started = time.perf_counter()
+            rows = len(await run(db, ids))
+            elapsed = (time.perf_counter() - started) * 1000
+        # The first run only warms the pool
+        if attempt:
+            latencies.append(elapsed)
+    statements, recorder.statements = recorder.statements, None
+
+    return {
+        'median_ms': round(statistics.median(latencies), 2),
+        'rows': rows,
+        'distinct_sql': len({statement for statement, _ in statements}),
+    }
+
+
+async def run(args) -> int:
+    engine.sync_engine.echo = False
+    recorder = StatementRecorder()
+    event.listen(engine.sync_engine, 'before_cursor_execute', recorder)
+
+    results = {}
+    for name, (model, before, after) in CASES.items():
+        async with SessionLocal() as db:
+            pool = list((await db.execute(select(model.id).limit(max(args.sizes)))).scalars())
+        if not pool:
+            raise SystemExit(f'No {name} rows; seed the database first')
+
+        for size in args.sizes:
+            for label, case in (('in_list', before), ('any_array', after)):
+                key = f'{name} {size} ids {label}'
+                results[key] = await measure(case, pool, size, recorder, args.repeats)
+                print(f"{key}: {results[key]['median_ms']} ms, {results[key]['distinct_sql']} SQL",
+                      file=sys.stderr)
+
+    await engine.dispose()
+
+    output = json.dumps({'repeats': args.repeats, 'cases': results}, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(output)
+    print(output)
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--repeats', type=int, default=10)
+    parser.add_argument('--output', help='also write the JSON report here')
+    sys.exit(asyncio.run(run(parser.parse_args())))
@@ -0,0 +1,135 @@
+"""Concurrent stress run of the quantity-moving repositories against a real database.
+
+Workers repeatedly issue stock to areas, return areas to stock and return stock to the
+warehouse on the same handful of rows, listing rows in random order so that without a
+global lock order the transactions would deadlock. The run fails if any request ends
+in a 5xx; retried deadlocks show up in the retry counters instead.
+
+    python -m benchmarks.deadlock_stress --project-id 2 --user-id 1 --group-id 1
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import Counter
+
+from fastapi import HTTPException
+from sqlalchemy import select
+
+from src.database.setup import SessionLocal, engine
+from src.database.transaction import retry_stats
+from src.models.area_model import AreaModel
+from src.models.stock_models import StockModel
+from src.repositories.area_repository import AreaAddRepository, AreaReturnToStockBatchRepository
+from src.repositories.stock_repository import StockReturnToWarehouseBatchRepository
+from src.schemas.area_schemas import AreaListAddSchema, AreaReturnStockBatchSchema
+from src.schemas.stock_schema import StockReturnToWarehouseBatchSchema
+
+QUANTITY = 0.001
+
+
+async def load_rows(project_id: int, rows: int):
+    async with SessionLocal() as db:
+        stocks = (await db.execute(
+            select(StockModel.id, StockModel.warehouse_id)
+            .where(StockModel.project_id == project_id, StockModel.left_over > 1)
+            .order_by(StockModel.id)
+            .limit(rows)
+        )).all()
+        areas = (await db.execute(
+            select(AreaModel.id, AreaModel.stock_id)
+            .where(AreaModel.project_id == project_id, AreaModel.quantity > 1)
+            .order_by(AreaModel.id)
+            .limit(rows)
+        )).all()
+    return stocks, areas
+
+
+def issue_to_area(db, args, stocks, areas, payload):
+    sample = random.sample(stocks, k=min(len(stocks), 3))
+    data = AreaListAddSchema(
+        project_id=args.project_id,
+        card_number='stress',
+        username='stress',
+        group_id=args.group_id,
+        datas=[
+            {'quantity': QUANTITY, 'provide_type': 'stress', 'stock_id': i.id, 'project_id': args.project_id}
+            for i in sample
+        ],
+    )
+    return AreaAddRepository(db, data, args.user_id).add_area()
+
+
+def return_to_stock(db, args, stocks, areas, payload):
+    sample = random.sample(areas, k=min(len(areas), 3))
+    data = AreaReturnStockBatchSchema(
+        project_id=args.project_id,
+        return_data_list=[
+            {'id': i.id, 'stock_id': i.stock_id, 'quantity': QUANTITY, 'project_id': args.project_id}
+            for i in sample
+        ],
+    )
+    return AreaReturnToStockBatchRepository(db, data, args.user_id, payload).return_to_stock()
+
+
+def return_to_warehouse(db, args, stocks, areas, payload):
+    sample = random.sample(stocks, k=min(len(stocks), 3))
+    data = StockReturnToWarehouseBatchSchema(
+        project_id=args.project_id,
+        return_data_list=[
+            {'id': i.id, 'warehouse_id': i.warehouse_id, 'quantity': QUANTITY, 'project_id': args.project_id}
+            for i in sample
+        ],
+    )
+    return StockReturnToWarehouseBatchRepository(db, data, args.user_id).return_to_warehouse()
+
+
+OPERATIONS = [issue_to_area, return_to_stock, return_to_warehouse]
+
+
+async def worker(args, stocks, areas, outcomes: Counter, deadline: float):
+    payload = {'sub': str(args.user_id), 'project_id': args.project_id}
+    while time.monotonic() < deadline:
+        operation = random.choice(OPERATIONS)
+        async with SessionLocal() as db:
+            try:
+                await operation(db, args, stocks, areas, payload)
+                outcomes[f'{operation.__name__}:ok'] += 1
+            except HTTPException as ex:
+                outcomes[f'{operation.__name__}:{ex.status_code}'] += 1
+            except Exception as ex:
+                outcomes[f'{operation.__name__}:{type(ex).__name__}'] += 1
+
+
+async def main(args) -> int:
+    engine.sync_engine.echo = False
+    stocks, areas = await load_rows(args.project_id, args.rows)
+    if not stocks or not areas:
+        print('Project needs stock rows with left_over > 1 and area rows with quantity > 1')
+        return 2
+
+    outcomes = Counter()
+    deadline = time.monotonic() + args.seconds
+    await asyncio.gather(*(worker(args, stocks, areas, outcomes, deadline) for _ in range(args.workers)))
+    await engine.dispose()
+
+    failures = {key: value for key, value in outcomes.items() if not key.endswith((':ok', ':400', ':404'))}
+    print(json.dumps({
+        'outcomes': dict(sorted(outcomes.items())),
+        'retry_stats': retry_stats.snapshot(),
+        'failures': failures,
+    }, indent=2))
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--project-id', type=int, required=True)
+    parser.add_argument('--user-id', type=int, required=True)
+    parser.add_argument('--group-id', type=int, required=True)
+    parser.add_argument('--rows', type=int, default=4, help='hot rows per table shared by all workers')
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=30)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,120 @@
+"""Benchmark of the per-request statement cost of the warehouse, stock and area filter routes.
+
+Needs no database. It times what a filter request spends on its SQL before the driver sees
+it: building the select, generating its cache key and looking it up in (or compiling it
+into) a compiled cache, through the same call Connection.execute makes. A mix of filter
+shapes with fresh values per request runs through each repository's FilterQuery twice:
+with its statement cache off, which rebuilds the statement every time as the repositories
+used to, and with it on. "compiled" counts the distinct statements that were compiled.
+
+    python -m benchmarks.filter_compile --requests 5000 --output filter_compile.json
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy.dialects import postgresql
+
+import main  # noqa: F401
+from src.database.filter_query import FilterQuery
+from src.models.archive_models import AreaArchiveModel, StockArchiveModel
+from src.models.area_model import AreaModel
+from src.models.stock_models import StockModel
+from src.repositories.area_repository import AreaFilterRepository
+from src.repositories.stock_repository import StockFilterRepository
+from src.repositories.warehouse_repository import WarehouseFilterRepository
+from src.schemas.area_schemas import AreaFilterSchema
+from src.schemas.stock_schema import StockFilterSchema
+from src.schemas.warehouse_schema import WarehouseFilterSchema
+
+PAYLOAD = {'sub': '1', 'email': 'filter-compile@example.com', 'project_id': 7}
+
+# Filter shapes as the UI sends them; values are drawn per request
+SHAPES = {
+    'warehouse': (WarehouseFilterRepository, WarehouseFilterSchema, None, (
+        ('material_name',),
+        ('material_name', 'category_id'),
+        ('po_num', 'company_id', 'created_at'),
+    )),
+    'stock': (StockFilterRepository, StockFilterSchema, (StockModel, StockArchiveModel), (
+        ('material_name',),
+        ('ordered_id', 'category_id'),
+        ('serial_number', 'created_at'),
+    )),
+    'area': (AreaFilterRepository, AreaFilterSchema, (AreaModel, AreaArchiveModel), (
+        ('material_name',),
+        ('username', 'group_id'),
+        ('quantity', 'category_id', 'created_at'),
+    )),
+}
+
+
+def value(field: str):
+    if field == 'created_at':
+        return datetime(2026, 1, 1) + timedelta(days=random.randint(0, 300))
+    if field.endswith('_id') and field != 'material_id':
+        return random.randint(1, 500)
+    if field == 'quantity':
+        return float(random.randint(1, 50))
+    return random.choice(('bolt', 'cable', 'pipe', 'valve')) + str(random.randint(0, 99))
+
+
+def statements(repo, models, include_archived: bool):
+    # What filter() executes: the live table, then the archive when asked for
+    if models is None:
+        return [repo._build_filter_query()]
+    return [repo._build_query(model) for model in models[:2 if include_archived else 1]]
+
+
+def measure(repository, schema, models, shapes, requests: int, include_archived: bool) -> dict:
+    dialect = postgresql.dialect()
+    compiled_cache = {}
+    timings = []
+    for _ in range(requests):
+        fields = random.choice(shapes)
+        filter_data = schema(project_id=PAYLOAD['project_id'], filter_data={field: value(field) for field in fields})
+        repo = repository(None, filter_data, PAYLOAD)
+
+        started = time.perf_counter()
+        for stmt, params in statements(repo, models, include_archived):
+            stmt._compile_w_cache(dialect, compiled_cache=compiled_cache, column_keys=sorted(params))
+        timings.append((time.perf_counter() - started) * 1_000_000)
+
+    return {
+        'median_us': round(statistics.median(timings), 1),
+        'p95_us': round(statistics.quantiles(timings, n=20)[-1], 1),
+        'compiled': len(compiled_cache),
+    }
+
+
+def run(args) -> int:
+    results = {}
+    for name, (repository, schema, models, shapes) in SHAPES.items():
+        cached_query = repository.query
+        for label, query in (('rebuilt', FilterQuery(cached_query.base, cached_query.fields, cache_size=0)),
+                             ('cached', cached_query)):
+            repository.query = query
+            key = f'{name} {label}'
+            results[key] = measure(repository, schema, models, shapes, args.requests, args.include_archived)
+            print(f"{key}: {results[key]['median_us']} us median", file=sys.stderr)
+        repository.query = cached_query
+
+    output = json.dumps({'requests': args.requests, 'include_archived': args.include_archived,
+                         'cases': results}, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(output)
+    print(output)
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--include-archived', action='store_true')
+    parser.add_argument('--output', help='also write the JSON report here')
+    sys.exit(run(parser.parse_args()))
@@ -0,0 +1,107 @@
+"""Throughput of deductions against one hot warehouse row.
+
+Compares the old movement pattern (SELECT ... FOR UPDATE, check in Python, UPDATE, three
+round trips under the row lock) with the guarded UPDATE ... WHERE left_over >= q RETURNING
+used by the movement repositories. Every committed deduction is credited back at the end.
+
+    python -m benchmarks.hot_row_contention --warehouse-id 1 --workers 32 --seconds 10
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from sqlalchemy import select, update
+
+from src.database.setup import SessionLocal, engine
+from src.database.transaction import apply_deltas
+from src.models.warehouse_model import WarehouseModel
+
+QUANTITY = 0.000001
+
+
+async def select_then_update(db, warehouse_id: int) -> bool:
+    left_over = await db.scalar(
+        select(WarehouseModel.left_over)
+        .where(WarehouseModel.id == warehouse_id)
+        .with_for_update()
+    )
+    if left_over is None or left_over < QUANTITY:
+        return False
+    await db.execute(
+        update(WarehouseModel)
+        .where(WarehouseModel.id == warehouse_id)
+        .values(left_over=WarehouseModel.left_over - QUANTITY)
+    )
+    return True
+
+
+async def guarded_update(db, warehouse_id: int) -> bool:
+    updated = await apply_deltas(db, WarehouseModel.left_over, {warehouse_id: -QUANTITY})
+    return bool(updated)
+
+
+MODES = {
+    'select_for_update': select_then_update,
+    'guarded_update': guarded_update,
+}
+
+
+async def worker(operation, warehouse_id: int, deadline: float, latencies: list[float]) -> int:
+    committed = 0
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        async with SessionLocal() as db:
+            if await operation(db, warehouse_id):
+                await db.commit()
+                committed += 1
+            else:
+                await db.rollback()
+        latencies.append(time.perf_counter() - started)
+    return committed
+
+
+async def run_mode(name: str, args) -> dict:
+    latencies: list[float] = []
+    deadline = time.monotonic() + args.seconds
+    counts = await asyncio.gather(*(
+        worker(MODES[name], args.warehouse_id, deadline, latencies) for _ in range(args.workers)
+    ))
+    committed = sum(counts)
+
+    async with SessionLocal() as db:
+        await db.execute(
+            update(WarehouseModel)
+            .where(WarehouseModel.id == args.warehouse_id)
+            .values(left_over=WarehouseModel.left_over + committed * QUANTITY)
+        )
+        await db.commit()
+
+    latencies.sort()
+    return {
+        'committed': committed,
+        'per_second': round(committed / args.seconds, 1),
+        'p50_ms': round(latencies[len(latencies) // 2] * 1000, 2) if latencies else None,
+        'p99_ms': round(latencies[int(len(latencies) * 0.99)] * 1000, 2) if latencies else None,
+    }
+
+
+async def main(args) -> int:
+    engine.sync_engine.echo = False
+    results = {name: await run_mode(name, args) for name in MODES}
+    await engine.dispose()
+
+    baseline = results['select_for_update']['per_second']
+    if baseline:
+        results['speedup'] = round(results['guarded_update']['per_second'] / baseline, 2)
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--warehouse-id', type=int, required=True)
+    parser.add_argument('--workers', type=int, default=32)
+    parser.add_argument('--seconds', type=float, default=10)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,188 @@
+"""Load test of the real app in-process, through httpx's ASGI transport, against a seeded database.
+
+Every route group is driven at the given concurrency for a fixed time. The report lists
+throughput and p50/p95/p99 latency per route as JSON, stamped with the git commit, so two
+runs can be diffed. Only reads are exercised, plus login, so runs are repeatable; rate
+limiting and the scheduler are switched off for the run.
+
+    python -m benchmarks.load_test --email admin@example.com --password secret \\
+        --concurrency 32 --seconds 10 --output load-$(git rev-parse --short HEAD).json
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import date, timedelta
+
+# Read by the app modules at import time
+os.environ['RATE_LIMIT_ENABLED'] = 'false'
+os.environ['SCHEDULER_ENABLED'] = 'false'
+os.environ['INITIAL_ADMIN_ON_STARTUP'] = 'false'
+
+import httpx  # noqa: E402
+from sqlalchemy import select  # noqa: E402
+
+import main as app_main  # noqa: E402
+from src.database.setup import SessionLocal, engine  # noqa: E402
+from src.models.area_model import AreaModel  # noqa: E402
+from src.models.stock_models import StockModel  # noqa: E402
+from src.models.warehouse_model import WarehouseModel  # noqa: E402
+
+
+async def sample_ids(model, project_id: int, count: int) -> list[int]:
+    async with SessionLocal() as db:
+        stmt = select(model.id).order_by(model.id.desc()).limit(count)
+        if project_id != 1:
+            stmt = stmt.where(model.project_id == project_id)
+        return list((await db.scalars(stmt)).all())
+
+
+async def build_scenarios(args) -> dict[str, list[tuple]]:
+    """Route group -> [(name, method, path, json body)]."""
+    warehouse_ids = await sample_ids(WarehouseModel, args.project_id, args.ids)
+    stock_ids = await sample_ids(StockModel, args.project_id, args.ids)
+    area_ids = await sample_ids(AreaModel, args.project_id, args.ids)
+    today = date.today()
+
+    def filter_body(**fields):
+        return {'project_id': args.project_id, 'filter_data': fields}
+
+    return {
+        '/api/auth': [
+            ('login', 'POST', '/api/auth/login', {'email': args.email, 'password': args.password}),
+        ],
+        '/api/common': [
+            (name, 'GET', f'/api/common/{name}', None)
+            for name in ('fetch-groups', 'fetch-categories', 'fetch-companies', 'fetch-ordered', 'fetch-material_code')
+        ],
+        '/api/warehouse': [
+            ('fetch-warehouse_list', 'GET', '/api/warehouse/fetch-warehouse_list', None),
+            ('fetch-selected-ids', 'POST', '/api/warehouse/fetch-selected-ids', {'ids': warehouse_ids}),
+            ('get-by-id', 'GET', f'/api/warehouse/{warehouse_ids[0]}' if warehouse_ids else None, None),
+            ('filter', 'POST', '/api/warehouse/filter', filter_body(material_name='a')),
+        ],
+        '/api/stock': [
+            ('fetch-stock_list', 'GET', '/api/stock/fetch-stock_list', None),
+            ('fetch-selected-ids', 'POST', '/api/stock/fetch-selected-ids', {'ids': stock_ids}),
+            ('get-by-id', 'GET', f'/api/stock/{stock_ids[0]}' if stock_ids else None, None),
+            ('filter', 'POST', '/api/stock/filter', filter_body(material_name='a')),
+        ],
+        '/api/area': [
+            ('fetch_area', 'GET', '/api/area/fetch_area', None),
+            ('get-by-id', 'GET', f'/api/area/{area_ids[0]}' if area_ids else None, None),
+            ('filter', 'POST', '/api/area/filter', filter_body(material_name='a')),
+        ],
+        '/api/inventory': [
+            ('summary', 'GET', '/api/inventory/summary', None),
+        ],
+        '/api/reports': [
+            ('consumption', 'POST', '/api/reports/consumption', {'project_id': args.project_id, 'group_by': 'week'}),
+            ('daily', 'GET', f'/api/reports/daily?date_from={today - timedelta(days=365)}&date_to={today}', None),
+        ],
+    }
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float | None:
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+async def drive(client: httpx.AsyncClient, method: str, path: str, body, args) -> dict:
+    latencies: list[float] = []
+    statuses: Counter = Counter()
+    deadline = time.monotonic() + args.seconds
+
+    async def worker():
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body)
+                statuses[str(response.status_code)] += 1
+            except Exception as ex:
+                statuses[type(ex).__name__] += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    errors = sum(count for status, count in statuses.items() if not status.startswith('2'))
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'statuses': dict(statuses),
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 0.50), 2) if latencies else None,
+        'p95_ms': round(percentile(latencies, 0.95), 2) if latencies else None,
+        'p99_ms': round(percentile(latencies, 0.99), 2) if latencies else None,
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+async def run(args) -> int:
+    engine.sync_engine.echo = False
+    scenarios = await build_scenarios(args)
+
+    transport = httpx.ASGITransport(app=app_main.app)
+    async with app_main.app.router.lifespan_context(app_main.app), \
+            httpx.AsyncClient(transport=transport, base_url='http://load-test', timeout=args.timeout) as client:
+
+        login = await client.post('/api/auth/login', json={'email': args.email, 'password': args.password})
+        if not login.is_success:
+            print(f'Login failed: {login.status_code} {login.text}')
+            return 2
+        client.headers['Authorization'] = f"Bearer {login.json()['access_token']}"
+
+        results = {}
+        for group, routes in scenarios.items():
+            if args.routes and not any(group.startswith(prefix) for prefix in args.routes):
+                continue
+            for name, method, path, body in routes:
+                if path is None:
+                    results[f'{group} {name}'] = {'skipped': 'no rows in the project'}
+                    continue
+                results[f'{group} {name}'] = await drive(client, method, path, body, args)
+                print(f"{group} {name}: {results[f'{group} {name}']['rps']} req/s", file=sys.stderr)
+
+    await engine.dispose()
+
+    report = {
+        'commit': git_commit(),
+        'concurrency': args.concurrency,
+        'seconds_per_route': args.seconds,
+        'project_id': args.project_id,
+        'routes': results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(output)
+    print(output)
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--email', default=os.getenv('INITIAL_ADMIN_USER'))
+    parser.add_argument('--password', default=os.getenv('INITIAL_ADMIN_PASSWORD'))
+    parser.add_argument('--project-id', type=int, default=1, help='project of the ids sampled for by-id routes')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=5, help='duration per route')
+    parser.add_argument('--ids', type=int, default=50, help='ids per fetch-selected-ids request')
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--routes', nargs='*', help='only route groups starting with these prefixes, e.g. /api/stock')
+    parser.add_argument('--output', help='also write the JSON report here')
+    sys.exit(asyncio.run(run(parser.parse_args())))
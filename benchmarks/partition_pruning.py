@@ -0,0 +1,135 @@
+"""Before/after benchmark for partitioning warehouse, stock and area by project.
+
+Runs the project-scoped repository reads (the ProjectVerify filtered lists, a filter and a
+get by id) as users of a few projects of the seeded dataset: the largest, a middle one and
+the smallest. Every case reports its median latency and, from EXPLAIN (ANALYZE, BUFFERS),
+the buffers touched and the relations scanned, so pruning to one partition is visible.
+
+Run it on the seeded database, apply the opt-in migration, and run it again:
+
+    python -m benchmarks.partition_pruning --output before.json
+    alembic -x partition_by_project=true upgrade head
+    python -m benchmarks.partition_pruning --output after.json
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+
+from sqlalchemy import event, func, select, text
+
+from benchmarks.query_plans import StatementRecorder, walk
+from src.database.partitions import PROJECT_PARTITIONED_TABLES
+from src.database.setup import SessionLocal, engine
+from src.models.stock_models import StockModel
+from src.models.warehouse_model import WarehouseModel
+from src.repositories.area_repository import AreaFetchRepository
+from src.repositories.stock_repository import StockFetchRepository, StockGetByIdRepository
+from src.repositories.warehouse_repository import WarehouseFetchRepository, WarehouseFilterRepository
+from src.schemas.warehouse_schema import WarehouseFilterSchema, WarehouseFilterFieldSchema
+
+
+async def pick_projects() -> dict[str, int]:
+    async with SessionLocal() as db:
+        sizes = (await db.execute(
+            select(WarehouseModel.project_id, func.count())
+            .where(WarehouseModel.project_id != 1)
+            .group_by(WarehouseModel.project_id)
+            .order_by(func.count().desc())
+        )).all()
+    if not sizes:
+        raise SystemExit('No project has warehouse rows; seed the database first')
+    return {'largest': sizes[0][0], 'middle': sizes[len(sizes) // 2][0], 'smallest': sizes[-1][0]}
+
+
+async def cases_for(project_id: int) -> dict:
+    payload = {'sub': '1', 'email': 'partition-pruning@example.com', 'project_id': project_id}
+    async with SessionLocal() as db:
+        material_name = await db.scalar(
+            select(WarehouseModel.material_name).where(WarehouseModel.project_id == project_id).limit(1))
+        stock_id = await db.scalar(select(StockModel.id).where(StockModel.project_id == project_id).limit(1))
+
+    cases = {
+        'warehouse_fetch_list': lambda db: WarehouseFetchRepository(db, payload).fetch_warehouse(),
+        'stock_fetch_list': lambda db: StockFetchRepository(db, payload).fetch_stock_list(),
+        'area_fetch_list': lambda db: AreaFetchRepository(db, payload).fetch(),
+        'warehouse_filter': lambda db: WarehouseFilterRepository(db, WarehouseFilterSchema(
+            project_id=project_id, filter_data=WarehouseFilterFieldSchema(material_name=material_name)
+        ), payload).filter(),
+    }
+    if stock_id is not None:
+        cases['stock_get_by_id'] = lambda db: StockGetByIdRepository(db, stock_id, payload).get_by_id()
+    return cases
+
+
+async def measure(run, recorder: StatementRecorder, repeats: int) -> dict:
+    latencies = []
+    for attempt in range(repeats + 1):
+        async with SessionLocal() as db:
+            recorder.statements = [] if attempt == 0 else None
+            started = time.perf_counter()
+            await run(db)
+            elapsed = (time.perf_counter() - started) * 1000
+            # The first run only warms the cache and records the statements
+            if attempt == 0:
+                statements, recorder.statements = recorder.statements, None
+            else:
+                latencies.append(elapsed)
+
+    buffers = 0
+    relations: set[str] = set()
+    async with SessionLocal() as db:
+        conn = await db.connection()
+        for statement, parameters in statements:
+            result = await conn.exec_driver_sql(f'EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}', parameters)
+            raw = result.scalar()
+            plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]['Plan']
+            # The top node's counts include its children
+            buffers += plan.get('Shared Hit Blocks', 0) + plan.get('Shared Read Blocks', 0)
+            relations.update(node['Relation Name'] for node in walk(plan) if 'Relation Name' in node)
+        await db.rollback()
+
+    return {
+        'median_ms': round(statistics.median(latencies), 2),
+        'buffers': buffers,
+        'relations_scanned': sorted(relations),
+    }
+
+
+async def run(args) -> int:
+    engine.sync_engine.echo = False
+    recorder = StatementRecorder()
+    event.listen(engine.sync_engine, 'before_cursor_execute', recorder)
+
+    async with SessionLocal() as db:
+        partitioned = {
+            table: bool(await db.scalar(text(
+                'SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table)'
+            ), {'table': f'public.{table}'}))
+            for table in PROJECT_PARTITIONED_TABLES
+        }
+
+    results = {}
+    for label, project_id in (await pick_projects()).items():
+        for name, case in (await cases_for(project_id)).items():
+            key = f'{label} project {project_id} {name}'
+            results[key] = await measure(case, recorder, args.repeats)
+            print(f"{key}: {results[key]['median_ms']} ms", file=sys.stderr)
+
+    await engine.dispose()
+
+    output = json.dumps({'partitioned': partitioned, 'repeats': args.repeats, 'cases': results}, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(output)
+    print(output)
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeats', type=int, default=20)
+    parser.add_argument('--output', help='also write the JSON report here')
+    sys.exit(asyncio.run(run(parser.parse_args())))
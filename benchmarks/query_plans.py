@@ -0,0 +1,315 @@
+"""Query-plan regression suite for the repository read queries, against a seeded database.
+
+Each case calls the real repository (warehouse/stock/area fetch, get by id, selected ids and
+filter, and the common fetches) and records the SQL it sends, with its parameters. The suite
+then runs EXPLAIN (FORMAT JSON) on every statement and checks the plan:
+  - no sequential scan on the large tables where the case says so;
+  - the expected indexes are used;
+  - the estimated total cost is within --cost-tolerance times the snapshot's.
+
+The SQL and a normalized plan tree (node types, relations, indexes, joins; no row counts or
+costs) are written by --update to benchmarks/plans/<case>.json, generated locally against
+benchmarks.seed_dataset at its default seed and scale; commit them to review plan changes as
+plain diffs. Any difference with a snapshot fails the run until it is accepted with --update.
+A case without a snapshot only gets the rule checks, with a warning.
+
+    python -m benchmarks.seed_dataset
+    python -m benchmarks.query_plans --update      # first run, or after an intended query or index change
+    python -m benchmarks.query_plans               # exits 1 on a rule violation or plan diff
+"""
+import argparse
+import asyncio
+import difflib
+import json
+import sys
+from pathlib import Path
+
+from sqlalchemy import event, func, select
+
+import main  # noqa: F401
+from src.database.setup import SessionLocal, engine
+from src.models.area_model import AreaModel
+from src.models.stock_models import StockModel
+from src.models.warehouse_model import WarehouseModel
+from src.repositories.area_repository import AreaFetchRepository, AreaGetByIdRepository, AreaFilterRepository
+from src.repositories.common_repository import (
+    GroupFetchRepository,
+    CategoryFetchRepository,
+    CompanyFetchRepository,
+    OrderedFetchRepository,
+    MaterialCodeFetchRepository,
+)
+from src.repositories.stock_repository import (
+    StockFetchRepository,
+    StockFetchSelectedByIDSRepository,
+    StockGetByIdRepository,
+    StockFilterRepository,
+)
+from src.repositories.warehouse_repository import (
+    WarehouseFetchRepository,
+    WarehouseGetByIdRepository,
+    WarehouseSelectedByIDSRepository,
+    WarehouseFilterRepository,
+)
+from src.schemas.area_schemas import AreaFilterSchema, AreaFilterFieldSchema
+from src.schemas.stock_schema import StockFilterSchema, StockFilterFieldSchema
+from src.schemas.warehouse_schema import WarehouseFilterSchema, WarehouseFilterFieldSchema
+
+PLANS_DIR = Path(__file__).parent / 'plans'
+
+LARGE_TABLES = {
+    'warehouse', 'stock', 'area',
+    'log_warehouse_movement', 'log_stock_movement', 'log_area_movement', 'inventory_ledger',
+}
+
+# Plan node keys kept in the snapshots; everything else depends on the data or the run
+PLAN_KEYS = ('Node Type', 'Parent Relationship', 'Join Type', 'Strategy', 'Relation Name', 'Index Name')
+
+
+class Case:
+
+    def __init__(self, name: str, run, no_seq_scan: bool = False, indexes: tuple[str, ...] = ()):
+        self.name = name
+        self.run = run
+        self.no_seq_scan = no_seq_scan
+        self.indexes = indexes
+
+
+class StatementRecorder:
+    """Collects the statements the engine sends while active."""
+
+    def __init__(self):
+        self.statements: list[tuple[str, tuple]] | None = None
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if self.statements is not None:
+            self.statements.append((statement, tuple(parameters or ())))
+
+
+async def sample(project_id: int | None) -> dict:
+    """Ids and filter values taken from the seeded data, so every case finds rows."""
+    async with SessionLocal() as db:
+        if project_id is None:
+            # The largest real project; project 1 sees everything and skips the project filter
+            project_id = await db.scalar(
+                select(WarehouseModel.project_id)
+                .where(WarehouseModel.project_id != 1)
+                .group_by(WarehouseModel.project_id)
+                .order_by(func.count().desc())
+                .limit(1)
+            ) or 1
+
+        def ids(model, count):
+            stmt = select(model.id).order_by(model.id.desc()).limit(count)
+            if project_id != 1:
+                stmt = stmt.where(model.project_id == project_id)
+            return stmt
+
+        values = {
+            'project_id': project_id,
+            'warehouse_ids': list((await db.scalars(ids(WarehouseModel, 50))).all()),
+            'stock_ids': list((await db.scalars(ids(StockModel, 50))).all()),
+            'area_ids': list((await db.scalars(ids(AreaModel, 1))).all()),
+        }
+        if not (values['warehouse_ids'] and values['stock_ids'] and values['area_ids']):
+            raise SystemExit(f'Project {project_id} has no warehouse, stock or area rows; seed the database first')
+
+        values['material_name'] = await db.scalar(
+            select(WarehouseModel.material_name).where(WarehouseModel.id == values['warehouse_ids'][0]))
+        values['area_stock_id'] = await db.scalar(
+            select(AreaModel.stock_id).where(AreaModel.id == values['area_ids'][0]))
+        return values
+
+
+def build_cases(values: dict) -> list[Case]:
+    project_id = values['project_id']
+    payload = {'sub': '1', 'email': 'query-plans@example.com', 'project_id': project_id}
+
+    def warehouse_filter(**fields):
+        return WarehouseFilterSchema(project_id=project_id, filter_data=WarehouseFilterFieldSchema(**fields))
+
+    def stock_filter(**fields):
+        return StockFilterSchema(project_id=project_id, filter_data=StockFilterFieldSchema(**fields))
+
+    def area_filter(**fields):
+        return AreaFilterSchema(project_id=project_id, filter_data=AreaFilterFieldSchema(**fields))
+
+    return [
+        Case('warehouse_fetch_list',
+             lambda db: WarehouseFetchRepository(db, payload).fetch_warehouse()),
+        Case('warehouse_selected_ids',
+             lambda db: WarehouseSelectedByIDSRepository(db, payload).fetch_selected_ids(values['warehouse_ids']),
+             no_seq_scan=True, indexes=('warehouse_pkey',)),
+        Case('warehouse_get_by_id',
+             lambda db: WarehouseGetByIdRepository(db, values['warehouse_ids'][0], payload).get_by_id(),
+             no_seq_scan=True, indexes=('warehouse_pkey',)),
+        Case('warehouse_filter_material_name',
+             lambda db: WarehouseFilterRepository(db, warehouse_filter(material_name=values['material_name']),
+                                                  payload).filter(),
+             no_seq_scan=True, indexes=('ix_warehouse_material_name_trgm',)),
+
+        Case('stock_fetch_list',
+             lambda db: StockFetchRepository(db, payload).fetch_stock_list()),
+        Case('stock_selected_ids',
+             lambda db: StockFetchSelectedByIDSRepository(db, payload, values['stock_ids']).fetch_selected_ids(),
+             no_seq_scan=True, indexes=('stock_pkey',)),
+        Case('stock_get_by_id',
+             lambda db: StockGetByIdRepository(db, values['stock_ids'][0], payload).get_by_id(),
+             no_seq_scan=True, indexes=('stock_pkey',)),
+        Case('stock_filter_material_name',
+             lambda db: StockFilterRepository(db, stock_filter(material_name=values['material_name']),
+                                              payload).filter(),
+             no_seq_scan=True, indexes=('ix_warehouse_material_name_trgm', 'ix_stock_warehouse_id')),
+
+        Case('area_fetch_list',
+             lambda db: AreaFetchRepository(db, payload).fetch()),
+        Case('area_get_by_id',
+             lambda db: AreaGetByIdRepository(db, values['area_ids'][0], payload).get_by_id(),
+             no_seq_scan=True, indexes=('area_pkey',)),
+        Case('area_filter_stock_id',
+             lambda db: AreaFilterRepository(db, area_filter(stock_id=values['area_stock_id']), payload).filter(),
+             no_seq_scan=True, indexes=('ix_area_stock_id',)),
+
+        Case('common_groups', lambda db: GroupFetchRepository(db).groups()),
+        Case('common_categories', lambda db: CategoryFetchRepository(db).fetch_categories()),
+        Case('common_companies', lambda db: CompanyFetchRepository(db).companies()),
+        Case('common_ordered', lambda db: OrderedFetchRepository(db).fetch_ordered()),
+        Case('common_material_codes', lambda db: MaterialCodeFetchRepository(db).fetch_material_code()),
+    ]
+
+
+def normalize(node: dict) -> dict:
+    tree = {key: node[key] for key in PLAN_KEYS if key in node}
+    if node.get('Plans'):
+        tree['Plans'] = [normalize(child) for child in node['Plans']]
+    return tree
+
+
+def walk(node: dict):
+    yield node
+    for child in node.get('Plans', ()):
+        yield from walk(child)
+
+
+async def explain_case(case: Case, recorder: StatementRecorder) -> list[dict]:
+    async with SessionLocal() as db:
+        recorder.statements = []
+        try:
+            await case.run(db)
+        finally:
+            statements, recorder.statements = recorder.statements, None
+
+        explained = []
+        conn = await db.connection()
+        for statement, parameters in statements:
+            result = await conn.exec_driver_sql(f'EXPLAIN (FORMAT JSON) {statement}', parameters)
+            raw = result.scalar()
+            plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]['Plan']
+            explained.append({
+                'sql': statement,
+                'total_cost': plan['Total Cost'],
+                'plan': normalize(plan),
+                'nodes': list(walk(plan)),
+            })
+        await db.rollback()
+        return explained
+
+
+def check_rules(case: Case, explained: list[dict]) -> list[str]:
+    problems = []
+    nodes = [node for statement in explained for node in statement['nodes']]
+    if case.no_seq_scan:
+        for node in nodes:
+            if node['Node Type'] == 'Seq Scan' and node.get('Relation Name') in LARGE_TABLES:
+                problems.append(f"sequential scan on {node['Relation Name']}")
+    used = {node['Index Name'] for node in nodes if 'Index Name' in node}
+    for index in case.indexes:
+        if index not in used:
+            problems.append(f'index {index} not used')
+    return problems
+
+
+def snapshot(case: Case, explained: list[dict]) -> dict:
+    return {
+        'case': case.name,
+        'statements': [
+            {'sql': i['sql'], 'total_cost': round(i['total_cost'], 2), 'plan': i['plan']}
+            for i in explained
+        ],
+    }
+
+
+def without_costs(data: dict) -> str:
+    statements = [{key: value for key, value in i.items() if key != 'total_cost'} for i in data['statements']]
+    return json.dumps({**data, 'statements': statements}, indent=2)
+
+
+def compare(case: Case, current: dict, args) -> list[str]:
+    path = PLANS_DIR / f'{case.name}.json'
+    if not path.exists():
+        print(f'warning: no snapshot at {path}, only the rules were checked; run with --update',
+              file=sys.stderr)
+        return []
+    expected = json.loads(path.read_text())
+
+    problems = []
+    diff = list(difflib.unified_diff(without_costs(expected).splitlines(), without_costs(current).splitlines(),
+                                     f'{path.name} (snapshot)', f'{path.name} (current)', lineterm=''))
+    if diff:
+        problems.append('plan differs from the snapshot:\n' + '\n'.join(diff))
+
+    for old, new in zip(expected['statements'], current['statements']):
+        if new['total_cost'] > old['total_cost'] * args.cost_tolerance:
+            problems.append(f"estimated cost {new['total_cost']} over {args.cost_tolerance}x "
+                            f"the snapshot's {old['total_cost']}")
+    return problems
+
+
+async def run(args) -> int:
+    engine.sync_engine.echo = False
+    recorder = StatementRecorder()
+    event.listen(engine.sync_engine, 'before_cursor_execute', recorder)
+
+    values = await sample(args.project_id)
+    print(f"Sampled project {values['project_id']}", file=sys.stderr)
+
+    failed = 0
+    for case in build_cases(values):
+        if args.cases and case.name not in args.cases:
+            continue
+        try:
+            explained = await explain_case(case, recorder)
+        except Exception as ex:
+            print(f"FAIL {case.name}: {getattr(ex, 'detail', ex)}")
+            failed += 1
+            continue
+
+        problems = check_rules(case, explained)
+        current = snapshot(case, explained)
+        if args.update:
+            PLANS_DIR.mkdir(exist_ok=True)
+            (PLANS_DIR / f'{case.name}.json').write_text(json.dumps(current, indent=2) + '\n')
+        else:
+            problems += compare(case, current, args)
+
+        cost = sum(i['total_cost'] for i in current['statements'])
+        if problems:
+            failed += 1
+            print(f'FAIL {case.name} (cost {cost:.0f})')
+            for problem in problems:
+                print(f'  - {problem}')
+        else:
+            print(f'ok   {case.name} (cost {cost:.0f})')
+
+    await engine.dispose()
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--project-id', type=int, help='project of the user the queries run as (default: the largest)')
+    parser.add_argument('--update', action='store_true', help='rewrite the snapshots instead of comparing')
+    parser.add_argument('--cost-tolerance', type=float, default=2.0,
+                        help='fail when an estimated cost exceeds this multiple of the snapshot')
+    parser.add_argument('--cases', nargs='*', help='only these case names')
+    sys.exit(asyncio.run(run(parser.parse_args())))
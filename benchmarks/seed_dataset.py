@@ -0,0 +1,385 @@
+"""Production-sized synthetic dataset, loaded with COPY.
+
+Fills projects, users, groups, categories, material codes, companies, ordered people,
+warehouse receipts, stock issues, area issues and their return logs, then rebuilds the
+derived tables (stock summary, daily rollup, ledger checkpoints) and runs ANALYZE.
+
+The data is shaped like a real site:
+  - project sizes, material popularity and item picks follow Zipf distributions;
+  - stock is issued after its warehouse receipt and area issues after their stock;
+  - quantities are generated bottom-up, so warehouse.left_over = qty - sum(stock.quantity) and
+    stock.left_over = quantity - sum(area.quantity) hold for every row, returns included.
+
+Rows are appended after the current max ids, so it can run against a non-empty database.
+The same --seed gives the same data.
+
+    python -m benchmarks.seed_dataset --warehouse 100000 --stock 1000000 --area 5000000
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from array import array
+from bisect import bisect
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+from typing import get_args
+
+import asyncpg
+
+import main  # noqa: F401
+from src.constants.constants import Units, Currency
+from src.database.partitions import create_project_partitions
+from src.database.setup import SessionLocal, engine
+from src.repositories.inventory_repository import StockSummaryRepository, DailyRollupRepository
+from src.repositories.log_partition_repository import LogPartitionRepository
+from src.utils.hash_password import PasswordHash
+
+CHUNK = 50_000
+
+ADJECTIVES = ['steel', 'copper', 'pvc', 'galvanized', 'stainless', 'aluminium', 'rubber', 'insulated', 'threaded', 'welded']
+NOUNS = ['pipe', 'cable', 'bolt', 'valve', 'flange', 'bracket', 'sheet', 'gasket', 'fitting', 'panel', 'beam', 'nut']
+PROVIDE_TYPES = ['consumable', 'tool', 'issue', 'rental']
+FIRST_NAMES = ['Ali', 'Aysel', 'John', 'Maria', 'Kamal', 'Leyla', 'Peter', 'Nigar', 'Omar', 'Sara']
+LAST_NAMES = ['Aliyev', 'Smith', 'Mammadova', 'Brown', 'Huseynov', 'Garcia', 'Ismayilov', 'Jones']
+
+
+class Zipf:
+    """Ranks 0..n-1 with P(k) proportional to 1 / (k + 1) ** exponent."""
+
+    def __init__(self, n: int, exponent: float):
+        self.cumulative = array('d', accumulate(1 / (k + 1) ** exponent for k in range(n)))
+
+    def sample(self, rng: random.Random) -> int:
+        return bisect(self.cumulative, rng.random() * self.cumulative[-1])
+
+
+class Ids:
+    """Next free id of each table, so generated rows can reference each other before loading."""
+
+    def __init__(self, start: dict[str, int]):
+        self.start = start
+
+    def of(self, table: str, index: int) -> int:
+        return self.start[table] + index
+
+
+async def copy(conn: asyncpg.Connection, table: str, columns: list[str], rows) -> int:
+    count = 0
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == CHUNK:
+            await conn.copy_records_to_table(table, records=chunk, columns=columns)
+            count += len(chunk)
+            chunk = []
+    if chunk:
+        await conn.copy_records_to_table(table, records=chunk, columns=columns)
+        count += len(chunk)
+    print(f'  {table}: {count} rows', file=sys.stderr)
+    return count
+
+
+class Dataset:
+
+    def __init__(self, args, ids: Ids):
+        self.args = args
+        self.ids = ids
+        self.end = datetime.now(timezone.utc).replace(microsecond=0)
+        self.start = self.end - timedelta(days=args.days)
+        self.span = (self.end - self.start).total_seconds()
+
+        rng = random.Random(args.seed)
+        self.units = get_args(Units)
+        self.currencies = get_args(Currency)
+
+        # Materials: fixed category and unit each; rank 0 is the most popular
+        self.material_category = [rng.randrange(args.categories) for _ in range(args.material_codes)]
+        self.material_unit = [rng.choice(self.units) for _ in range(args.material_codes)]
+        self.material_name = [f'{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {k}' for k in range(args.material_codes)]
+
+        self.project_zipf = Zipf(args.projects, args.project_skew)
+        self.material_zipf = Zipf(args.material_codes, args.skew)
+        self.ordered_project = [self.project_zipf.sample(rng) for _ in range(args.ordered)]
+
+        self.generate_warehouses(random.Random(args.seed + 1))
+        self.generate_stocks(random.Random(args.seed + 2))
+
+    # Times are kept as seconds since self.start to save memory
+    def at(self, offset: float, aware: bool = True) -> datetime:
+        value = self.start + timedelta(seconds=offset)
+        return value if aware else value.replace(tzinfo=None)
+
+    def user_of(self, project: int) -> int:
+        return self.ids.of('users', project * self.args.users_per_project)
+
+    def generate_warehouses(self, rng: random.Random) -> None:
+        n = self.args.warehouse
+        self.w_project = array('i', (self.project_zipf.sample(rng) for _ in range(n)))
+        self.w_material = array('i', (self.material_zipf.sample(rng) for _ in range(n)))
+        # Receipts arrive through the first 90% of the period so everything can be issued after
+        self.w_time = array('d', (rng.random() * self.span * 0.9 for _ in range(n)))
+
+        # Popular materials already have more receipts; items are ranked in random order on top of that
+        order = list(range(n))
+        rng.shuffle(order)
+        by_project: list[list[int]] = [[] for _ in range(self.args.projects)]
+        for index in order:
+            by_project[self.w_project[index]].append(index)
+        self.w_by_project = by_project
+        self.w_zipf = {p: Zipf(len(items), self.args.skew) for p, items in enumerate(by_project) if items}
+
+    def generate_stocks(self, rng: random.Random) -> None:
+        projects = list(self.w_zipf)
+        weights = [len(self.w_by_project[p]) for p in projects]
+        s_warehouse = array('i')
+        s_time = array('d')
+        for _ in range(self.args.stock):
+            project = rng.choices(projects, weights)[0]
+            warehouse = self.w_by_project[project][self.w_zipf[project].sample(rng)]
+            s_warehouse.append(warehouse)
+            s_time.append(self.w_time[warehouse] + rng.random() * (self.span - self.w_time[warehouse]) * 0.9)
+        self.s_warehouse = s_warehouse
+        self.s_time = s_time
+
+        by_project: list[list[int]] = [[] for _ in range(self.args.projects)]
+        for index, warehouse in enumerate(s_warehouse):
+            by_project[self.w_project[warehouse]].append(index)
+        self.s_by_project = by_project
+        self.s_zipf = {p: Zipf(len(items), self.args.skew) for p, items in enumerate(by_project) if items}
+
+    def areas(self):
+        """Area issues as (index, stock, original quantity, final quantity, time, returned at).
+
+        Deterministic for a given seed, so it is run once to size the stocks and again to load.
+        """
+        rng = random.Random(self.args.seed + 3)
+        projects = list(self.s_zipf)
+        weights = [len(self.s_by_project[p]) for p in projects]
+        for index in range(self.args.area):
+            project = rng.choices(projects, weights)[0]
+            stock = self.s_by_project[project][self.s_zipf[project].sample(rng)]
+            quantity = round(rng.lognormvariate(1.5, 1.0), 3) + 0.001
+            issued_at = self.s_time[stock] + rng.random() * (self.span - self.s_time[stock])
+            final, returned_at = quantity, None
+            if rng.random() < self.args.return_rate:
+                final = round(quantity * rng.uniform(0.3, 0.9), 3)
+                returned_at = issued_at + rng.random() * (self.span - issued_at)
+            yield index, stock, quantity, final, issued_at, returned_at
+
+    def size_stocks(self) -> None:
+        """Stock quantities from the area issues they fed, then warehouse quantities from the stocks."""
+        rng = random.Random(self.args.seed + 4)
+        on_site = array('d', bytes(8 * self.args.stock))
+        for _, stock, _, final, _, _ in self.areas():
+            on_site[stock] += final
+
+        self.s_quantity = array('d')
+        self.s_left_over = array('d')
+        self.s_return = array('d')
+        issued = array('d', bytes(8 * self.args.warehouse))
+        for index in range(self.args.stock):
+            # Never below what went to site, whatever the rounding
+            quantity = max(round(on_site[index] / rng.uniform(0.4, 0.95), 3), on_site[index]) if on_site[index] else \
+                round(rng.lognormvariate(2.0, 1.0), 3) + 0.001
+            left_over = quantity - on_site[index]
+            returned = 0.0
+            if left_over > 0 and rng.random() < self.args.return_rate:
+                returned = round(left_over * rng.uniform(0.1, 0.5), 3)
+            self.s_quantity.append(quantity - returned)
+            self.s_left_over.append(left_over - returned)
+            self.s_return.append(returned)
+            issued[self.s_warehouse[index]] += quantity - returned
+
+        self.w_qty = array('d')
+        for index in range(self.args.warehouse):
+            self.w_qty.append(max(round(issued[index] / rng.uniform(0.5, 0.95), 3), issued[index]) if issued[index] else
+                              round(rng.lognormvariate(3.0, 1.0), 3) + 0.001)
+        self.w_issued = issued
+
+    # Row generators, in COPY column order
+
+    def projects(self):
+        for p in range(self.args.projects):
+            project_id = self.ids.of('projects', p)
+            yield project_id, f'SEED PROJECT {project_id}', f'SP{project_id}', self.start
+
+    def users(self, password: str):
+        for p in range(self.args.projects):
+            for u in range(self.args.users_per_project):
+                user_id = self.ids.of('users', p * self.args.users_per_project + u)
+                yield (user_id, FIRST_NAMES[u % len(FIRST_NAMES)], LAST_NAMES[u % len(LAST_NAMES)],
+                       f'seed{user_id}@example.com', password, False, self.ids.of('projects', p), self.start)
+
+    def groups(self):
+        for g in range(self.args.groups):
+            yield self.ids.of('groups', g), f'Seed group {g}', self.start
+
+    def categories(self):
+        for c in range(self.args.categories):
+            yield self.ids.of('categories', c), f'Seed category {c}', self.start
+
+    def material_codes(self):
+        for m in range(self.args.material_codes):
+            yield self.ids.of('material_codes', m), f'M{m:07d}', self.material_name[m], self.user_of(0), self.start
+
+    def companies(self):
+        for c in range(self.args.companies):
+            yield self.ids.of('companies', c), f'Seed supplier {c}', 'AZ', None, None, self.user_of(0), self.start
+
+    def ordered(self):
+        rng = random.Random(self.args.seed + 5)
+        for o, project in enumerate(self.ordered_project):
+            yield (self.ids.of('ordered', o), rng.choice(FIRST_NAMES), None, rng.choice(LAST_NAMES),
+                   f'ordered{o}@example.com', self.ids.of('groups', rng.randrange(self.args.groups)),
+                   self.ids.of('projects', project), self.user_of(project), self.start)
+
+    def warehouses(self):
+        rng = random.Random(self.args.seed + 6)
+        for index in range(self.args.warehouse):
+            project, material = self.w_project[index], self.w_material[index]
+            qty = self.w_qty[index]
+            yield (self.ids.of('warehouse', index), self.material_name[material], qty, qty - self.w_issued[index],
+                   self.material_unit[material], round(rng.uniform(1, 500), 2), rng.choice(self.currencies),
+                   self.at(self.w_time[index]), f'PO-{rng.randrange(10 ** 6):06d}', f'DOC-{index}',
+                   self.ids.of('projects', project), self.ids.of('material_codes', material),
+                   self.ids.of('categories', self.material_category[material]),
+                   self.ids.of('ordered', rng.randrange(self.args.ordered)),
+                   self.ids.of('companies', rng.randrange(self.args.companies)),
+                   self.user_of(project))
+
+    def stocks(self):
+        for index in range(self.args.stock):
+            warehouse = self.s_warehouse[index]
+            project = self.w_project[warehouse]
+            yield (self.ids.of('stock', index), self.s_quantity[index], self.s_left_over[index], None, None,
+                   self.at(self.s_time[index], aware=False), self.ids.of('warehouse', warehouse),
+                   self.user_of(project), self.ids.of('projects', project))
+
+    def stock_logs(self):
+        rng = random.Random(self.args.seed + 7)
+        for index in range(self.args.stock):
+            returned = self.s_return[index]
+            if not returned:
+                continue
+            project = self.w_project[self.s_warehouse[index]]
+            returned_at = self.s_time[index] + rng.random() * (self.span - self.s_time[index])
+            yield ('return to warehouse', self.s_quantity[index] + returned, self.s_left_over[index] + returned,
+                   returned, self.s_left_over[index], self.at(returned_at), self.ids.of('stock', index),
+                   self.ids.of('warehouse', self.s_warehouse[index]), self.user_of(project))
+
+    def area_rows(self, logs: list):
+        rng = random.Random(self.args.seed + 8)
+        for index, stock, quantity, final, issued_at, returned_at in self.areas():
+            project = self.w_project[self.s_warehouse[stock]]
+            area_id = self.ids.of('area', index)
+            if returned_at is not None:
+                logs.append(('return to stock', quantity, round(quantity - final, 3), self.at(returned_at),
+                             area_id, self.ids.of('stock', stock), self.user_of(project)))
+            yield (area_id, final, None, None, rng.choice(PROVIDE_TYPES), f'C{rng.randrange(10 ** 6):06d}',
+                   f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}', self.at(issued_at, aware=False),
+                   self.user_of(project), self.ids.of('stock', stock), self.ids.of('projects', project),
+                   self.ids.of('groups', rng.randrange(self.args.groups)))
+
+
+TABLES = ['projects', 'users', 'groups', 'categories', 'material_codes', 'companies', 'ordered',
+          'warehouse', 'stock', 'area']
+
+
+async def load(args) -> int:
+    dsn = engine.url.set(drivername='postgresql').render_as_string(hide_password=False)
+    conn = await asyncpg.connect(dsn)
+    started = time.perf_counter()
+    try:
+        start = {table: await conn.fetchval(f'SELECT coalesce(max(id), 0) + 1 FROM {table}') for table in TABLES}
+        dataset = Dataset(args, Ids(start))
+        dataset.size_stocks()
+        print(f'Generated layout in {time.perf_counter() - started:.1f}s', file=sys.stderr)
+
+        password = PasswordHash().hash_password(args.password)
+        await copy(conn, 'projects', ['id', 'project_name', 'project_code', 'created_at'], dataset.projects())
+        async with SessionLocal() as db:
+            # Only does anything when the tables are partitioned by project
+            for project in range(args.projects):
+                await create_project_partitions(db, dataset.ids.of('projects', project))
+            await db.commit()
+            # The movement logs go back --days; without these months they'd all land in DEFAULT
+            await LogPartitionRepository(db).create_partitions(since=dataset.start.date())
+        await copy(conn, 'users', ['id', 'first_name', 'last_name', 'email', 'password', 'is_admin', 'project_id',
+                                   'created_at'], dataset.users(password))
+        await copy(conn, 'groups', ['id', 'group_name', 'created_at'], dataset.groups())
+        await copy(conn, 'categories', ['id', 'category_name', 'created_at'], dataset.categories())
+        await copy(conn, 'material_codes', ['id', 'code_num', 'description', 'created_by_id', 'created_at'],
+                   dataset.material_codes())
+        await copy(conn, 'companies', ['id', 'company_name', 'country', 'email', 'phone_number', 'created_by_id',
+                                       'created_at'], dataset.companies())
+        await copy(conn, 'ordered', ['id', 'f_name', 'm_name', 'l_name', 'email', 'group_id', 'project_id',
+                                     'created_by_id', 'created_at'], dataset.ordered())
+        await copy(conn, 'warehouse', ['id', 'material_name', 'qty', 'left_over', 'unit', 'price', 'currency',
+                                       'created_at', 'po_num', 'doc_num', 'project_id', 'material_code_id',
+                                       'category_id', 'ordered_id', 'company_id', 'created_by_id'],
+                   dataset.warehouses())
+        await copy(conn, 'stock', ['id', 'quantity', 'left_over', 'serial_number', 'material_id', 'created_at',
+                                   'warehouse_id', 'created_by_id', 'project_id'], dataset.stocks())
+        await copy(conn, 'log_stock_movement', ['movement_type', 'old_quantity', 'old_left_over', 'return_quantity',
+                                                'new_left_over', 'created_at', 'stock_id', 'warehouse_id',
+                                                'created_by_id'], dataset.stock_logs())
+        area_logs: list = []
+        await copy(conn, 'area', ['id', 'quantity', 'serial_number', 'material_id', 'provide_type', 'card_number',
+                                  'username', 'created_at', 'created_by_id', 'stock_id', 'project_id', 'group_id'],
+                   dataset.area_rows(area_logs))
+        await copy(conn, 'log_area_movement', ['movement_type', 'old_quantity', 'return_quantity', 'created_at',
+                                               'area_id', 'stock_id', 'created_by_id'], area_logs)
+
+        for table in TABLES:
+            await conn.execute(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), max(id)) FROM {table}")
+
+        # Seeded items start their ledger history here, like the rows present when the ledger was added
+        await conn.execute("""
+            INSERT INTO inventory_ledger_checkpoint (location, item_id, checkpoint_at, balance, project_id)
+            SELECT 'warehouse', id, now(), left_over, project_id FROM warehouse WHERE id >= $1
+            UNION ALL
+            SELECT 'stock', id, now(), left_over, project_id FROM stock WHERE id >= $2
+            UNION ALL
+            SELECT 'area', id, now(), quantity, project_id FROM area WHERE id >= $3
+        """, start['warehouse'], start['stock'], start['area'])
+    finally:
+        await conn.close()
+
+    async with SessionLocal() as db:
+        await StockSummaryRepository(db).rebuild()
+        await DailyRollupRepository(db).rebuild()
+        await db.commit()
+
+    conn = await asyncpg.connect(dsn)
+    try:
+        await conn.execute('ANALYZE')
+    finally:
+        await conn.close()
+    await engine.dispose()
+
+    print(f'Loaded in {time.perf_counter() - started:.1f}s; users log in as seed<id>@example.com '
+          f'with the given password (user ids from {start["users"]})', file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--projects', type=int, default=10)
+    parser.add_argument('--users-per-project', type=int, default=5)
+    parser.add_argument('--groups', type=int, default=20)
+    parser.add_argument('--categories', type=int, default=40)
+    parser.add_argument('--material-codes', type=int, default=5000)
+    parser.add_argument('--companies', type=int, default=200)
+    parser.add_argument('--ordered', type=int, default=500)
+    parser.add_argument('--warehouse', type=int, default=100_000)
+    parser.add_argument('--stock', type=int, default=1_000_000)
+    parser.add_argument('--area', type=int, default=5_000_000)
+    parser.add_argument('--days', type=int, default=730, help='history spread over this many days')
+    parser.add_argument('--skew', type=float, default=1.1, help='Zipf exponent of material and item popularity')
+    parser.add_argument('--project-skew', type=float, default=0.8, help='Zipf exponent of project sizes')
+    parser.add_argument('--return-rate', type=float, default=0.05, help='share of issues partly returned')
+    parser.add_argument('--password', default='seed-password', help='password of every seeded user')
+    parser.add_argument('--seed', type=int, default=42)
+    sys.exit(asyncio.run(load(parser.parse_args())))
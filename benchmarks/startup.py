@@ -0,0 +1,94 @@
+"""Cold-start cost of the API: import time and time to first request, against a budget.
+
+Each sample is a fresh interpreter, as an autoscaled worker would be. Import time comes from
+`python -X importtime -c "import main"`; time to first request is the wall time of a new
+process that imports main, runs the lifespan and answers GET /openapi.json in-process.
+The scheduler and the admin bootstrap are disabled, so no database is needed.
+
+    python -m benchmarks.startup --samples 5 --import-budget-ms 1500 --first-request-budget-ms 2500
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+FIRST_REQUEST = """
+import asyncio
+import httpx
+import main
+
+async def serve_first_request():
+    async with main.app.router.lifespan_context(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://startup') as client:
+            response = await client.get('/openapi.json')
+            response.raise_for_status()
+
+asyncio.run(serve_first_request())
+"""
+
+
+def child_env() -> dict:
+    return {**os.environ, 'SCHEDULER_ENABLED': 'false', 'INITIAL_ADMIN_ON_STARTUP': 'false'}
+
+
+def import_profile() -> tuple[float, dict[str, float]]:
+    """Total import time of main in ms, and the cumulative ms of each module main imports directly."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import main'],
+                            capture_output=True, text=True, env=child_env(), check=True)
+    total = 0.0
+    children: dict[str, float] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.removeprefix('import time:').split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        if depth == 0 and name.strip() == 'main':
+            total = int(cumulative) / 1000
+        elif depth == 1:
+            # importtime prints children before their parent; the ones of main come right before it
+            children[name.strip()] = int(cumulative) / 1000
+        elif depth == 0:
+            children = {}
+    return total, children
+
+
+def time_first_request() -> float:
+    started = time.perf_counter()
+    subprocess.run([sys.executable, '-c', FIRST_REQUEST], env=child_env(), check=True)
+    return (time.perf_counter() - started) * 1000
+
+
+def main(args) -> int:
+    imports = [import_profile() for _ in range(args.samples)]
+    first_requests = [time_first_request() for _ in range(args.samples)]
+
+    import_ms = statistics.median(total for total, _ in imports)
+    first_request_ms = statistics.median(first_requests)
+    heaviest = sorted(imports[-1][1].items(), key=lambda item: item[1], reverse=True)[:args.top]
+
+    over = import_ms > args.import_budget_ms or first_request_ms > args.first_request_budget_ms
+    print(json.dumps({
+        'samples': args.samples,
+        'import_main_ms': round(import_ms, 1),
+        'first_request_ms': round(first_request_ms, 1),
+        'budget': {
+            'import_main_ms': args.import_budget_ms,
+            'first_request_ms': args.first_request_budget_ms,
+        },
+        'within_budget': not over,
+        'main_imports_ms': {name: round(ms, 1) for name, ms in heaviest},
+    }, indent=2))
+    return 1 if over else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--samples', type=int, default=5)
+    parser.add_argument('--import-budget-ms', type=float, default=1500)
+    parser.add_argument('--first-request-budget-ms', type=float, default=2500)
+    parser.add_argument('--top', type=int, default=10, help='heaviest imports of main to list')
+    sys.exit(main(parser.parse_args()))
@@ -3,41 +3,57 @@ import os
 
 from contextlib import asynccontextmanager
 
+from dotenv import load_dotenv
+
+# Before any src import: several modules read their settings from the environment on import
+load_dotenv()
+
 from src.logging_config import setup_logger
 
 from src.routers import user_router, area_router, admin_router, common_router
-from src.routers import stock_router, warehouse_router
+from src.routers import stock_router, warehouse_router, inventory_router, report_router
 
 logger = setup_logger(__name__, "main.log")
 
 from fastapi import FastAPI
 
-from dotenv import load_dotenv
-
-load_dotenv()
-
 # Startup
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    from src.database.setup import get_db
-    from src.repositories.admin_repository import CreateAdminRepository
-    from src.schemas.admin_schemas import UserRegisterSchema
-    async for db in get_db():
-        repo = CreateAdminRepository(db)
-        try:
-            await repo.create_admin(UserRegisterSchema(
-                    first_name="admin",
-                    last_name="admin",
-                    email=os.getenv('INITIAL_ADMIN_USER'),
-                    password=os.getenv('INITIAL_ADMIN_PASSWORD'),
-                    middle_name="",
-                    project_id=1,
-                    is_admin=True,
-                ))
-        except Exception as ex:
-            logger.info(f"Create Initial Admin Error, {ex}")
-        break
+    # The initial admin is created once with `python -m src.cli create-admin`; single-process
+    # setups can still opt in to creating it on startup
+    if os.getenv('INITIAL_ADMIN_ON_STARTUP', 'false').lower() == 'true':
+        from src.database.setup import SessionLocal
+        from src.repositories.admin_repository import CreateAdminRepository
+        async with SessionLocal() as db:
+            try:
+                await CreateAdminRepository(db).create_admin(initial_admin_data())
+            except Exception as ex:
+                logger.info(f"Create Initial Admin Error, {ex}")
+
+    from src.scheduler.jobs import create_scheduler
+    scheduler = create_scheduler()
+    if scheduler:
+        scheduler.start()
     yield
+    if scheduler:
+        await scheduler.stop()
+
+    from src.database.change_events import broadcaster
+    await broadcaster.stop()
+
+
+def initial_admin_data(email: str | None = None, password: str | None = None):
+    from src.schemas.admin_schemas import UserRegisterSchema
+    return UserRegisterSchema(
+        first_name="admin",
+        last_name="admin",
+        email=email or os.getenv('INITIAL_ADMIN_USER'),
+        password=password or os.getenv('INITIAL_ADMIN_PASSWORD'),
+        middle_name="",
+        project_id=1,
+        is_admin=True,
+    )
 
 
 app = FastAPI(lifespan = lifespan)
@@ -50,6 +66,8 @@ app.include_router(router=common_router.router, prefix='/api/common', tags=['Com
 app.include_router(router=warehouse_router.router, prefix='/api/warehouse', tags=['Warehouse'])
 app.include_router(router=stock_router.router, prefix='/api/stock', tags=['Stock'])
 app.include_router(router=area_router.router, prefix='/api/area', tags=['Area'])
+app.include_router(router=inventory_router.router, prefix='/api/inventory', tags=['Inventory'])
+app.include_router(router=report_router.router, prefix='/api/reports', tags=['Reports'])
 
 
 
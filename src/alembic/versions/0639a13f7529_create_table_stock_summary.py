@@ -0,0 +1,55 @@
+"""Create table stock_summary
+
+Revision ID: 0639a13f7529
+Revises: 08345e84ae60
+Create Date: 2026-10-19 09:12:41.204117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0639a13f7529'
+down_revision: Union[str, None] = '08345e84ae60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('stock_summary',
+                    sa.Column('project_id', sa.Integer(), sa.ForeignKey('projects.id', ondelete='CASCADE'), primary_key=True),
+                    sa.Column('material_code_id', sa.Integer(), sa.ForeignKey('material_codes.id', ondelete='CASCADE'), primary_key=True),
+                    sa.Column('category_id', sa.Integer(), sa.ForeignKey('categories.id', ondelete='CASCADE'), primary_key=True),
+                    sa.Column('warehouse_left_over', sa.Float(), nullable=False, server_default='0'),
+                    sa.Column('stock_left_over', sa.Float(), nullable=False, server_default='0'),
+                    sa.Column('area_quantity', sa.Float(), nullable=False, server_default='0'),
+                    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+                    )
+
+    op.execute("""
+        INSERT INTO stock_summary (project_id, material_code_id, category_id,
+                                   warehouse_left_over, stock_left_over, area_quantity)
+        SELECT project_id, material_code_id, category_id,
+               sum(warehouse_left_over), sum(stock_left_over), sum(area_quantity)
+        FROM (
+            SELECT w.project_id, w.material_code_id, w.category_id,
+                   coalesce(w.left_over, 0) AS warehouse_left_over, 0 AS stock_left_over, 0 AS area_quantity
+            FROM warehouse w
+            UNION ALL
+            SELECT s.project_id, w.material_code_id, w.category_id, 0, s.left_over, 0
+            FROM stock s JOIN warehouse w ON w.id = s.warehouse_id
+            UNION ALL
+            SELECT a.project_id, w.material_code_id, w.category_id, 0, 0, a.quantity
+            FROM area a JOIN stock s ON s.id = a.stock_id JOIN warehouse w ON w.id = s.warehouse_id
+        ) balances
+        GROUP BY project_id, material_code_id, category_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('stock_summary')
@@ -0,0 +1,33 @@
+"""Add column claim_token to idempotency_keys
+
+Each claim of a key stores a new token, and completing or releasing the key checks it, so a
+request that outlived its lease can't overwrite or delete the claim of the retry that took
+the key over. Keys claimed before this have none and are left to expire.
+
+Revision ID: 20306af9b6e4
+Revises: a5250a38267f
+Create Date: 2026-10-19 23:41:17.205834
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20306af9b6e4'
+down_revision: Union[str, None] = 'a5250a38267f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('idempotency_keys', sa.Column('claim_token', postgresql.UUID(as_uuid=True), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('idempotency_keys', 'claim_token')
@@ -0,0 +1,41 @@
+"""Create table idempotency_keys
+
+Revision ID: 257e4a3da452
+Revises: cd128a815795
+Create Date: 2026-10-19 15:02:44.918263
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '257e4a3da452'
+down_revision: Union[str, None] = 'cd128a815795'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('idempotency_keys',
+                    sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True),
+                    sa.Column('key', sa.String(100), primary_key=True),
+                    sa.Column('route', sa.String(100), nullable=False),
+                    sa.Column('request_hash', sa.String(64), nullable=False),
+                    sa.Column('status', sa.String(20), nullable=False),
+                    sa.Column('response_status', sa.Integer(), nullable=True),
+                    sa.Column('response_body', postgresql.JSONB(), nullable=True),
+                    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+                    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+                    )
+    op.create_index('ix_idempotency_keys_expires_at', 'idempotency_keys', ['expires_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_idempotency_keys_expires_at', table_name='idempotency_keys')
+    op.drop_table('idempotency_keys')
@@ -0,0 +1,168 @@
+"""Partition inventory tables by project
+
+Opt-in: the tables are only converted with
+
+    alembic -x partition_by_project=true upgrade head
+
+otherwise this revision changes nothing. warehouse, stock and area become LIST partitioned
+on project_id, with one partition per existing project and a DEFAULT partition; new
+projects get theirs from CreateProjectRepository.create_project.
+
+A primary key of a partitioned table has to contain the partition key, so it becomes
+(id, project_id), and foreign keys can no longer point at id alone: the ones into these
+tables (stock -> warehouse, area -> stock, the movement logs) are dropped while they are
+partitioned. The models keep id as the ORM identity.
+
+Revision ID: 2e6f1d7fd3ac
+Revises: f6ca503a81ae
+Create Date: 2026-10-19 19:04:52.117630
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2e6f1d7fd3ac'
+down_revision: Union[str, None] = 'f6ca503a81ae'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Referenced tables last, so they are converted once nothing points at them
+TABLES = ('area', 'stock', 'warehouse')
+
+# Foreign keys into the converted tables, as created by the earlier revisions
+REFERENCES = (
+    ('stock', 'stock_warehouse_id_fkey', 'FOREIGN KEY (warehouse_id) REFERENCES warehouse(id)'),
+    ('area', 'area_stock_id_fkey', 'FOREIGN KEY (stock_id) REFERENCES stock(id) ON DELETE CASCADE'),
+    ('log_stock_movement', 'log_stock_movement_stock_id_fkey',
+     'FOREIGN KEY (stock_id) REFERENCES stock(id) ON DELETE CASCADE'),
+    ('log_stock_movement', 'log_stock_movement_warehouse_id_fkey',
+     'FOREIGN KEY (warehouse_id) REFERENCES warehouse(id) ON DELETE CASCADE'),
+    ('log_area_movement', 'log_area_movement_area_id_fkey',
+     'FOREIGN KEY (area_id) REFERENCES area(id) ON DELETE CASCADE'),
+    ('log_area_movement', 'log_area_movement_stock_id_fkey',
+     'FOREIGN KEY (stock_id) REFERENCES stock(id) ON DELETE CASCADE'),
+    ('log_warehouse_movement', 'log_warehouse_movement_warehouse_id_fkey',
+     'FOREIGN KEY (warehouse_id) REFERENCES warehouse(id) ON DELETE CASCADE'),
+)
+
+# Policies of revision f6ca503a81ae may reference the converted tables
+POLICY_TABLES = TABLES + ('log_warehouse_movement', 'log_stock_movement', 'log_area_movement')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if context.get_x_argument(as_dictionary=True).get('partition_by_project', 'false').lower() != 'true':
+        return
+
+    bind = op.get_bind()
+    if _is_partitioned(bind, 'warehouse'):
+        return
+
+    for table in TABLES:
+        missing = bind.execute(sa.text(f'SELECT count(*) FROM {table} WHERE project_id IS NULL')).scalar()
+        if missing:
+            raise RuntimeError(f'{table} has {missing} rows without project_id; assign them a project first')
+
+    project_ids = bind.execute(sa.text('SELECT id FROM projects ORDER BY id')).scalars().all()
+
+    policies = _drop_policies(bind)
+    for table, name, _ in REFERENCES:
+        op.execute(f'ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {name}')
+    for table in TABLES:
+        _rebuild(bind, table, project_ids)
+    _restore_policies(policies)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    if not _is_partitioned(bind, 'warehouse'):
+        return
+
+    policies = _drop_policies(bind)
+    for table in TABLES:
+        _rebuild(bind, table, None)
+    for table, name, definition in reversed(REFERENCES):
+        op.execute(f'ALTER TABLE {table} ADD CONSTRAINT {name} {definition}')
+    _restore_policies(policies)
+
+
+def _is_partitioned(bind, table: str) -> bool:
+    return bool(bind.execute(sa.text(
+        "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table)"
+    ), {'table': f'public.{table}'}).scalar())
+
+
+def _rebuild(bind, table: str, project_ids: list[int] | None) -> None:
+    """Recreate table with its data, indexes, foreign keys, grants and RLS flag.
+
+    With project_ids it becomes LIST partitioned on project_id, without it a plain table again.
+    """
+    old = f'{table}_old'
+    params = {'table': f'public.{table}'}
+    sequence = bind.execute(sa.text("SELECT pg_get_serial_sequence(:table, 'id')"), params).scalar()
+    indexes = bind.execute(sa.text(
+        "SELECT pg_get_indexdef(i.indexrelid) FROM pg_index i "
+        "WHERE i.indrelid = to_regclass(:table) AND NOT i.indisunique"
+    ), params).scalars().all()
+    foreign_keys = bind.execute(sa.text(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = to_regclass(:table) AND contype = 'f'"
+    ), params).all()
+    grants = bind.execute(sa.text(
+        "SELECT grantee, string_agg(privilege_type, ', ') FROM information_schema.role_table_grants "
+        "WHERE table_schema = 'public' AND table_name = :name AND grantee <> current_user GROUP BY grantee"
+    ), {'name': table}).all()
+    row_security = bind.execute(sa.text(
+        "SELECT relrowsecurity FROM pg_class WHERE oid = to_regclass(:table)"
+    ), params).scalar()
+
+    op.execute(f'ALTER TABLE {table} RENAME TO {old}')
+    partition_by = ' PARTITION BY LIST (project_id)' if project_ids is not None else ''
+    op.execute(f'CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS INCLUDING CONSTRAINTS){partition_by}')
+    if project_ids is not None:
+        for project_id in project_ids:
+            op.execute(f'CREATE TABLE {table}_p{project_id} PARTITION OF {table} FOR VALUES IN ({project_id})')
+        op.execute(f'CREATE TABLE {table}_default PARTITION OF {table} DEFAULT')
+
+    op.execute(f'INSERT INTO {table} SELECT * FROM {old}')
+    op.execute(f'ALTER SEQUENCE {sequence} OWNED BY {table}.id')
+    op.execute(f'DROP TABLE {old}')
+
+    primary_key = '(id, project_id)' if project_ids is not None else '(id)'
+    op.execute(f'ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY {primary_key}')
+    for definition in indexes:
+        op.execute(definition.replace(' ON ONLY ', ' ON '))
+    for name, definition in foreign_keys:
+        op.execute(f'ALTER TABLE {table} ADD CONSTRAINT {name} {definition}')
+    for grantee, privileges in grants:
+        op.execute(f'GRANT {privileges} ON {table} TO {grantee}')
+    if row_security:
+        op.execute(f'ALTER TABLE {table} ENABLE ROW LEVEL SECURITY')
+
+
+def _drop_policies(bind) -> list:
+    policies = bind.execute(sa.text(
+        "SELECT tablename, policyname, permissive, cmd, array_to_string(roles, ', ') AS roles, qual, with_check "
+        "FROM pg_policies "
+        "WHERE schemaname = 'public' AND tablename = ANY(:tables)"
+    ), {'tables': list(POLICY_TABLES)}).all()
+    for policy in policies:
+        op.execute(f'DROP POLICY {policy.policyname} ON {policy.tablename}')
+    return policies
+
+
+def _restore_policies(policies: list) -> None:
+    for policy in policies:
+        statement = (f'CREATE POLICY {policy.policyname} ON {policy.tablename} AS {policy.permissive} '
+                     f'FOR {policy.cmd} TO {policy.roles}')
+        if policy.qual:
+            statement += f' USING ({policy.qual})'
+        if policy.with_check:
+            statement += f' WITH CHECK ({policy.with_check})'
+        op.execute(statement)
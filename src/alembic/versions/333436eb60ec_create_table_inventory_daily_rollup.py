@@ -0,0 +1,84 @@
+"""Create table inventory_daily_rollup
+
+Revision ID: 333436eb60ec
+Revises: 4cf40afb3eb3
+Create Date: 2026-10-19 16:21:40.118953
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '333436eb60ec'
+down_revision: Union[str, None] = '4cf40afb3eb3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('inventory_daily_rollup',
+                    sa.Column('day', sa.Date(), primary_key=True),
+                    sa.Column('project_id', sa.Integer(), sa.ForeignKey('projects.id'), primary_key=True),
+                    sa.Column('material_code_id', sa.Integer(), sa.ForeignKey('material_codes.id'), primary_key=True),
+                    sa.Column('received', sa.Float(), nullable=False, server_default='0'),
+                    sa.Column('adjusted', sa.Float(), nullable=False, server_default='0'),
+                    sa.Column('issued_to_stock', sa.Float(), nullable=False, server_default='0'),
+                    sa.Column('issued_to_area', sa.Float(), nullable=False, server_default='0'),
+                    sa.Column('returned_to_stock', sa.Float(), nullable=False, server_default='0'),
+                    sa.Column('returned_to_warehouse', sa.Float(), nullable=False, server_default='0'),
+                    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+                    )
+
+    # Backfill from the rows and movement logs, same as `python -m src.cli rebuild-rollup`
+    op.execute("""
+        INSERT INTO inventory_daily_rollup (day, project_id, material_code_id, received, adjusted,
+                                            issued_to_stock, issued_to_area, returned_to_stock, returned_to_warehouse)
+        SELECT day, project_id, material_code_id,
+               coalesce(sum(amount) FILTER (WHERE kind = 'received'), 0),
+               coalesce(sum(amount) FILTER (WHERE kind = 'adjusted'), 0),
+               coalesce(sum(amount) FILTER (WHERE kind = 'issued_to_stock'), 0),
+               coalesce(sum(amount) FILTER (WHERE kind = 'issued_to_area'), 0),
+               coalesce(sum(amount) FILTER (WHERE kind = 'returned_to_stock'), 0),
+               coalesce(sum(amount) FILTER (WHERE kind = 'returned_to_warehouse'), 0)
+        FROM (
+            SELECT w.created_at::date AS day, w.project_id, w.material_code_id, 'received' AS kind,
+                   coalesce((SELECT lw.old_quantity FROM log_warehouse_movement lw
+                             WHERE lw.warehouse_id = w.id ORDER BY lw.id LIMIT 1), w.qty) AS amount
+            FROM warehouse w
+            UNION ALL
+            SELECT lw.created_at::date, w.project_id, w.material_code_id, 'adjusted',
+                   lw.new_left_over - lw.old_left_over
+            FROM log_warehouse_movement lw JOIN warehouse w ON w.id = lw.warehouse_id
+            UNION ALL
+            SELECT s.created_at::date, s.project_id, w.material_code_id, 'issued_to_stock',
+                   s.quantity + coalesce((SELECT sum(ls.return_quantity) FROM log_stock_movement ls
+                                          WHERE ls.stock_id = s.id), 0)
+            FROM stock s JOIN warehouse w ON w.id = s.warehouse_id
+            UNION ALL
+            SELECT a.created_at::date, a.project_id, w.material_code_id, 'issued_to_area',
+                   a.quantity + coalesce((SELECT sum(la.return_quantity) FROM log_area_movement la
+                                          WHERE la.area_id = a.id), 0)
+            FROM area a JOIN stock s ON s.id = a.stock_id JOIN warehouse w ON w.id = s.warehouse_id
+            UNION ALL
+            SELECT la.created_at::date, a.project_id, w.material_code_id, 'returned_to_stock', la.return_quantity
+            FROM log_area_movement la
+            JOIN area a ON a.id = la.area_id
+            JOIN stock s ON s.id = la.stock_id
+            JOIN warehouse w ON w.id = s.warehouse_id
+            UNION ALL
+            SELECT ls.created_at::date, s.project_id, w.material_code_id, 'returned_to_warehouse', ls.return_quantity
+            FROM log_stock_movement ls
+            JOIN stock s ON s.id = ls.stock_id
+            JOIN warehouse w ON w.id = ls.warehouse_id
+        ) movements
+        GROUP BY day, project_id, material_code_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('inventory_daily_rollup')
@@ -0,0 +1,38 @@
+"""Create table job_runs
+
+Revision ID: 4bd846d872c1
+Revises: 333436eb60ec
+Create Date: 2026-10-19 17:02:55.386120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4bd846d872c1'
+down_revision: Union[str, None] = '333436eb60ec'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('job_runs',
+                    sa.Column('id', sa.BigInteger(), primary_key=True, autoincrement=True, nullable=False),
+                    sa.Column('job_name', sa.String(50), nullable=False),
+                    sa.Column('status', sa.String(20), nullable=False),
+                    sa.Column('started_at', sa.DateTime(timezone=True), nullable=False),
+                    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=False),
+                    sa.Column('duration_ms', sa.Integer(), nullable=False),
+                    sa.Column('detail', sa.Text(), nullable=True),
+                    )
+    op.create_index('ix_job_runs_job_name_started_at', 'job_runs', ['job_name', 'started_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_job_runs_job_name_started_at', table_name='job_runs')
+    op.drop_table('job_runs')
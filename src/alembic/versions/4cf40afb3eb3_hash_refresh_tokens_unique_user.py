@@ -0,0 +1,46 @@
+"""Hash refresh tokens and make tokens.user_id unique
+
+Revision ID: 4cf40afb3eb3
+Revises: 257e4a3da452
+Create Date: 2026-10-19 15:47:12.604391
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4cf40afb3eb3'
+down_revision: Union[str, None] = '257e4a3da452'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keep only the newest token of each user before the unique index goes on
+    op.execute("""
+        DELETE FROM tokens t
+        USING tokens newer
+        WHERE newer.user_id = t.user_id AND newer.id > t.id
+    """)
+
+    op.add_column('tokens', sa.Column('token_hash', sa.String(64), nullable=True))
+    # Existing sessions stay valid: the stored tokens are hashed in place
+    op.execute("UPDATE tokens SET token_hash = encode(sha256(convert_to(tokens, 'UTF8')), 'hex')")
+    op.execute("DELETE FROM tokens WHERE token_hash IS NULL")
+    op.alter_column('tokens', 'token_hash', nullable=False)
+    op.drop_column('tokens', 'tokens')
+
+    op.create_index('ix_tokens_user_id', 'tokens', ['user_id'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tokens_user_id', table_name='tokens')
+    # Hashes can't be turned back into tokens; users log in again
+    op.drop_column('tokens', 'token_hash')
+    op.add_column('tokens', sa.Column('tokens', sa.String()))
+    op.execute("DELETE FROM tokens")
@@ -0,0 +1,49 @@
+"""Add indexes for repository queries
+
+Revision ID: 53d2c8c93ed7
+Revises: 4bd846d872c1
+Create Date: 2026-10-19 17:48:12.604318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '53d2c8c93ed7'
+down_revision: Union[str, None] = '4bd846d872c1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = (
+    ('ix_warehouse_project_id_id', 'warehouse', ['project_id', 'id'], {}),
+    ('ix_warehouse_material_code_id', 'warehouse', ['material_code_id'], {}),
+    ('ix_warehouse_material_name_trgm', 'warehouse', ['material_name'],
+     {'postgresql_using': 'gin', 'postgresql_ops': {'material_name': 'gin_trgm_ops'}}),
+    ('ix_stock_project_id_id', 'stock', ['project_id', 'id'], {}),
+    ('ix_stock_warehouse_id', 'stock', ['warehouse_id'], {}),
+    ('ix_area_project_id_id', 'area', ['project_id', 'id'], {}),
+    ('ix_area_stock_id', 'area', ['stock_id'], {}),
+    ('ix_area_card_number', 'area', ['card_number'], {}),
+    ('ix_log_stock_movement_stock_id', 'log_stock_movement', ['stock_id'], {}),
+    ('ix_log_area_movement_area_id', 'log_area_movement', ['area_id'], {}),
+    ('ix_log_warehouse_movement_warehouse_id', 'log_warehouse_movement', ['warehouse_id'], {}),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # CONCURRENTLY can't run inside a transaction, but keeps the tables writable meanwhile
+    with op.get_context().autocommit_block():
+        for name, table, columns, kwargs in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True, **kwargs)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,98 @@
+"""Create archive tables for consumed rows
+
+stock_archive, area_archive and the two movement log archives receive the fully consumed
+rows moved by ConsumedArchiveRepository. Columns mirror the live tables, ids are kept, and
+there are no foreign keys: an archived row may point at a live or an archived parent.
+
+Revision ID: 555f12f4f44a
+Revises: 68c59cb7386d
+Create Date: 2026-10-19 20:31:44.208153
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '555f12f4f44a'
+down_revision: Union[str, None] = '68c59cb7386d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('stock_archive',
+                    sa.Column('id', sa.Integer(), primary_key=True, autoincrement=False),
+                    sa.Column('quantity', sa.Float(), nullable=False),
+                    sa.Column('left_over', sa.Float(), nullable=False),
+                    sa.Column('serial_number', sa.String(length=20), nullable=True),
+                    sa.Column('material_id', sa.String(length=20), nullable=True),
+                    sa.Column('created_at', sa.DateTime()),
+                    sa.Column('warehouse_id', sa.Integer()),
+                    sa.Column('created_by_id', sa.Integer()),
+                    sa.Column('project_id', sa.Integer()),
+                    sa.Column('archived_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+                    )
+    op.create_index('ix_stock_archive_project_id_id', 'stock_archive', ['project_id', 'id'])
+
+    op.create_table('area_archive',
+                    sa.Column('id', sa.Integer(), primary_key=True, autoincrement=False),
+                    sa.Column('quantity', sa.Float(), nullable=False),
+                    sa.Column('serial_number', sa.String(20), nullable=True),
+                    sa.Column('material_id', sa.String(20), nullable=True),
+                    sa.Column('provide_type', sa.String(20), nullable=False),
+                    sa.Column('card_number', sa.String(10), nullable=False),
+                    sa.Column('username', sa.String(50), nullable=False),
+                    sa.Column('created_at', sa.DateTime(), nullable=False),
+                    sa.Column('created_by_id', sa.Integer()),
+                    sa.Column('stock_id', sa.Integer()),
+                    sa.Column('project_id', sa.Integer()),
+                    sa.Column('group_id', sa.Integer()),
+                    sa.Column('archived_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+                    )
+    op.create_index('ix_area_archive_project_id_id', 'area_archive', ['project_id', 'id'])
+    op.create_index('ix_area_archive_stock_id', 'area_archive', ['stock_id'])
+
+    op.create_table('log_stock_movement_archive',
+                    sa.Column('id', sa.Integer(), primary_key=True, autoincrement=False),
+                    sa.Column('movement_type', sa.String(), nullable=False),
+                    sa.Column('old_quantity', sa.Float(), nullable=False),
+                    sa.Column('old_left_over', sa.Float(), nullable=False),
+                    sa.Column('return_quantity', sa.Float(), nullable=False),
+                    sa.Column('new_left_over', sa.Float(), nullable=False),
+                    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+                    sa.Column('stock_id', sa.Integer()),
+                    sa.Column('warehouse_id', sa.Integer()),
+                    sa.Column('created_by_id', sa.Integer()),
+                    sa.Column('archived_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+                    )
+    op.create_index('ix_log_stock_movement_archive_stock_id', 'log_stock_movement_archive', ['stock_id'])
+
+    op.create_table('log_area_movement_archive',
+                    sa.Column('id', sa.Integer(), primary_key=True, autoincrement=False),
+                    sa.Column('movement_type', sa.String(), nullable=False),
+                    sa.Column('old_quantity', sa.Float(), nullable=False),
+                    sa.Column('return_quantity', sa.Float(), nullable=False),
+                    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+                    sa.Column('area_id', sa.Integer()),
+                    sa.Column('stock_id', sa.Integer()),
+                    sa.Column('created_by_id', sa.Integer()),
+                    sa.Column('archived_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+                    )
+    op.create_index('ix_log_area_movement_archive_area_id', 'log_area_movement_archive', ['area_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_log_area_movement_archive_area_id', table_name='log_area_movement_archive')
+    op.drop_table('log_area_movement_archive')
+    op.drop_index('ix_log_stock_movement_archive_stock_id', table_name='log_stock_movement_archive')
+    op.drop_table('log_stock_movement_archive')
+    op.drop_index('ix_area_archive_stock_id', table_name='area_archive')
+    op.drop_index('ix_area_archive_project_id_id', table_name='area_archive')
+    op.drop_table('area_archive')
+    op.drop_index('ix_stock_archive_project_id_id', table_name='stock_archive')
+    op.drop_table('stock_archive')
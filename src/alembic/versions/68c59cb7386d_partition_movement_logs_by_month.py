@@ -0,0 +1,142 @@
+"""Partition movement logs by month
+
+log_warehouse_movement, log_stock_movement and log_area_movement become RANGE partitioned
+on created_at, one partition per month from the oldest row to three months ahead, plus a
+DEFAULT partition for anything outside. Later months are created by the log_partitions job,
+which also detaches, archives and drops the months past retention.
+
+The primary key of a partitioned table has to contain the partition key, so it becomes
+(id, created_at).
+
+Revision ID: 68c59cb7386d
+Revises: 2e6f1d7fd3ac
+Create Date: 2026-10-19 19:47:06.552918
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '68c59cb7386d'
+down_revision: Union[str, None] = '2e6f1d7fd3ac'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TABLES = ('log_warehouse_movement', 'log_stock_movement', 'log_area_movement')
+
+MONTHS_AHEAD = 3
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    for table in TABLES:
+        missing = bind.execute(sa.text(f'SELECT count(*) FROM {table} WHERE created_at IS NULL')).scalar()
+        if missing:
+            raise RuntimeError(f'{table} has {missing} rows without created_at; set them first')
+
+    policies = _drop_policies(bind)
+    for table in TABLES:
+        oldest = bind.execute(sa.text(f"SELECT min(created_at AT TIME ZONE 'UTC') FROM {table}")).scalar()
+        first = (oldest.date() if oldest else date.today()).replace(day=1)
+        last = _add_months(date.today().replace(day=1), MONTHS_AHEAD)
+        _rebuild(bind, table, _months(first, last))
+    _restore_policies(policies)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    policies = _drop_policies(bind)
+    for table in TABLES:
+        _rebuild(bind, table, None)
+    _restore_policies(policies)
+
+
+def _add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _months(first: date, last: date) -> list[date]:
+    months = [first]
+    while months[-1] < last:
+        months.append(_add_months(months[-1], 1))
+    return months
+
+
+def _rebuild(bind, table: str, months: list[date] | None) -> None:
+    """Recreate table with its data, indexes, foreign keys, grants and RLS flag.
+
+    With months it becomes RANGE partitioned on created_at, without it a plain table again.
+    """
+    old = f'{table}_old'
+    params = {'table': f'public.{table}'}
+    sequence = bind.execute(sa.text("SELECT pg_get_serial_sequence(:table, 'id')"), params).scalar()
+    indexes = bind.execute(sa.text(
+        "SELECT pg_get_indexdef(i.indexrelid) FROM pg_index i "
+        "WHERE i.indrelid = to_regclass(:table) AND NOT i.indisunique"
+    ), params).scalars().all()
+    foreign_keys = bind.execute(sa.text(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = to_regclass(:table) AND contype = 'f'"
+    ), params).all()
+    grants = bind.execute(sa.text(
+        "SELECT grantee, string_agg(privilege_type, ', ') FROM information_schema.role_table_grants "
+        "WHERE table_schema = 'public' AND table_name = :name AND grantee <> current_user GROUP BY grantee"
+    ), {'name': table}).all()
+    row_security = bind.execute(sa.text(
+        "SELECT relrowsecurity FROM pg_class WHERE oid = to_regclass(:table)"
+    ), params).scalar()
+
+    op.execute(f'ALTER TABLE {table} RENAME TO {old}')
+    partition_by = ' PARTITION BY RANGE (created_at)' if months is not None else ''
+    op.execute(f'CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS INCLUDING CONSTRAINTS){partition_by}')
+    if months is not None:
+        for month in months:
+            # Same naming and UTC bounds as LogPartitionRepository
+            op.execute(f"CREATE TABLE {table}_y{month.year}m{month.month:02d} PARTITION OF {table} "
+                       f"FOR VALUES FROM ('{month} 00:00:00+00') TO ('{_add_months(month, 1)} 00:00:00+00')")
+        op.execute(f'CREATE TABLE {table}_default PARTITION OF {table} DEFAULT')
+
+    op.execute(f'INSERT INTO {table} SELECT * FROM {old}')
+    op.execute(f'ALTER SEQUENCE {sequence} OWNED BY {table}.id')
+    op.execute(f'DROP TABLE {old}')
+
+    primary_key = '(id, created_at)' if months is not None else '(id)'
+    op.execute(f'ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY {primary_key}')
+    for definition in indexes:
+        op.execute(definition.replace(' ON ONLY ', ' ON '))
+    for name, definition in foreign_keys:
+        op.execute(f'ALTER TABLE {table} ADD CONSTRAINT {name} {definition}')
+    for grantee, privileges in grants:
+        op.execute(f'GRANT {privileges} ON {table} TO {grantee}')
+    if row_security:
+        op.execute(f'ALTER TABLE {table} ENABLE ROW LEVEL SECURITY')
+
+
+def _drop_policies(bind) -> list:
+    policies = bind.execute(sa.text(
+        "SELECT tablename, policyname, permissive, cmd, array_to_string(roles, ', ') AS roles, qual, with_check "
+        "FROM pg_policies "
+        "WHERE schemaname = 'public' AND tablename = ANY(:tables)"
+    ), {'tables': list(TABLES)}).all()
+    for policy in policies:
+        op.execute(f'DROP POLICY {policy.policyname} ON {policy.tablename}')
+    return policies
+
+
+def _restore_policies(policies: list) -> None:
+    for policy in policies:
+        statement = (f'CREATE POLICY {policy.policyname} ON {policy.tablename} AS {policy.permissive} '
+                     f'FOR {policy.cmd} TO {policy.roles}')
+        if policy.qual:
+            statement += f' USING ({policy.qual})'
+        if policy.with_check:
+            statement += f' WITH CHECK ({policy.with_check})'
+        op.execute(statement)
@@ -0,0 +1,79 @@
+"""Add change feed columns and tombstones
+
+warehouse, stock and area get change_txid, the id of the last transaction that wrote the
+row, indexed per project for the /changes routes; the archive tables carry it along.
+inventory_tombstones records the rows that left the live tables.
+
+The column is added with a constant default first, so existing rows (cursor 0) don't force
+a table rewrite, and only then defaults to txid_current().
+
+Revision ID: a5250a38267f
+Revises: af984bddabc8
+Create Date: 2026-10-19 21:48:31.377012
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a5250a38267f'
+down_revision: Union[str, None] = 'af984bddabc8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TABLES = ('warehouse', 'stock', 'area')
+
+ARCHIVE_TABLES = ('stock_archive', 'area_archive')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in TABLES:
+        op.add_column(table, sa.Column('change_txid', sa.BigInteger(), nullable=False, server_default='0'))
+        op.alter_column(table, 'change_txid', server_default=sa.text('txid_current()'))
+    for table in ARCHIVE_TABLES:
+        op.add_column(table, sa.Column('change_txid', sa.BigInteger(), nullable=False, server_default='0'))
+
+    op.create_table('inventory_tombstones',
+                    sa.Column('id', sa.BigInteger(), primary_key=True, autoincrement=True, nullable=False),
+                    sa.Column('resource', sa.String(20), nullable=False),
+                    sa.Column('item_id', sa.Integer(), nullable=False),
+                    sa.Column('project_id', sa.Integer(), sa.ForeignKey('projects.id', ondelete='CASCADE'),
+                              nullable=False),
+                    sa.Column('change_txid', sa.BigInteger(), nullable=False,
+                              server_default=sa.text('txid_current()')),
+                    sa.Column('deleted_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+                    )
+    op.create_index('ix_inventory_tombstones_resource_project_id_change_txid', 'inventory_tombstones',
+                    ['resource', 'project_id', 'change_txid'])
+
+    bind = op.get_bind()
+    partitioned = {
+        table for table in TABLES
+        if bind.execute(sa.text(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table)"
+        ), {'table': f'public.{table}'}).scalar()
+    }
+    # As in 53d2c8c93ed7; partitioned parents can't be indexed CONCURRENTLY
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            op.create_index(f'ix_{table}_project_id_change_txid', table, ['project_id', 'change_txid', 'id'],
+                            postgresql_concurrently=table not in partitioned, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in reversed(TABLES):
+        op.drop_index(f'ix_{table}_project_id_change_txid', table_name=table, if_exists=True)
+
+    op.drop_index('ix_inventory_tombstones_resource_project_id_change_txid', table_name='inventory_tombstones')
+    op.drop_table('inventory_tombstones')
+
+    for table in reversed(ARCHIVE_TABLES):
+        op.drop_column(table, 'change_txid')
+    for table in reversed(TABLES):
+        op.drop_column(table, 'change_txid')
@@ -0,0 +1,39 @@
+"""Add column updated_at to inventory tables
+
+warehouse, stock and area get updated_at, set by the models on every update and used for
+the ETags of the get-by-id routes. The archive tables get it too, since archiving copies
+every column of the live row. now() is not volatile, so existing rows take the default
+without a table rewrite.
+
+Revision ID: af984bddabc8
+Revises: 555f12f4f44a
+Create Date: 2026-10-19 21:12:09.640271
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'af984bddabc8'
+down_revision: Union[str, None] = '555f12f4f44a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TABLES = ('warehouse', 'stock', 'area', 'stock_archive', 'area_archive')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in TABLES:
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False,
+                                       server_default=sa.func.now()))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in reversed(TABLES):
+        op.drop_column(table, 'updated_at')
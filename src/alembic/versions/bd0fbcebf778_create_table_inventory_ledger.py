@@ -0,0 +1,61 @@
+"""Create table inventory_ledger and inventory_ledger_checkpoint
+
+Revision ID: bd0fbcebf778
+Revises: 0639a13f7529
+Create Date: 2026-10-19 10:03:17.558231
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'bd0fbcebf778'
+down_revision: Union[str, None] = '0639a13f7529'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('inventory_ledger',
+                    sa.Column('id', sa.BigInteger(), primary_key=True, autoincrement=True, nullable=False),
+                    sa.Column('location', sa.String(10), nullable=False),
+                    sa.Column('item_id', sa.Integer(), nullable=False),
+                    sa.Column('movement_type', sa.String(30), nullable=False),
+                    sa.Column('quantity', sa.Float(), nullable=False),
+                    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+                    sa.Column('project_id', sa.Integer(), sa.ForeignKey('projects.id', ondelete='CASCADE'), nullable=False),
+                    sa.Column('warehouse_id', sa.Integer(), nullable=False),
+                    sa.Column('created_by_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+                    )
+    op.create_index('ix_inventory_ledger_created_at', 'inventory_ledger', ['created_at'], postgresql_using='brin')
+    op.create_index('ix_inventory_ledger_item', 'inventory_ledger', ['location', 'item_id', 'created_at'])
+
+    op.create_table('inventory_ledger_checkpoint',
+                    sa.Column('location', sa.String(10), primary_key=True),
+                    sa.Column('item_id', sa.Integer(), primary_key=True),
+                    sa.Column('checkpoint_at', sa.DateTime(timezone=True), primary_key=True),
+                    sa.Column('balance', sa.Float(), nullable=False),
+                    sa.Column('project_id', sa.Integer(), sa.ForeignKey('projects.id', ondelete='CASCADE'), nullable=False),
+                    )
+
+    # History before the ledger is not replayable, so today's balances become the first checkpoint
+    op.execute("""
+        INSERT INTO inventory_ledger_checkpoint (location, item_id, checkpoint_at, balance, project_id)
+        SELECT 'warehouse', id, now(), coalesce(left_over, 0), project_id FROM warehouse
+        UNION ALL
+        SELECT 'stock', id, now(), left_over, project_id FROM stock
+        UNION ALL
+        SELECT 'area', id, now(), quantity, project_id FROM area
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('inventory_ledger_checkpoint')
+    op.drop_index('ix_inventory_ledger_item', table_name='inventory_ledger')
+    op.drop_index('ix_inventory_ledger_created_at', table_name='inventory_ledger')
+    op.drop_table('inventory_ledger')
@@ -0,0 +1,43 @@
+"""Add non-negative quantity checks
+
+Revision ID: cd128a815795
+Revises: bd0fbcebf778
+Create Date: 2026-10-19 14:21:08.337902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'cd128a815795'
+down_revision: Union[str, None] = 'bd0fbcebf778'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+CHECKS = [
+    ('warehouse', 'ck_warehouse_left_over_non_negative', 'left_over >= 0'),
+    ('stock', 'ck_stock_left_over_non_negative', 'left_over >= 0'),
+    ('area', 'ck_area_quantity_non_negative', 'quantity >= 0'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # NOT VALID only takes the ACCESS EXCLUSIVE lock briefly; new rows are checked from here on
+    for table, name, condition in CHECKS:
+        op.execute(f'ALTER TABLE {table} ADD CONSTRAINT {name} CHECK ({condition}) NOT VALID')
+    # The migration runs in one transaction, which would hold that lock through the scans.
+    # Validating after it has committed only takes SHARE UPDATE EXCLUSIVE, so writes go on.
+    with op.get_context().autocommit_block():
+        for table, name, _ in CHECKS:
+            op.execute(f'ALTER TABLE {table} VALIDATE CONSTRAINT {name}')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, name, _ in reversed(CHECKS):
+        op.drop_constraint(name, table, type_='check')
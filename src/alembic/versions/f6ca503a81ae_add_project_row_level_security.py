@@ -0,0 +1,72 @@
+"""Add project row level security
+
+Revision ID: f6ca503a81ae
+Revises: 53d2c8c93ed7
+Create Date: 2026-10-19 18:21:37.915204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6ca503a81ae'
+down_revision: Union[str, None] = '53d2c8c93ed7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TENANT_ROLE = 'wm_tenant'
+
+PROJECT = "current_setting('app.project_id')::int"
+
+# table -> rows of the session's project; the log tables have no project_id and go through
+# the row they belong to, whose own policy applies inside the subquery
+POLICIES = {
+    'warehouse': f'project_id = {PROJECT}',
+    'stock': f'project_id = {PROJECT}',
+    'area': f'project_id = {PROJECT}',
+    'log_warehouse_movement': 'EXISTS (SELECT 1 FROM warehouse WHERE warehouse.id = warehouse_id)',
+    'log_stock_movement': 'EXISTS (SELECT 1 FROM stock WHERE stock.id = stock_id)',
+    'log_area_movement': 'EXISTS (SELECT 1 FROM area WHERE area.id = area_id)',
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(f"""
+        DO $$
+        BEGIN
+            IF NOT EXISTS (SELECT FROM pg_roles WHERE rolname = '{TENANT_ROLE}') THEN
+                CREATE ROLE {TENANT_ROLE} NOLOGIN;
+            END IF;
+        END
+        $$
+    """)
+    # The application's login role switches to the tenant role with SET LOCAL ROLE
+    op.execute(f'GRANT {TENANT_ROLE} TO CURRENT_USER')
+    op.execute(f'GRANT USAGE ON SCHEMA public TO {TENANT_ROLE}')
+    op.execute(f'GRANT SELECT, INSERT, UPDATE, DELETE ON ALL TABLES IN SCHEMA public TO {TENANT_ROLE}')
+    op.execute(f'GRANT USAGE, SELECT ON ALL SEQUENCES IN SCHEMA public TO {TENANT_ROLE}')
+    op.execute(f'ALTER DEFAULT PRIVILEGES IN SCHEMA public '
+               f'GRANT SELECT, INSERT, UPDATE, DELETE ON TABLES TO {TENANT_ROLE}')
+    op.execute(f'ALTER DEFAULT PRIVILEGES IN SCHEMA public GRANT USAGE, SELECT ON SEQUENCES TO {TENANT_ROLE}')
+
+    for table, condition in POLICIES.items():
+        op.execute(f'ALTER TABLE {table} ENABLE ROW LEVEL SECURITY')
+        op.execute(f'CREATE POLICY {table}_project_isolation ON {table} TO {TENANT_ROLE} '
+                   f'USING ({condition}) WITH CHECK ({condition})')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in reversed(list(POLICIES)):
+        op.execute(f'DROP POLICY IF EXISTS {table}_project_isolation ON {table}')
+        op.execute(f'ALTER TABLE {table} DISABLE ROW LEVEL SECURITY')
+
+    op.execute(f'ALTER DEFAULT PRIVILEGES IN SCHEMA public REVOKE USAGE, SELECT ON SEQUENCES FROM {TENANT_ROLE}')
+    op.execute(f'ALTER DEFAULT PRIVILEGES IN SCHEMA public '
+               f'REVOKE SELECT, INSERT, UPDATE, DELETE ON TABLES FROM {TENANT_ROLE}')
+    op.execute(f'DROP OWNED BY {TENANT_ROLE}')
+    op.execute(f'DROP ROLE {TENANT_ROLE}')
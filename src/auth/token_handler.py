@@ -1,4 +1,5 @@
 import os
+import uuid
 from datetime import datetime, timezone, timedelta
 
 from fastapi.requests import Request
@@ -30,7 +31,8 @@ class TokenHandler:
     def generate_refresh_token(user_data) -> str:
         try:
             encode = user_data.copy()
-            encode.update(({"exp": datetime.now(timezone.utc) + timedelta(days=30)}))
+            # jti keeps two tokens issued in the same second distinct, so rotation can tell them apart
+            encode.update(({"exp": datetime.now(timezone.utc) + timedelta(days=30), "jti": uuid.uuid4().hex}))
             secret_key = os.getenv('JWT_REFRESH_SECRET_KEY')
             algorithm = os.getenv('JWT_ALGORITHM')
             refresh_token = jwt.encode(encode, secret_key, algorithm)
@@ -40,6 +42,17 @@ class TokenHandler:
             logger.error(f"Failed to created new access token {ex}")
             raise HTTPException(status_code=500, detail=f"Failed to created new access token {ex}")
 
+    @staticmethod
+    def verify_refresh_token(refresh_token: str | None) -> dict:
+        if not refresh_token:
+            raise HTTPException(status_code=401, detail='Authorization Error')
+        try:
+            secret_key = os.getenv('JWT_REFRESH_SECRET_KEY')
+            algorithm = os.getenv('JWT_ALGORITHM')
+            return jwt.decode(refresh_token, secret_key, algorithm)
+        except InvalidTokenError as ex:
+            raise HTTPException(status_code=401, detail=f'Authorization Error {ex}')
+
     @staticmethod
     def verify_access_token(req: Request) -> dict:
         if req.headers.get('Authorization'):
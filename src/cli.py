@@ -0,0 +1,78 @@
+"""Administrative commands.
+
+    python -m src.cli create-admin
+    python -m src.cli rebuild-rollup --from 2026-01-01 --to 2026-01-31
+"""
+import argparse
+import asyncio
+import os
+import sys
+from datetime import date
+
+# Loads .env before any src module reads its settings, and registers every mapper, before the
+# repositories are used outside the app
+import main  # noqa: E402
+
+from src.database.setup import SessionLocal, engine  # noqa: E402
+from src.repositories.admin_repository import CreateAdminRepository  # noqa: E402
+from src.repositories.inventory_repository import DailyRollupRepository  # noqa: E402
+
+
+async def create_admin(args) -> int:
+    email = args.email or os.getenv('INITIAL_ADMIN_USER')
+    password = args.password or os.getenv('INITIAL_ADMIN_PASSWORD')
+    if not email or not password:
+        print('Pass --email/--password or set INITIAL_ADMIN_USER/INITIAL_ADMIN_PASSWORD')
+        return 2
+    data = main.initial_admin_data(email, password)
+
+    async with SessionLocal() as db:
+        created = await CreateAdminRepository(db).create_admin(data)
+    print(f'Admin {data.email} created' if created else f'Admin {data.email} already exists')
+    return 0
+
+
+async def rebuild_rollup(args) -> int:
+    if args.date_from and args.date_to and args.date_from > args.date_to:
+        print('--from must not be after --to')
+        return 2
+
+    async with SessionLocal() as db:
+        rows = await DailyRollupRepository(db).rebuild(args.date_from, args.date_to)
+        await db.commit()
+    print(f'Rebuilt {rows} rollup rows for {args.date_from or "start"} .. {args.date_to or "today"}')
+    return 0
+
+
+COMMANDS = {
+    'create-admin': create_admin,
+    'rebuild-rollup': rebuild_rollup,
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m src.cli', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    admin = commands.add_parser('create-admin', help='create the initial admin user if it does not exist')
+    admin.add_argument('--email', help='default: INITIAL_ADMIN_USER')
+    admin.add_argument('--password', help='default: INITIAL_ADMIN_PASSWORD')
+
+    rollup = commands.add_parser('rebuild-rollup', help='recompute inventory_daily_rollup for a date range')
+    rollup.add_argument('--from', dest='date_from', type=date.fromisoformat, help='first day, default: all history')
+    rollup.add_argument('--to', dest='date_to', type=date.fromisoformat, help='last day, default: today')
+
+    return parser.parse_args(argv)
+
+
+async def run(args) -> int:
+    engine.sync_engine.echo = False
+    try:
+        return await COMMANDS[args.command](args)
+    finally:
+        await engine.dispose()
+
+
+if __name__ == '__main__':
+    sys.exit(asyncio.run(run(parse_args())))
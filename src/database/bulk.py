@@ -0,0 +1,79 @@
+import asyncio
+import os
+
+from fastapi import HTTPException, status
+from sqlalchemy import bindparam, column, func, any_, Integer
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.types import TypeEngine
+
+
+# Bulk get-by-ids requests: ids accepted per request, ids per query, and chunk queries in
+# flight across the whole worker; keep the last well below the engine's pool (20 + 10)
+BULK_IDS_MAX = int(os.getenv('BULK_IDS_MAX', '10000'))
+BULK_IDS_CHUNK = int(os.getenv('BULK_IDS_CHUNK', '1000'))
+BULK_IDS_CONCURRENCY = int(os.getenv('BULK_IDS_CONCURRENCY', '8'))
+
+_chunk_slots = asyncio.Semaphore(BULK_IDS_CONCURRENCY)
+
+
+def unnest_rows(name: str, columns: dict[str, TypeEngine], rows: list[tuple]):
+    """Expose ``rows`` as a derived table bound through one array parameter per column.
+
+    The rendered SQL is the same for any number of rows, so the driver prepares it once.
+    """
+    arrays = [
+        bindparam(f'{name}_{key}', [row[idx] for row in rows], type_=ARRAY(type_))
+        for idx, (key, type_) in enumerate(columns.items())
+    ]
+    return (
+        func.unnest(*arrays)
+        .table_valued(*(column(key, type_) for key, type_ in columns.items()))
+        .render_derived(name=name)
+    )
+
+
+def any_of(col, values: list, type_: TypeEngine = Integer()):
+    """``col = ANY(:values)``, the IN of one array parameter; unlike ``in_`` its SQL doesn't
+    change with the number of values."""
+    return col == any_(bindparam(None, list(values), type_=ARRAY(type_)))
+
+
+async def fetch_by_ids(db: AsyncSession, ids: list[int], fetch, chunk_size: int = BULK_IDS_CHUNK) -> list:
+    """Rows of ``ids`` in request order, without duplicates; ids that aren't found are left out.
+
+    ``fetch(session, chunk)`` returns the rows of one chunk, each with an ``id``. A single
+    chunk runs on ``db``, and so do several, one after another, when ``db`` is already in a
+    transaction. Otherwise they run concurrently on sessions of their own scoped to the same
+    project, and ``db`` holds no connection meanwhile.
+
+    Connection budget: the chunk sessions of every request of the worker share
+    BULK_IDS_CONCURRENCY connections, each taken only once a slot is free. No request holds a
+    connection while it waits for another, so large requests can't deadlock the pool, and
+    the rest of it stays free for other requests, the scheduler and the change event listener.
+    """
+    from src.database.setup import SessionLocal
+
+    unique_ids = list(dict.fromkeys(ids))
+    if len(unique_ids) > BULK_IDS_MAX:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f'At most {BULK_IDS_MAX} ids per request')
+    if not unique_ids:
+        return []
+
+    chunks = [unique_ids[i:i + chunk_size] for i in range(0, len(unique_ids), chunk_size)]
+
+    if len(chunks) == 1 or db.in_transaction():
+        results = [await fetch(db, chunk) for chunk in chunks]
+    else:
+        async def run(chunk: list[int]) -> list:
+            async with _chunk_slots:
+                async with SessionLocal() as session:
+                    if 'project_id' in db.info:
+                        session.info['project_id'] = db.info['project_id']
+                    return await fetch(session, chunk)
+
+        results = await asyncio.gather(*(run(chunk) for chunk in chunks))
+
+    by_id = {row.id: row for rows in results for row in rows}
+    return [by_id[i] for i in unique_ids if i in by_id]
@@ -0,0 +1,187 @@
+import asyncio
+import json
+import os
+from collections import defaultdict
+
+from sqlalchemy import select, func, Text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.bulk import unnest_rows
+from src.database.row_security import ALL_PROJECTS
+
+from src.logging_config import setup_logger
+logger = setup_logger(__name__, 'change_events.log')
+
+
+CHANNEL = 'inventory_changes'
+
+# NOTIFY payloads must stay below 8000 bytes; larger batches are split
+MAX_PAYLOAD = 7000
+
+QUEUE_SIZE = int(os.getenv('CHANGE_EVENTS_QUEUE_SIZE', '100'))
+HEARTBEAT = float(os.getenv('CHANGE_EVENTS_HEARTBEAT', '15'))
+HEALTH_INTERVAL = 30
+RECONNECT_DELAY = 5
+
+# Sentinels put in a subscriber's queue in place of a payload
+EVICTED = object()
+RESYNC = object()
+
+
+async def notify_changes(db: AsyncSession, movements: list[dict]) -> None:
+    """NOTIFY the movements of the current transaction, one payload per project.
+
+    Postgres delivers them only when the transaction commits and drops them on rollback, so
+    listeners never hear of a change they couldn't read yet.
+    """
+    by_project = defaultdict(list)
+    for item in movements:
+        by_project[item['project_id']].append({
+            'resource': item['location'],
+            'id': item['item_id'],
+            'warehouse_id': item['warehouse_id'],
+            'quantity': item['quantity'],
+            'movement_type': item['movement_type'],
+        })
+
+    payloads = []
+    for project_id, events in by_project.items():
+        chunk = []
+        for event in events:
+            if chunk and len(json.dumps({'project_id': project_id, 'events': chunk + [event]})) > MAX_PAYLOAD:
+                payloads.append(json.dumps({'project_id': project_id, 'events': chunk}))
+                chunk = []
+            chunk.append(event)
+        payloads.append(json.dumps({'project_id': project_id, 'events': chunk}))
+
+    rows = unnest_rows('events', {'payload': Text()}, [(i,) for i in payloads])
+    await db.execute(select(func.pg_notify(CHANNEL, rows.c.payload)).select_from(rows))
+
+
+class Subscriber:
+
+    def __init__(self, project_id: int, queue_size: int = QUEUE_SIZE):
+        self.project_id = project_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+
+class ChangeBroadcaster:
+    """Fans the NOTIFYs of CHANNEL out to the SSE subscribers of this worker.
+
+    A single connection per worker LISTENs while it has subscribers: opened with the first,
+    closed after the last, and reopened if it breaks; subscribers are told to resync then,
+    since events may have been missed. Each subscriber has a bounded queue, and one that
+    falls a full queue behind is evicted rather than buffered without limit or allowed to
+    slow the others down.
+    """
+
+    def __init__(self):
+        self.subscribers: dict[int, set[Subscriber]] = defaultdict(set)
+        self.task: asyncio.Task | None = None
+
+    def subscribe(self, project_id: int) -> Subscriber:
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._listen(), name='change_events:listen')
+        subscriber = Subscriber(project_id)
+        self.subscribers[project_id].add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        subscribers = self.subscribers.get(subscriber.project_id)
+        if subscribers is None:
+            return
+        subscribers.discard(subscriber)
+        if not subscribers:
+            del self.subscribers[subscriber.project_id]
+        # Give the listening connection back to the pool; the next subscriber reopens it
+        if not self.subscribers and self.task:
+            self.task.cancel()
+            self.task = None
+
+    async def stop(self) -> None:
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    def publish(self, payload: str) -> None:
+        try:
+            project_id = json.loads(payload)['project_id']
+        except (ValueError, KeyError) as ex:
+            logger.error(f'Invalid change event {payload[:100]} : {ex}')
+            return
+        # The admin project sees every project, as in ProjectVerify
+        targets = set(self.subscribers.get(project_id, ()))
+        if project_id != ALL_PROJECTS:
+            targets |= self.subscribers.get(ALL_PROJECTS, set())
+        for subscriber in targets:
+            self._put(subscriber, payload)
+
+    def _put(self, subscriber: Subscriber, item) -> None:
+        try:
+            subscriber.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.unsubscribe(subscriber)
+            # Drop the backlog so the eviction notice is the next thing it reads
+            while not subscriber.queue.empty():
+                subscriber.queue.get_nowait()
+            subscriber.queue.put_nowait(EVICTED)
+            logger.warning(f'Evicted a slow change event subscriber of project {subscriber.project_id}')
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        self.publish(payload)
+
+    async def _listen(self) -> None:
+        from src.database.setup import engine
+
+        first = True
+        while True:
+            try:
+                # Held for as long as the worker streams events, so it takes one pooled connection
+                async with engine.connect() as connection:
+                    raw = (await connection.get_raw_connection()).driver_connection
+                    await raw.add_listener(CHANNEL, self._on_notify)
+                    if not first:
+                        for subscribers in list(self.subscribers.values()):
+                            for subscriber in list(subscribers):
+                                self._put(subscriber, RESYNC)
+                    first = False
+                    try:
+                        while True:
+                            await asyncio.sleep(HEALTH_INTERVAL)
+                            # An idle broken connection only shows up when used
+                            await raw.execute('SELECT 1')
+                    finally:
+                        if not raw.is_closed():
+                            await raw.remove_listener(CHANNEL, self._on_notify)
+            except asyncio.CancelledError:
+                raise
+            except Exception as ex:
+                logger.error(f'Change event listener failed, reconnecting in {RECONNECT_DELAY}s : {ex}')
+                await asyncio.sleep(RECONNECT_DELAY)
+
+
+broadcaster = ChangeBroadcaster()
+
+
+async def stream_events(subscriber: Subscriber):
+    """Server-Sent Events of one subscriber until it disconnects or is evicted."""
+    try:
+        yield f'retry: {RECONNECT_DELAY * 1000}\n\n'
+        while True:
+            try:
+                item = await asyncio.wait_for(subscriber.queue.get(), HEARTBEAT)
+            except asyncio.TimeoutError:
+                # Keeps proxies from closing an idle stream
+                yield ': keep-alive\n\n'
+                continue
+
+            if item is EVICTED:
+                yield 'event: evicted\ndata: {}\n\n'
+                return
+            if item is RESYNC:
+                yield 'event: resync\ndata: {}\n\n'
+                continue
+            yield f'event: changes\ndata: {item}\n\n'
+    finally:
+        broadcaster.unsubscribe(subscriber)
@@ -0,0 +1,68 @@
+import os
+from collections import OrderedDict
+from typing import Any, Callable, NamedTuple
+
+from sqlalchemy import bindparam, func, Select
+from sqlalchemy.sql.elements import BindParameter, ColumnElement
+
+# Statements kept per FilterQuery; one per model and combination of filters in use
+FILTER_QUERY_CACHE_SIZE = int(os.getenv('FILTER_QUERY_CACHE_SIZE', '256'))
+
+
+class FilterField(NamedTuple):
+    clause: Callable[[BindParameter], ColumnElement]
+    # The bound value for a filter value
+    value: Callable[[Any], Any] = lambda val: val
+
+
+def equals(column) -> FilterField:
+    return FilterField(lambda param: column == param)
+
+
+def contains(column) -> FilterField:
+    return FilterField(lambda param: column.ilike(param), lambda val: f'%{val}%')
+
+
+def on_date(column) -> FilterField:
+    return FilterField(lambda param: func.date(column) == param)
+
+
+class FilterQuery:
+    """The select of a filter route for a given set of filter fields, with their values bound.
+
+    base(model) returns the select with its joins and loader options and fields(model) the
+    filterable fields, for each model the route reads (a live table and its archive). A
+    statement is built once per model and set of fields in use, with a named bind parameter
+    per field, and reused for every request with that shape: SQLAlchemy memoizes the cache
+    key on the statement, so a repeated filter skips both building and compiling its SQL.
+    """
+
+    def __init__(self, base: Callable[[Any], Select], fields: Callable[[Any], dict[str, FilterField]],
+                 cache_size: int = FILTER_QUERY_CACHE_SIZE):
+        self.base = base
+        self.fields = fields
+        self.cache_size = cache_size
+        self.model_fields: dict[Any, dict[str, FilterField]] = {}
+        self.statements: OrderedDict[tuple, Select] = OrderedDict()
+
+    def build(self, model, values: dict[str, Any]) -> tuple[Select, dict[str, Any]]:
+        """The statement and parameters for the non-None values of the fields of model."""
+        fields = self.model_fields.get(model)
+        if fields is None:
+            fields = self.model_fields[model] = self.fields(model)
+
+        active = {name: value for name, value in values.items() if value is not None and name in fields}
+        key = (model, frozenset(active))
+
+        stmt = self.statements.get(key)
+        if stmt is None:
+            stmt = self.base(model).where(
+                *(fields[name].clause(bindparam(f'filter_{name}')) for name in sorted(active))
+            )
+            self.statements[key] = stmt
+            if len(self.statements) > self.cache_size:
+                self.statements.popitem(last=False)
+        else:
+            self.statements.move_to_end(key)
+
+        return stmt, {f'filter_{name}': fields[name].value(value) for name, value in active.items()}
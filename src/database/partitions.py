@@ -0,0 +1,27 @@
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# LIST partitioned on project_id when the opt-in migration 2e6f1d7fd3ac was applied
+PROJECT_PARTITIONED_TABLES = ('warehouse', 'stock', 'area')
+
+
+async def create_project_partitions(db: AsyncSession, project_id: int) -> list[str]:
+    """Create the partitions of a new project in every table partitioned by project.
+
+    Runs in the caller's transaction, so the project and its partitions commit together.
+    Returns the partitioned tables; empty when the tables are not partitioned.
+    """
+    result = await db.execute(
+        text("SELECT c.relname FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+             "WHERE c.relnamespace = 'public'::regnamespace AND c.relname = ANY(:tables)"),
+        {'tables': list(PROJECT_PARTITIONED_TABLES)}
+    )
+    tables = list(result.scalars().all())
+
+    project_id = int(project_id)
+    for table in tables:
+        # Checks the DEFAULT partition for rows of the project, which a new project has none of
+        await db.execute(text(
+            f'CREATE TABLE IF NOT EXISTS {table}_p{project_id} PARTITION OF {table} FOR VALUES IN ({project_id})'
+        ))
+    return tables
@@ -0,0 +1,45 @@
+import os
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+# Project 1 is the admin project and sees every row, as in ProjectVerify
+ALL_PROJECTS = 1
+
+# Requests of every other project run as this role; the policies only apply to it
+TENANT_ROLE = 'wm_tenant'
+
+# Tables whose policies enforce tenancy, so queries on them need no project filter in Python
+PROTECTED_TABLES = frozenset({
+    'warehouse',
+    'stock',
+    'area',
+    'log_warehouse_movement',
+    'log_stock_movement',
+    'log_area_movement',
+})
+
+enabled = os.getenv('PROJECT_RLS_ENABLED', 'false').lower() == 'true'
+
+
+def scope_session(session, project_id: int | None) -> None:
+    """Bind a session to the project of the request; None (no valid token) sees no rows."""
+    session.info['project_id'] = project_id or 0
+
+
+def filters_project(table_name: str) -> bool:
+    """True when the database already restricts table_name to the session's project."""
+    return enabled and table_name in PROTECTED_TABLES
+
+
+@event.listens_for(Session, 'after_begin')
+def _set_project(session, transaction, connection) -> None:
+    # Sessions opened outside a request (jobs, CLI) are never scoped
+    project_id = session.info.get('project_id')
+    if project_id is None or project_id == ALL_PROJECTS:
+        return
+
+    # Both are transaction-local, so nothing leaks to the next user of the pooled connection
+    connection.execute(text(f'SET LOCAL ROLE {TENANT_ROLE}'))
+    connection.execute(text("SELECT set_config('app.project_id', :project_id, true)"),
+                       {'project_id': str(project_id)})
@@ -1,9 +1,14 @@
 
+from fastapi import HTTPException
+from fastapi.requests import Request
 from sqlalchemy.ext.asyncio import (
     create_async_engine,
     async_sessionmaker,
 )
 
+from src.auth.token_handler import TokenHandler
+from src.database import row_security
+
 # Define the base model (if not already in models.py)
 
 # Connection string (use `postgresql+asyncpg` instead of `postgres+asyncpg`)
@@ -26,10 +31,20 @@ SessionLocal = async_sessionmaker(
     expire_on_commit=False,
 )
 
-async def get_db():
+async def get_db(request: Request):
     async with SessionLocal() as session:
+        if row_security.enabled:
+            row_security.scope_session(session, _request_project_id(request))
         try:
             yield session
         finally:
             await session.close()
 
+
+
+def _request_project_id(request: Request) -> int | None:
+    # Authentication itself is still the job of the route's dependencies
+    try:
+        return TokenHandler.verify_access_token(request).get('project_id')
+    except HTTPException:
+        return None
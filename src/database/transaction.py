@@ -0,0 +1,159 @@
+
+import asyncio
+import os
+import random
+from collections import defaultdict
+from typing import Awaitable, Callable, Iterable, TypeVar
+
+from sqlalchemy import select, update, Integer, Float
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.bulk import unnest_rows
+from src.models.area_model import AreaModel
+from src.models.stock_models import StockModel
+from src.models.warehouse_model import WarehouseModel
+
+from src.logging_config import setup_logger
+logger = setup_logger(__name__, 'transaction.log')
+
+T = TypeVar('T')
+
+RETRYABLE_SQLSTATES = {
+    '40P01': 'deadlock',
+    '40001': 'serialization_failure',
+}
+
+# Every write path locks rows in this order, by ascending id inside each table
+LOCK_ORDER = (WarehouseModel, StockModel, AreaModel)
+
+MAX_ATTEMPTS = int(os.getenv('TX_MAX_ATTEMPTS', '5'))
+RETRY_BASE_DELAY = float(os.getenv('TX_RETRY_BASE_DELAY', '0.02'))
+RETRY_MAX_DELAY = float(os.getenv('TX_RETRY_MAX_DELAY', '0.5'))
+
+
+class RetryStats:
+
+    def __init__(self):
+        self.counters: dict[str, dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def add(self, name: str, counter: str) -> None:
+        self.counters[name][counter] += 1
+
+    def snapshot(self) -> dict[str, dict[str, int]]:
+        totals = defaultdict(int)
+        for counters in self.counters.values():
+            for counter, value in counters.items():
+                totals[counter] += value
+        return {'total': dict(totals), **{name: dict(counters) for name, counters in self.counters.items()}}
+
+
+retry_stats = RetryStats()
+
+
+def retry_reason(ex: DBAPIError) -> str | None:
+    sqlstate = getattr(ex.orig, 'sqlstate', None) or getattr(ex.orig, 'pgcode', None)
+    return RETRYABLE_SQLSTATES.get(sqlstate)
+
+
+async def run_transaction(db: AsyncSession, work: Callable[[], Awaitable[T]], name: str,
+                          max_attempts: int = MAX_ATTEMPTS) -> T:
+    """Run work() and commit, retrying the whole unit on deadlock or serialization failure.
+
+    work() is called again from scratch after a rollback, so it must rebuild any state it
+    collects (recorder movements, pending ORM objects) on every call. A callback stored in
+    db.info['before_commit'] is awaited with work()'s result just before the commit, for
+    bookkeeping that has to commit atomically with the unit.
+    """
+    for attempt in range(1, max_attempts + 1):
+        db.info.pop('lock_level', None)
+        try:
+            result = await work()
+            before_commit = db.info.get('before_commit')
+            if before_commit:
+                await before_commit(db, result)
+            await db.commit()
+
+        except DBAPIError as ex:
+            await db.rollback()
+            reason = retry_reason(ex)
+            if reason is None:
+                raise
+            retry_stats.add(name, reason)
+            if attempt == max_attempts:
+                retry_stats.add(name, 'exhausted')
+                logger.error(f"{name}: {reason} after {attempt} attempts, giving up")
+                raise
+            # Full jitter, so transactions that collided don't retry in lockstep
+            delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+            logger.warning(f"{name}: {reason} on attempt {attempt}, retrying in {delay:.3f}s")
+            await asyncio.sleep(delay)
+            continue
+
+        except BaseException:
+            await db.rollback()
+            raise
+
+        finally:
+            db.info.pop('lock_level', None)
+
+        retry_stats.add(name, 'committed')
+        if attempt > 1:
+            retry_stats.add(name, 'committed_after_retry')
+        return result
+
+
+async def lock_rows(db: AsyncSession, model, ids: Iterable[int], *where_clauses, columns: tuple = ()) -> dict:
+    """SELECT ... FOR UPDATE the given rows in ascending id order, keyed by id.
+
+    Tables must be locked in LOCK_ORDER within one transaction; locking a table that comes
+    earlier than one already locked raises, since that is exactly the pattern that deadlocks.
+    """
+    _enter_lock_level(db, model)
+
+    stmt = (
+        (select(*columns) if columns else select(model))
+        .where(model.id.in_(sorted(set(ids))), *where_clauses)
+        .order_by(model.id)
+        .with_for_update()
+    )
+    result = await db.execute(stmt)
+    rows = result.all() if columns else result.scalars().all()
+    return {row.id: row for row in rows}
+
+
+async def apply_deltas(db: AsyncSession, column, deltas: dict[int, float], *where_clauses,
+                       returning: tuple = (), also: tuple = ()) -> dict:
+    """Add a signed delta to column for many rows in one guarded UPDATE ... RETURNING.
+
+    A row is only updated if the result stays non-negative, so a deduction and its check are
+    a single statement and the row lock is held for one round trip instead of a
+    SELECT ... FOR UPDATE, a Python check and an UPDATE. Rows missing from the returned
+    dict were not found, filtered out, or didn't hold enough; the caller decides which.
+    Columns in `also` receive the same delta without a guard.
+    """
+    model = column.class_
+    _enter_lock_level(db, model)
+
+    amounts = unnest_rows('amounts', {'id': Integer(), 'delta': Float()}, sorted(deltas.items()))
+    result = await db.execute(
+        update(model)
+        .where(model.id == amounts.c.id,
+               column + amounts.c.delta >= 0,
+               *where_clauses)
+        .values({i.key: i + amounts.c.delta for i in (column, *also)})
+        .returning(model.id, *returning)
+        .execution_options(synchronize_session=False)
+    )
+    return {row.id: row for row in result}
+
+
+def _enter_lock_level(db: AsyncSession, model) -> None:
+    level = LOCK_ORDER.index(model)
+    last_level = db.info.get('lock_level', -1)
+    if level < last_level:
+        raise RuntimeError(
+            f"{model.__tablename__} locked after {LOCK_ORDER[last_level].__tablename__}; "
+            f"lock order is {' -> '.join(i.__tablename__ for i in LOCK_ORDER)}"
+        )
+    db.info['lock_level'] = level
@@ -0,0 +1,168 @@
+
+import math
+import os
+import time
+from collections import OrderedDict
+from functools import cached_property
+
+from fastapi import HTTPException, status
+from fastapi.requests import Request
+
+from src.auth.token_handler import TokenHandler
+
+from src.logging_config import setup_logger
+logger = setup_logger(__name__, 'rate_limit.log')
+
+
+# "<tokens>/<seconds>": bucket capacity, refilled evenly over the period
+DEFAULT_LIMITS = {
+    'login': '5/60',
+    'heavy': '30/60',
+    'batch': '20/60',
+}
+
+MAX_MEMORY_BUCKETS = 100_000
+
+
+class TokenBucketLimit:
+
+    def __init__(self, spec: str):
+        capacity, seconds = spec.split('/')
+        self.capacity = float(capacity)
+        self.rate = self.capacity / float(seconds)
+
+
+class MemoryBackend:
+    """Per-process buckets; with several workers each one enforces the limit on its own."""
+
+    def __init__(self, max_buckets: int = MAX_MEMORY_BUCKETS):
+        self.buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self.max_buckets = max_buckets
+
+    async def take(self, key: str, limit: TokenBucketLimit) -> float:
+        now = time.monotonic()
+        tokens, updated = self.buckets.pop(key, (limit.capacity, now))
+        tokens = min(limit.capacity, tokens + (now - updated) * limit.rate)
+
+        retry_after = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) / limit.rate
+
+        # Most recently used last, so the oldest buckets (long since full again) are dropped first
+        self.buckets[key] = (tokens, now)
+        if len(self.buckets) > self.max_buckets:
+            self.buckets.popitem(last=False)
+        return retry_after
+
+
+class RedisBackend:
+    """Buckets shared by every worker; the refill-and-take runs atomically as a Lua script."""
+
+    SCRIPT = """
+        local capacity = tonumber(ARGV[1])
+        local rate = tonumber(ARGV[2])
+        local now = tonumber(ARGV[3])
+        local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+        local tokens = tonumber(bucket[1]) or capacity
+        local updated = tonumber(bucket[2]) or now
+        tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+        local retry_after = 0
+        if tokens >= 1 then
+            tokens = tokens - 1
+        else
+            retry_after = (1 - tokens) / rate
+        end
+        redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+        redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+        return tostring(retry_after)
+    """
+
+    def __init__(self, url: str):
+        # Only needed when a shared backend is configured
+        from redis import asyncio as redis
+
+        self.client = redis.from_url(url)
+        self.script = self.client.register_script(self.SCRIPT)
+
+    async def take(self, key: str, limit: TokenBucketLimit) -> float:
+        try:
+            result = await self.script(keys=[f'rate_limit:{key}'],
+                                       args=[limit.capacity, limit.rate, time.time()])
+            return float(result)
+        except Exception as ex:
+            # A limiter outage must not take the API down with it
+            logger.error(f"Rate limit backend error : {ex}")
+            return 0.0
+
+
+def _create_backend():
+    url = os.getenv('RATE_LIMIT_REDIS_URL')
+    if url:
+        return RedisBackend(url)
+    return MemoryBackend()
+
+
+_backend = None
+
+
+def get_backend():
+    # Created on first use, so the settings are read after the environment is loaded
+    global _backend
+    if _backend is None:
+        _backend = _create_backend()
+    return _backend
+
+
+class RateLimiter:
+    """Dependency enforcing the token bucket of one route class.
+
+    Authenticated requests are limited per user (JWT sub), anonymous ones per client address.
+    Limits come from RATE_LIMIT_<CLASS> ("<tokens>/<seconds>"); RATE_LIMIT_ENABLED=false
+    turns every limiter off. They are read on the first request, not on import.
+    """
+
+    def __init__(self, route_class: str):
+        self.route_class = route_class
+
+    @cached_property
+    def limit(self) -> TokenBucketLimit:
+        return TokenBucketLimit(os.getenv(f'RATE_LIMIT_{self.route_class.upper()}', DEFAULT_LIMITS[self.route_class]))
+
+    @cached_property
+    def enabled(self) -> bool:
+        return os.getenv('RATE_LIMIT_ENABLED', 'true').lower() != 'false'
+
+    async def __call__(self, request: Request) -> None:
+        if not self.enabled:
+            return
+
+        identity = self._identity(request)
+        retry_after = await get_backend().take(f'{self.route_class}:{identity}', self.limit)
+        if retry_after > 0:
+            logger.warning(f"Rate limit {self.route_class} exceeded by {identity}")
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests",
+                headers={'Retry-After': str(math.ceil(retry_after))},
+            )
+
+    @staticmethod
+    def _identity(request: Request) -> str:
+        if request.headers.get('Authorization'):
+            try:
+                return f"user:{TokenHandler.verify_access_token(request).get('sub')}"
+            except Exception:
+                pass
+
+        if os.getenv('RATE_LIMIT_TRUST_FORWARDED', 'false').lower() == 'true':
+            forwarded = request.headers.get('X-Forwarded-For')
+            if forwarded:
+                return f"ip:{forwarded.split(',')[0].strip()}"
+        return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+login_rate_limit = RateLimiter('login')
+heavy_rate_limit = RateLimiter('heavy')
+batch_rate_limit = RateLimiter('batch')
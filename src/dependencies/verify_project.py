@@ -1,4 +1,5 @@
 
+from src.database import row_security
 from src.models.base_model import Base
 
 from src.models.warehouse_model import WarehouseModel
@@ -13,8 +14,14 @@ class ProjectVerify:
         self.model = model
         self.user_payload = user_payload
 
+    def is_admin(self) -> bool:
+        # Not the same as get_project_filter() returning True, which it also does under RLS
+        return self.user_payload.get('project_id') == row_security.ALL_PROJECTS
+
     def get_project_filter(self):
 
-        if self.user_payload.get('project_id') == 1:
+        if self.is_admin():
             return True
+        if row_security.filters_project(self.model.__tablename__):
+            return True  # enforced by the table's policy
         return self.model.project_id == self.user_payload.get('project_id')
\ No newline at end of file
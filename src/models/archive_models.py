@@ -0,0 +1,122 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Index, String, func
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from src.models.base_model import Base
+
+
+# Fully consumed rows moved out of the hot tables by ConsumedArchiveRepository. The foreign
+# keys only describe the joins; the archive has no constraints back into the live tables.
+
+class StockArchiveModel(Base):
+
+    __tablename__ = 'stock_archive'
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    quantity: Mapped[float] = mapped_column(nullable=False)
+    left_over: Mapped[float] = mapped_column(nullable=False)
+    serial_number: Mapped[str] = mapped_column(String(20), nullable=True)
+    material_id: Mapped[str] = mapped_column(String(20), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    change_txid: Mapped[int] = mapped_column(BigInteger)
+
+    warehouse_id: Mapped[int] = mapped_column(ForeignKey('warehouse.id'), nullable=False)
+    created_by_id: Mapped[int] = mapped_column(ForeignKey('users.id'), nullable=False)
+    project_id: Mapped[int] = mapped_column(ForeignKey('projects.id'), nullable=False)
+
+    archived_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+    warehouses = relationship("WarehouseModel", viewonly=True)
+    project = relationship("ProjectModel", viewonly=True)
+
+    __table_args__ = (
+        Index('ix_stock_archive_project_id_id', 'project_id', 'id'),
+    )
+
+
+class AreaArchiveModel(Base):
+
+    __tablename__ = 'area_archive'
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    quantity: Mapped[float] = mapped_column(nullable=False)
+    serial_number: Mapped[str] = mapped_column(String(20), nullable=True)
+    material_id: Mapped[str] = mapped_column(String(20), nullable=True)
+    provide_type: Mapped[str] = mapped_column(String(20), nullable=False)
+    card_number: Mapped[str] = mapped_column(String(10), nullable=False)
+    username: Mapped[str] = mapped_column(String(50), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    change_txid: Mapped[int] = mapped_column(BigInteger)
+
+    created_by_id: Mapped[int] = mapped_column(ForeignKey('users.id'))
+    stock_id: Mapped[int] = mapped_column(ForeignKey('stock.id'))
+    project_id: Mapped[int] = mapped_column(ForeignKey('projects.id'))
+    group_id: Mapped[int] = mapped_column(ForeignKey('groups.id'))
+
+    archived_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+    # The stock row is archived after its last area row, so it may be in either table
+    live_stock = relationship("StockModel", viewonly=True)
+    archived_stock = relationship(
+        "StockArchiveModel",
+        primaryjoin="foreign(AreaArchiveModel.stock_id) == StockArchiveModel.id",
+        viewonly=True,
+    )
+    group = relationship("GroupModel", viewonly=True)
+    project = relationship("ProjectModel", viewonly=True)
+
+    __table_args__ = (
+        Index('ix_area_archive_project_id_id', 'project_id', 'id'),
+        Index('ix_area_archive_stock_id', 'stock_id'),
+    )
+
+    @property
+    def stock(self):
+        return self.live_stock or self.archived_stock
+
+
+class LogStockMovementArchiveModel(Base):
+
+    __tablename__ = 'log_stock_movement_archive'
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    movement_type: Mapped[str] = mapped_column()
+    old_quantity: Mapped[float] = mapped_column()
+    old_left_over: Mapped[float] = mapped_column()
+    return_quantity: Mapped[float] = mapped_column()
+    new_left_over: Mapped[float] = mapped_column()
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+
+    stock_id: Mapped[int] = mapped_column(ForeignKey('stock_archive.id'), nullable=False)
+    warehouse_id: Mapped[int] = mapped_column(ForeignKey('warehouse.id'), nullable=False)
+    created_by_id: Mapped[int] = mapped_column(ForeignKey('users.id'), nullable=False)
+
+    archived_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index('ix_log_stock_movement_archive_stock_id', 'stock_id'),
+    )
+
+
+class LogAreaMovementArchiveModel(Base):
+
+    __tablename__ = 'log_area_movement_archive'
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    movement_type: Mapped[str] = mapped_column()
+    old_quantity: Mapped[float] = mapped_column()
+    return_quantity: Mapped[float] = mapped_column()
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+
+    area_id: Mapped[int] = mapped_column(ForeignKey('area_archive.id'), nullable=False)
+    stock_id: Mapped[int] = mapped_column(ForeignKey('stock.id'), nullable=False)
+    created_by_id: Mapped[int] = mapped_column(ForeignKey('users.id'), nullable=False)
+
+    archived_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index('ix_log_area_movement_archive_area_id', 'area_id'),
+    )
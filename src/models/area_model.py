@@ -1,7 +1,7 @@
 
 from datetime import datetime
 
-from sqlalchemy import ForeignKey, DateTime, String, func
+from sqlalchemy import ForeignKey, DateTime, String, func, CheckConstraint, Index, BigInteger
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.models.base_model import Base
@@ -19,6 +19,12 @@ class AreaModel(Base):
     username: Mapped[str] = mapped_column(String(50), nullable=False)
 
     created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+    # Maintained by every ORM and Core update, see WarehouseModel.updated_at
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(),
+                                                 onupdate=func.clock_timestamp())
+    # Change feed cursor, see WarehouseModel.change_txid
+    change_txid: Mapped[int] = mapped_column(BigInteger, server_default=func.txid_current(),
+                                             onupdate=func.txid_current())
 
     created_by_id: Mapped[int] = mapped_column(ForeignKey('users.id'))
     stock_id: Mapped[int] = mapped_column(ForeignKey('stock.id'))
@@ -29,6 +35,14 @@ class AreaModel(Base):
     group = relationship("GroupModel")
     project = relationship("ProjectModel")
 
+    __table_args__ = (
+        CheckConstraint('quantity >= 0', name='ck_area_quantity_non_negative'),
+        Index('ix_area_project_id_id', 'project_id', 'id'),
+        Index('ix_area_stock_id', 'stock_id'),
+        Index('ix_area_card_number', 'card_number'),
+        Index('ix_area_project_id_change_txid', 'project_id', 'change_txid', 'id'),
+    )
+
     def __str__(self):
         return f"{self.id} {self.quantity} {self.serial_number} {self.material_id} {self.stock_id}"
 
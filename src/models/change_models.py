@@ -0,0 +1,26 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Index, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.models.base_model import Base
+
+
+class InventoryTombstoneModel(Base):
+    """A warehouse, stock or area row that left its live table, for the change feed."""
+
+    __tablename__ = 'inventory_tombstones'
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    resource: Mapped[str] = mapped_column(String(20), nullable=False)  # warehouse/stock/area
+    item_id: Mapped[int] = mapped_column(nullable=False)
+    project_id: Mapped[int] = mapped_column(ForeignKey('projects.id'), nullable=False)
+    change_txid: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default=func.txid_current())
+    deleted_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index('ix_inventory_tombstones_resource_project_id_change_txid', 'resource', 'project_id', 'change_txid'),
+    )
+
+    def __str__(self):
+        return f'{self.id} {self.resource} {self.item_id} {self.change_txid}'
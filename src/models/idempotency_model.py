@@ -0,0 +1,32 @@
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, String, func
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.models.base_model import Base
+
+
+class IdempotencyKeyModel(Base):
+
+    __tablename__ = 'idempotency_keys'
+
+    user_id: Mapped[int] = mapped_column(ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    key: Mapped[str] = mapped_column(String(100), primary_key=True)
+    route: Mapped[str] = mapped_column(String(100), nullable=False)
+    request_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False)  # in_progress/completed
+    # Set by each claim; only its owner may complete or release the key
+    claim_token: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=True)
+
+    response_status: Mapped[int] = mapped_column(nullable=True)
+    response_body: Mapped[dict] = mapped_column(JSONB, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    # Lease end while in progress, replay window end once completed
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
+
+    def __str__(self):
+        return f'{self.user_id} {self.key} {self.route} {self.status}'
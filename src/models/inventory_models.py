@@ -0,0 +1,85 @@
+
+from datetime import date, datetime
+
+from sqlalchemy import BigInteger, Date, DateTime, ForeignKey, Index, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.models.base_model import Base
+
+
+class StockSummaryModel(Base):
+
+    __tablename__ = 'stock_summary'
+
+    project_id: Mapped[int] = mapped_column(ForeignKey('projects.id'), primary_key=True)
+    material_code_id: Mapped[int] = mapped_column(ForeignKey('material_codes.id'), primary_key=True)
+    category_id: Mapped[int] = mapped_column(ForeignKey('categories.id'), primary_key=True)
+
+    warehouse_left_over: Mapped[float] = mapped_column(nullable=False, server_default='0')
+    stock_left_over: Mapped[float] = mapped_column(nullable=False, server_default='0')
+    area_quantity: Mapped[float] = mapped_column(nullable=False, server_default='0')
+
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+    def __str__(self):
+        return f'{self.project_id} {self.material_code_id} {self.category_id} {self.warehouse_left_over} {self.stock_left_over} {self.area_quantity}'
+
+
+class InventoryLedgerModel(Base):
+
+    __tablename__ = 'inventory_ledger'
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    location: Mapped[str] = mapped_column(String(10), nullable=False)  # warehouse/stock/area
+    item_id: Mapped[int] = mapped_column(nullable=False)
+    movement_type: Mapped[str] = mapped_column(String(30), nullable=False)
+    quantity: Mapped[float] = mapped_column(nullable=False)  # signed change of left_over (quantity for area)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+    project_id: Mapped[int] = mapped_column(ForeignKey('projects.id'), nullable=False)
+    warehouse_id: Mapped[int] = mapped_column(nullable=False)
+    created_by_id: Mapped[int] = mapped_column(ForeignKey('users.id'), nullable=False)
+
+    __table_args__ = (
+        Index('ix_inventory_ledger_created_at', 'created_at', postgresql_using='brin'),
+        Index('ix_inventory_ledger_item', 'location', 'item_id', 'created_at'),
+    )
+
+    def __str__(self):
+        return f'{self.id} {self.location} {self.item_id} {self.movement_type} {self.quantity}'
+
+
+class InventoryCheckpointModel(Base):
+
+    __tablename__ = 'inventory_ledger_checkpoint'
+
+    location: Mapped[str] = mapped_column(String(10), primary_key=True)
+    item_id: Mapped[int] = mapped_column(primary_key=True)
+    checkpoint_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    balance: Mapped[float] = mapped_column(nullable=False)
+
+    project_id: Mapped[int] = mapped_column(ForeignKey('projects.id'), nullable=False)
+
+    def __str__(self):
+        return f'{self.location} {self.item_id} {self.checkpoint_at} {self.balance}'
+
+
+class InventoryDailyRollupModel(Base):
+
+    __tablename__ = 'inventory_daily_rollup'
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    project_id: Mapped[int] = mapped_column(ForeignKey('projects.id'), primary_key=True)
+    material_code_id: Mapped[int] = mapped_column(ForeignKey('material_codes.id'), primary_key=True)
+
+    received: Mapped[float] = mapped_column(nullable=False, server_default='0')
+    adjusted: Mapped[float] = mapped_column(nullable=False, server_default='0')
+    issued_to_stock: Mapped[float] = mapped_column(nullable=False, server_default='0')
+    issued_to_area: Mapped[float] = mapped_column(nullable=False, server_default='0')
+    returned_to_stock: Mapped[float] = mapped_column(nullable=False, server_default='0')
+    returned_to_warehouse: Mapped[float] = mapped_column(nullable=False, server_default='0')
+
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+    def __str__(self):
+        return f'{self.day} {self.project_id} {self.material_code_id} {self.received} {self.issued_to_stock} {self.issued_to_area}'
@@ -0,0 +1,26 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, Index, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.models.base_model import Base
+
+
+class JobRunModel(Base):
+
+    __tablename__ = 'job_runs'
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    job_name: Mapped[str] = mapped_column(String(50), nullable=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False)  # succeeded/failed
+    started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    finished_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    duration_ms: Mapped[int] = mapped_column(nullable=False)
+    detail: Mapped[str] = mapped_column(Text, nullable=True)
+
+    __table_args__ = (
+        Index('ix_job_runs_job_name_started_at', 'job_name', 'started_at'),
+    )
+
+    def __str__(self):
+        return f'{self.id} {self.job_name} {self.status} {self.duration_ms}'
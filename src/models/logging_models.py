@@ -1,6 +1,6 @@
 
 
-from sqlalchemy import DateTime, func, ForeignKey
+from sqlalchemy import DateTime, func, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column
 
 from src.models.base_model import Base
@@ -15,13 +15,19 @@ class LogStockMovementModel(Base):
     old_left_over: Mapped[float] = mapped_column()
     return_quantity: Mapped[float] = mapped_column()
     new_left_over: Mapped[float] = mapped_column()
-    created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now(), primary_key=True)
 
     stock_id: Mapped[int] = mapped_column(ForeignKey('stock.id'), nullable=False)
     warehouse_id: Mapped[int] = mapped_column(ForeignKey('warehouse.id'), nullable=False)
 
     created_by_id: Mapped[int] = mapped_column(ForeignKey('users.id'), nullable=False)
 
+    __table_args__ = (
+        Index('ix_log_stock_movement_stock_id', 'stock_id'),
+        # Monthly partitions, see LogPartitionRepository
+        {'postgresql_partition_by': 'RANGE (created_at)'},
+    )
+
 
 class LogAreaMovementModel(Base):
 
@@ -32,12 +38,18 @@ class LogAreaMovementModel(Base):
     old_quantity: Mapped[float] = mapped_column()
     return_quantity: Mapped[float] = mapped_column()
 
-    created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now(), primary_key=True)
 
     area_id: Mapped[int] = mapped_column(ForeignKey('area.id'), nullable=False)
     stock_id: Mapped[int] = mapped_column(ForeignKey('stock.id'), nullable=False)
     created_by_id: Mapped[int] = mapped_column(ForeignKey('users.id'), nullable=False)
 
+    __table_args__ = (
+        Index('ix_log_area_movement_area_id', 'area_id'),
+        # Monthly partitions, see LogPartitionRepository
+        {'postgresql_partition_by': 'RANGE (created_at)'},
+    )
+
 class LogUpdateWarehouseQtyModel(Base):
 
     __tablename__ = 'log_warehouse_movement'
@@ -48,6 +60,12 @@ class LogUpdateWarehouseQtyModel(Base):
     old_left_over: Mapped[float] = mapped_column()
     new_quantity: Mapped[float] = mapped_column()
     new_left_over: Mapped[float] = mapped_column()
-    created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now(), primary_key=True)
     warehouse_id: Mapped[int] = mapped_column(ForeignKey('warehouse.id'), nullable=False)
-    created_by_id: Mapped[int] = mapped_column(ForeignKey('users.id'), nullable=False)
\ No newline at end of file
+    created_by_id: Mapped[int] = mapped_column(ForeignKey('users.id'), nullable=False)
+
+    __table_args__ = (
+        Index('ix_log_warehouse_movement_warehouse_id', 'warehouse_id'),
+        # Monthly partitions, see LogPartitionRepository
+        {'postgresql_partition_by': 'RANGE (created_at)'},
+    )
@@ -1,7 +1,7 @@
 
 from datetime import datetime
 
-from sqlalchemy import DateTime, String, func, ForeignKey
+from sqlalchemy import DateTime, String, func, ForeignKey, CheckConstraint, Index, BigInteger
 from sqlalchemy.orm import Mapped, relationship, mapped_column
 
 from src.models import Base
@@ -17,6 +17,12 @@ class StockModel(Base):
     material_id: Mapped[str] = mapped_column(String(20), nullable=True)
     
     created_at: Mapped[datetime] = mapped_column(DateTime, server_default = func.now()) 
+    # Maintained by every ORM and Core update, see WarehouseModel.updated_at
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(),
+                                                 onupdate=func.clock_timestamp())
+    # Change feed cursor, see WarehouseModel.change_txid
+    change_txid: Mapped[int] = mapped_column(BigInteger, server_default=func.txid_current(),
+                                             onupdate=func.txid_current())
     
     warehouse_id: Mapped[int] = mapped_column(ForeignKey("warehouse.id"), nullable=False)
     created_by_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
@@ -25,6 +31,13 @@ class StockModel(Base):
     warehouses = relationship("WarehouseModel", back_populates="stocks")
     project = relationship("ProjectModel")
 
+    __table_args__ = (
+        CheckConstraint('left_over >= 0', name='ck_stock_left_over_non_negative'),
+        Index('ix_stock_project_id_id', 'project_id', 'id'),
+        Index('ix_stock_warehouse_id', 'warehouse_id'),
+        Index('ix_stock_project_id_change_txid', 'project_id', 'change_txid', 'id'),
+    )
+
     def __str__(self):
         return f"id: {self.id} / quantity: {self.quantity} / leftover: {self.left_over} / serial_num {self.serial_number} / material_id: {self.material_id} "
 
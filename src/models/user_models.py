@@ -49,8 +49,9 @@ class TokenModel(Base):
 
     id: Mapped[int] = mapped_column(primary_key=True)
 
-    tokens: Mapped[str] = mapped_column(String)
-    user_id: Mapped[int] = mapped_column(ForeignKey('users.id'))
+    # sha256 of the refresh token; the token itself is never stored
+    token_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    user_id: Mapped[int] = mapped_column(ForeignKey('users.id'), unique=True, index=True)
 
     def __str__(self):
-        return f"{self.id} {self.tokens} {self.user_id}"
\ No newline at end of file
+        return f"{self.id} {self.user_id}"
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import String, func, DateTime, Text, ForeignKey
+from sqlalchemy import String, func, DateTime, Text, ForeignKey, CheckConstraint, Index, BigInteger
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.models.base_model import Base
@@ -42,6 +42,13 @@ class WarehouseModel(Base):
     price: Mapped[float] = mapped_column(nullable=True)
     currency: Mapped[str] = mapped_column(nullable=True)
     created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    # clock_timestamp, not now(): a transaction that waited on the row lock still stamps after
+    # the one it waited for, so every committed change gets a new value (and a new ETag)
+    updated_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now(),
+                                                 onupdate=func.clock_timestamp())
+    # Id of the last transaction that wrote the row, the cursor of the change feed
+    change_txid: Mapped[int] = mapped_column(BigInteger, server_default=func.txid_current(),
+                                             onupdate=func.txid_current())
     po_num: Mapped[str] = mapped_column(String, nullable=True)
     doc_num: Mapped[str] = mapped_column(String, nullable=True)
 
@@ -59,6 +66,15 @@ class WarehouseModel(Base):
     company = relationship("CompanyModel")
     stocks = relationship("StockModel", back_populates="warehouses")
 
+    __table_args__ = (
+        CheckConstraint('left_over >= 0', name='ck_warehouse_left_over_non_negative'),
+        Index('ix_warehouse_project_id_id', 'project_id', 'id'),
+        Index('ix_warehouse_material_code_id', 'material_code_id'),
+        Index('ix_warehouse_project_id_change_txid', 'project_id', 'change_txid', 'id'),
+        # Serves the ILIKE '%...%' search of the filter routes; needs the pg_trgm extension
+        Index('ix_warehouse_material_name_trgm', 'material_name',
+              postgresql_using='gin', postgresql_ops={'material_name': 'gin_trgm_ops'}),
+    )
 
     def __str__(self):
         return f'{self.id} {self.material_name} {self.qty}'
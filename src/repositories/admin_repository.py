@@ -4,6 +4,7 @@ from fastapi import HTTPException, status
 from sqlalchemy import insert, select, or_, exists
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.database.partitions import create_project_partitions
 from src.models import UserModel, ProjectModel
 from src.models.ordered_model import GroupModel
 from src.models.warehouse_model import MaterialCategoryModel
@@ -24,12 +25,13 @@ class CreateAdminRepository:
 
     async def create_admin(self, user_data: UserRegisterSchema):
 
-        hashing_password = self.h_password.hash_password(user_data.password)
-        user_data.password = hashing_password
-
+        # Argon2 is deliberately slow, so only hash once we know the admin is missing
         if await self.admin_exists(user_data.email):
             return
 
+        hashing_password = self.h_password.hash_password(user_data.password)
+        user_data.password = hashing_password
+
         try:
             await self.db.execute(insert(UserModel).values(
                 first_name = user_data.first_name,
@@ -51,10 +53,8 @@ class CreateAdminRepository:
 
     async def admin_exists(self, email) -> bool:
 
-        data = await self.db.execute(select(UserModel).where(UserModel.email == email))
-        if data.scalar():
-            return True
-        return False
+        data = await self.db.scalar(select(UserModel.id).where(UserModel.email == email).limit(1))
+        return data is not None
 
 #Tested
 class VerifyEmail:
@@ -128,6 +128,7 @@ class CreateProjectRepository:
 
             self.db.add(new_project)
             await self.db.flush()
+            await create_project_partitions(self.db, new_project.id)
             await self.db.refresh(new_project)
             await self.db.commit()
             return ProjectResponseSchema.model_validate(new_project)
@@ -0,0 +1,132 @@
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, delete, exists, union_all, literal, String
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from src.database.transaction import run_transaction
+from src.models.archive_models import StockArchiveModel, AreaArchiveModel, LogStockMovementArchiveModel, \
+    LogAreaMovementArchiveModel
+from src.models.area_model import AreaModel
+from src.models.change_models import InventoryTombstoneModel
+from src.models.logging_models import LogStockMovementModel, LogAreaMovementModel
+from src.models.stock_models import StockModel
+
+from src.logging_config import setup_logger
+logger = setup_logger(__name__, 'archive.log')
+
+
+# Consumed rows younger than this stay hot, so recent history is still one table away
+ARCHIVE_AFTER_DAYS = int(os.getenv('ARCHIVE_AFTER_DAYS', '90'))
+ARCHIVE_BATCH_SIZE = int(os.getenv('ARCHIVE_BATCH_SIZE', '1000'))
+
+# live model -> archive model, same columns plus archived_at
+ARCHIVES = {
+    StockModel: StockArchiveModel,
+    AreaModel: AreaArchiveModel,
+    LogStockMovementModel: LogStockMovementArchiveModel,
+    LogAreaMovementModel: LogAreaMovementArchiveModel,
+}
+
+
+def with_archived(model):
+    """An alias of model over its live and archived rows, for reads that need full history."""
+    archive = ARCHIVES[model]
+    names = [c.key for c in model.__table__.columns]
+    rows = union_all(
+        select(*(getattr(model, name) for name in names)),
+        select(*(getattr(archive, name) for name in names)),
+    ).subquery(f'{model.__tablename__}_all')
+    return aliased(model, rows)
+
+
+class ConsumedArchiveRepository:
+    """Moves fully consumed stock and area rows, with their movement logs, to the archive tables.
+
+    An area row with quantity 0 can never change again, and neither can a stock row with
+    left_over 0 once no area row refers to it, so both are moved out of the hot tables after
+    ARCHIVE_AFTER_DAYS. Each batch is one transaction that deletes and inserts in a single
+    statement per table; rows locked by a running request are skipped until the next run.
+    Every moved row leaves a tombstone for the change feed. The ledger, stock summary and
+    rollups are left as they are: consumed rows add nothing to the summary, and
+    DailyRollupRepository reads the archive through with_archived.
+    """
+
+    def __init__(self, db: AsyncSession, archive_after_days: int = ARCHIVE_AFTER_DAYS,
+                 batch_size: int = ARCHIVE_BATCH_SIZE):
+        self.db = db
+        self.batch_size = batch_size
+        self.cutoff = datetime.now() - timedelta(days=archive_after_days)
+
+    async def archive(self) -> dict[str, int]:
+        # Areas first, so the stock rows they held become archivable in the same run
+        areas = await self._run('area', self._archive_areas)
+        stocks = await self._run('stock', self._archive_stocks)
+        logger.info(f'Archived {areas} area and {stocks} stock rows')
+        return {'area': areas, 'stock': stocks}
+
+    async def _run(self, name: str, work) -> int:
+        total = 0
+        while True:
+            moved = await run_transaction(self.db, work, f'archive.{name}')
+            total += moved
+            if moved < self.batch_size:
+                return total
+
+    async def _archive_areas(self) -> int:
+        ids = await self._candidates(
+            AreaModel, AreaModel.quantity == 0, AreaModel.created_at < self.cutoff
+        )
+        if not ids:
+            return 0
+        # Logs first: deleting the area row would cascade to them
+        await self._move(LogAreaMovementModel, LogAreaMovementModel.area_id.in_(ids))
+        await self._move(AreaModel, AreaModel.id.in_(ids))
+        await self._tombstone('area', AreaArchiveModel, ids)
+        return len(ids)
+
+    async def _archive_stocks(self) -> int:
+        ids = await self._candidates(
+            StockModel, StockModel.left_over == 0, StockModel.created_at < self.cutoff,
+            ~exists().where(AreaModel.stock_id == StockModel.id)
+        )
+        if not ids:
+            return 0
+        await self._move(LogStockMovementModel, LogStockMovementModel.stock_id.in_(ids))
+        await self._move(StockModel, StockModel.id.in_(ids))
+        await self._tombstone('stock', StockArchiveModel, ids)
+        return len(ids)
+
+    async def _candidates(self, model, *where_clauses) -> list[int]:
+        result = await self.db.execute(
+            select(model.id)
+            .where(*where_clauses)
+            .order_by(model.id)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        return list(result.scalars())
+
+    async def _move(self, model, *where_clauses) -> None:
+        columns = [c.key for c in model.__table__.columns]
+        moved = (
+            delete(model)
+            .where(*where_clauses)
+            .returning(*(getattr(model, name) for name in columns))
+            .cte(f'moved_{model.__tablename__}')
+        )
+        await self.db.execute(
+            insert(ARCHIVES[model]).from_select(columns, select(*(moved.c[name] for name in columns)))
+        )
+
+    async def _tombstone(self, resource: str, archive_model, ids: list[int]) -> None:
+        # Same transaction as the move, so the change feed sees both at once
+        await self.db.execute(
+            insert(InventoryTombstoneModel).from_select(
+                ['resource', 'item_id', 'project_id'],
+                select(literal(resource, String()), archive_model.id, archive_model.project_id)
+                .where(archive_model.id.in_(ids))
+            )
+        )
@@ -1,27 +1,37 @@
 
+from collections import defaultdict
 from typing import List, Tuple
 
 
-from sqlalchemy import update, select, desc, insert, func
-from sqlalchemy.dialects import postgresql
+from sqlalchemy import update, select, desc, insert, func, Integer, Float
 from sqlalchemy.orm import joinedload
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from fastapi import status, HTTPException
 
+from src.database.bulk import unnest_rows, any_of
+from src.database.filter_query import FilterQuery, contains, equals, on_date
+from src.database import row_security
+from src.database.transaction import run_transaction, lock_rows, apply_deltas
 from src.models.warehouse_model import MaterialCategoryModel
 from src.dependencies.verify_project import ProjectVerify
 from src.models import ProjectModel
+from src.models.archive_models import AreaArchiveModel, StockArchiveModel
 from src.models.area_model import AreaModel
 from src.models.ordered_model import GroupModel, OrderedModel
 from src.models.stock_models import StockModel
 from src.models.warehouse_model import WarehouseModel
 from src.models.logging_models import LogAreaMovementModel
-from src.schemas.area_schemas import AreaListAddSchema, AreaAddSchema, AreaResponseSchema, AreaReturnStockSchema, AreaFilterSchema
+from src.repositories.change_feed_repository import ChangeFeedRepository
+from src.repositories.inventory_repository import InventoryMovementRecorder
+from src.repositories.report_repository import report_cache
+from src.schemas.area_schemas import AreaListAddSchema, AreaAddSchema, AreaResponseSchema, AreaReturnStockSchema, AreaFilterSchema, \
+    AreaReturnStockBatchSchema
 
 from src.logging_config import setup_logger
 from src.schemas.user_schemas import UserTokenSchema
+from src.utils.etag import make_etag
 
 logger = setup_logger(__name__, "area.log")
 
@@ -64,6 +74,18 @@ class AreaStandardResponse:
 
 class AreaFetchQuery:
 
+    @staticmethod
+    def archived_options():
+        # An archived area row's stock may still be live or archived as well
+        return (
+            joinedload(AreaArchiveModel.live_stock).
+            joinedload(StockModel.warehouses).joinedload(WarehouseModel.category).load_only(MaterialCategoryModel.category_name),
+            joinedload(AreaArchiveModel.archived_stock).
+            joinedload(StockArchiveModel.warehouses).joinedload(WarehouseModel.category).load_only(MaterialCategoryModel.category_name),
+            joinedload(AreaArchiveModel.group).load_only(GroupModel.group_name),
+            joinedload(AreaArchiveModel.project).load_only(ProjectModel.project_name)
+        )
+
     @staticmethod
     async def fetch_query(session: AsyncSession, limit: int, *where_clause):
 
@@ -82,6 +104,15 @@ class AreaFetchQuery:
 
         return await session.execute(stmt)
 
+    @staticmethod
+    async def fetch_archived_query(session: AsyncSession, limit: int, *where_clause):
+
+        filters = [ i for i in where_clause if i is not None and i is not True ]
+
+        stmt = select(AreaArchiveModel).where(*filters).limit(limit).options(*AreaFetchQuery.archived_options())
+
+        return await session.execute(stmt)
+
 
 class AreaAddRepository:
 
@@ -90,27 +121,35 @@ class AreaAddRepository:
         self.area_data = area_data
         self.user_id: int = user_id
         self.project_id: int = area_data.project_id
+        self.recorder = InventoryMovementRecorder(db, user_id)
 
     async def add_area(self) -> dict[str, str]:
 
         try:
             self._check_project()
 
-            stock_data, area_data = await self._check_quantity()
-
-            await self._update_model(stock_data, area_data)
-
-            return {"detail": "Successfully provide"}
+            result = await run_transaction(self.db, self._add_area, 'area.add')
+            report_cache.invalidate(self.recorder.area_project_ids)
+            return result
 
         except ValueError as ex:
             logger.error(f"Add area error : {ex}")
             raise HTTPException(status_code=400, detail=str(ex))
         except HTTPException as ex:
             raise ex
+        except SQLAlchemyError as ex:
+            logger.exception(f"Database error during stock update {ex}")
+            raise HTTPException(500, "Failed to update stock")
         except Exception as ex:
             logger.error(f"Add Area error : {ex}")
             raise HTTPException(status_code=500, detail="Internal server error")
 
+    async def _add_area(self) -> dict[str, str]:
+        self.recorder.reset()
+        stocks = await self._check_quantity()
+        await self._update_model(stocks)
+        return {"detail": "Successfully provide"}
+
     def _check_project(self):
         if len(self.area_data.datas) > 0:
             first_project_id: int = self.area_data.datas[0].project_id
@@ -122,70 +161,76 @@ class AreaAddRepository:
         else:
             raise ValueError("Please add item for operation")
 
-    async def _check_quantity(self) -> Tuple[List, List]:
-
-        stock_data = []
-        area_data = []
+    async def _check_quantity(self) -> dict:
 
-        common_data = {
-            "card_number": self.area_data.card_number.strip().lower(),
-            "username": self.area_data.username.strip().lower(),
-            "group_id": self.area_data.group_id,
-        }
+        totals = defaultdict(float)
 
         for idx, item in enumerate(self.area_data.datas, start=1):
 
             # 0 - Check entering quantity for 0 or none negative numbers
             if item.quantity <= 0:
                 raise ValueError(f'In {idx} Entering quantity Cant be negative or 0')
+            totals[item.stock_id] += item.quantity
 
-            # 1 - Get stock data with stock_id
-            s_data = await self.db.get(StockModel, item.stock_id, with_for_update=True)
+        # 1 - Deduct stock left over, checking it covers the quantity in the same statement
+        stocks = await apply_deltas(
+            self.db, StockModel.left_over, {s_id: -qty for s_id, qty in totals.items()},
+            returning=(StockModel.project_id, StockModel.warehouse_id)
+        )
 
-            # 2 - Check there is a data or not
-            if not s_data:
-                raise ValueError(f"Row {idx}: Area not found")
+        # 2 - Only a failed deduction pays for the lookup that explains it
+        if len(stocks) != len(totals):
+            await self._raise_shortage(totals, stocks)
+
+        return stocks
 
-            # 3 - Check stock model left over
-            if s_data.left_over < item.quantity:
+    async def _raise_shortage(self, totals: dict[int, float], deducted: dict) -> None:
+        result = await self.db.execute(
+            select(StockModel.id, StockModel.left_over)
+            .where(StockModel.id.in_(totals))
+        )
+        # Rows the guarded update did reach already show their deducted value
+        left_overs = {i.id: i.left_over + (totals[i.id] if i.id in deducted else 0) for i in result}
+
+        for idx, item in enumerate(self.area_data.datas, start=1):
+            if item.stock_id not in left_overs:
+                raise ValueError(f"Row {idx}: Area not found")
+            if left_overs[item.stock_id] < item.quantity:
                 raise ValueError(
-                    f"Row {idx}: Not enough stock (has {s_data.left_over}, need {item.quantity})"
+                    f"Row {idx}: Not enough stock (has {left_overs[item.stock_id]}, need {item.quantity})"
                 )
+            left_overs[item.stock_id] -= item.quantity
 
-            # 4 - Add data to stock array for update the stock list
-            stock_data.append({
-                "id": item.stock_id,
-                "quantity": item.quantity
-            })
-            # 5 - Create ready records for creating a data for area model
-            area_data.append(AreaModel(
+        raise ValueError("Not enough stock")
+
+    async def _update_model(self, stocks: dict):
+
+        common_data = {
+            "card_number": self.area_data.card_number.strip().lower(),
+            "username": self.area_data.username.strip().lower(),
+            "group_id": self.area_data.group_id,
+        }
+
+        # Create ready records for creating a data for area model
+        area_data = [
+            AreaModel(
                 **AreaAddSchema.model_dump(item),
                 **common_data,
                 created_by_id= self.user_id
-            ))
-
-        return stock_data, area_data
-
-    async def _update_model(self, stock_data, area_data):
-        try:
-            [
-                await self.db.execute(
-                    update(StockModel)
-                    .where(StockModel.id == i['id'])
-                    .values(left_over = StockModel.left_over - i['quantity'])
-                )
-                for i in stock_data
-            ]
+            )
+            for item in self.area_data.datas
+        ]
 
-            self.db.add_all(area_data)
-            await self.db.commit()
+        self.db.add_all(area_data)
+        await self.db.flush()
 
-        except SQLAlchemyError as ex:
-            logger.exception(f"Database error during stock update {ex}")
-            raise HTTPException(500, "Failed to update stock {ex}")
-        except Exception as ex:
-            logger.exception(f"Unexpected error {ex}")
-            raise HTTPException(500, "Internal Server Error")
+        for a_item in area_data:
+            stock = stocks[a_item.stock_id]
+            self.recorder.record('stock', stock.id, stock.project_id, stock.warehouse_id,
+                                 -a_item.quantity, 'issue to area')
+            self.recorder.record('area', a_item.id, a_item.project_id, stock.warehouse_id,
+                                 a_item.quantity, 'issue to area')
+        await self.recorder.flush()
 
 
 class AreaReturnToStockRepository:
@@ -195,6 +240,7 @@ class AreaReturnToStockRepository:
         self.return_data = return_data
         self.user_id = user_id
         self.verifier = ProjectVerify(user_payload=user_payload, model=AreaModel)
+        self.recorder = InventoryMovementRecorder(db, user_id)
 
     async def return_to_stock(self) -> dict[str, str]:
 
@@ -208,84 +254,244 @@ class AreaReturnToStockRepository:
             )
 
         try:
+            result = await run_transaction(self.db, self._return_to_stock, 'area.return_to_stock')
+            report_cache.invalidate(self.recorder.area_project_ids)
+            return result
+
+        except HTTPException as ex:
+            raise ex
 
-            project_filter = self.verifier.get_project_filter()
+        except SQLAlchemyError as ex:
+            await self.db.rollback()  # Rollback on DB errors
+            logger.exception(f"Database error during return to stock {ex}")
+            raise HTTPException(status_code=500, detail=f"Database error {ex}") from ex
+        except Exception as ex:
+            await self.db.rollback()
+            logger.exception(f"Unexpected error during return to stock {ex}")
+            raise HTTPException(status_code=500, detail=f"Internal Server Error {ex}") from ex
 
-            # 1. Lock the AreaModel row for update
-            result = await self.db.execute(
-                select(AreaModel)
-                .where(AreaModel.id == self.return_data.id,
-                       project_filter if  project_filter is not True else True)
-                .with_for_update()
+    async def _return_to_stock(self) -> dict[str, str]:
+        return_quantity = self.return_data.quantity
+        self.recorder.reset()
+
+        project_filter = self.verifier.get_project_filter()
+
+        # 1. Credit the StockModel row first to keep the global lock order; a failed
+        # area deduction rolls it back with the transaction
+        stocks = await apply_deltas(
+            self.db, StockModel.left_over, {self.return_data.stock_id: return_quantity},
+            returning=(StockModel.project_id, StockModel.warehouse_id)
+        )
+        stock = stocks.get(self.return_data.stock_id)
+
+        if not stock:
+            logger.error(f"Stock {self.return_data.stock_id} not found.")
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Stock {self.return_data.stock_id} not found."
             )
-            area = result.scalars().first()
 
-            if not area:
+        # 2. Deduct the AreaModel row only if it holds enough
+        areas = await apply_deltas(
+            self.db, AreaModel.quantity, {self.return_data.id: -return_quantity}, project_filter,
+            returning=(AreaModel.quantity, AreaModel.project_id)
+        )
+        area = areas.get(self.return_data.id)
+
+        if not area:
+            exists = await self.db.scalar(
+                select(AreaModel.id).where(AreaModel.id == self.return_data.id, project_filter)
+            )
+            if not exists:
                 logger.error(f"Area {self.return_data.id} not found.")
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail=f"Area {self.return_data.id} not found."
                 )
 
-            if return_quantity > area.quantity:
-                logger.error(f"Cannot return more than available quantity in area.")
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Cannot return more than available quantity."
-                )
-
-            # 2. Lock the StockModel row for update
-            result = await self.db.execute(
-                select(StockModel)
-                .where(StockModel.id == self.return_data.stock_id)
-                .with_for_update()
+            logger.error(f"Cannot return more than available quantity in area.")
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cannot return more than available quantity."
             )
-            stock = result.scalars().first()
 
-            if not stock:
-                logger.error(f"Stock {self.return_data.stock_id} not found.")
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=f"Stock {self.return_data.stock_id} not found."
+        await self.insert_area_movement_log(area_id=area.id, old_quantity=area.quantity + return_quantity)
+
+        self.recorder.record('area', area.id, area.project_id, stock.warehouse_id,
+                             -return_quantity, 'return to stock')
+        self.recorder.record('stock', stock.id, stock.project_id, stock.warehouse_id,
+                             return_quantity, 'return to stock')
+        await self.recorder.flush()
+
+        return {"detail": "Successfully returned"}
+
+    async def insert_area_movement_log(self, area_id: int, old_quantity: float):
+        try:
+            await self.db.execute(
+                insert(LogAreaMovementModel).values(
+                    movement_type = 'return to stock',
+                    old_quantity = old_quantity,
+                    return_quantity = self.return_data.quantity,
+                    area_id = area_id,
+                    stock_id = self.return_data.stock_id,
+                    created_by_id = self.user_id
                 )
+            )
+        except Exception as ex:
+            logger.error(f'Stock log error : {ex}')
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f'Can insert stock log {ex}')
+
 
-            await self.insert_area_movement_log(area)
+class AreaReturnToStockBatchRepository:
 
-            area.quantity -= return_quantity
+    def __init__(self, db: AsyncSession, return_data: AreaReturnStockBatchSchema, user_id: int, user_payload: UserTokenSchema):
+        self.db = db
+        self.return_data = return_data
+        self.user_id = user_id
+        self.verifier = ProjectVerify(user_payload=user_payload, model=AreaModel)
+        self.recorder = InventoryMovementRecorder(db, user_id)
 
-            stock.left_over += return_quantity
+    async def return_to_stock(self) -> dict[str, str]:
 
-            await self.db.commit()
+        if bool(self.return_data.return_data_list) == bool(self.return_data.card_number):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                detail="Send either return lines or a card number")
 
-            return {"detail": "Successfully returned"}
+        try:
+            result = await run_transaction(self.db, self._return_to_stock, 'area.return_to_stock_batch')
+            report_cache.invalidate(self.recorder.area_project_ids)
+            return result
 
         except HTTPException as ex:
             raise ex
 
         except SQLAlchemyError as ex:
-            await self.db.rollback()  # Rollback on DB errors
-            logger.exception(f"Database error during return to stock {ex}")
+            await self.db.rollback()
+            logger.exception(f"Database error during batch return to stock {ex}")
             raise HTTPException(status_code=500, detail=f"Database error {ex}") from ex
         except Exception as ex:
             await self.db.rollback()
-            logger.exception(f"Unexpected error during return to stock {ex}")
+            logger.exception(f"Unexpected error during batch return to stock {ex}")
             raise HTTPException(status_code=500, detail=f"Internal Server Error {ex}") from ex
 
-    async def insert_area_movement_log(self, finded_data: AreaModel):
-        try:
-            await self.db.execute(
-                insert(LogAreaMovementModel).values(
-                    movement_type = 'return to stock',
-                    old_quantity = finded_data.quantity,
-                    return_quantity = self.return_data.quantity,
-                    area_id = finded_data.id,
-                    stock_id = self.return_data.stock_id,
-                    created_by_id = self.user_id
-                )
-            )
-        except Exception as ex:
-            logger.error(f'Stock log error : {ex}')
-            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f'Can insert stock log {ex}')
+    async def _return_to_stock(self) -> dict[str, str]:
+        self.recorder.reset()
+
+        if self.return_data.card_number:
+            stocks, areas, lines = await self._lock_card_rows()
+        else:
+            lines = self.return_data.return_data_list
+            stocks = await self._lock_stock_rows({i.stock_id for i in lines})
+            areas = await self._lock_area_rows({i.id for i in lines})
+
+        if not lines:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                                detail=f"Nothing to return for card {self.return_data.card_number}")
+
+        logs = self._check_lines(lines, areas, stocks)
+        await self._update_model(lines, logs)
+
+        return {"detail": f"{len(lines)} items successfully returned"}
+
+    async def _lock_card_rows(self) -> Tuple[dict, dict, List[AreaReturnStockSchema]]:
+        card_filter = (
+            AreaModel.card_number == self.return_data.card_number,
+            AreaModel.quantity > 0,
+        )
+        # Stock rows are locked before area rows, so find the card's rows first and lock them after
+        result = await self.db.execute(
+            select(AreaModel.id, AreaModel.stock_id)
+            .where(*card_filter, self.verifier.get_project_filter())
+        )
+        candidates = result.all()
+
+        stocks = await self._lock_stock_rows({row.stock_id for row in candidates})
+        areas = await self._lock_area_rows({row.id for row in candidates}, *card_filter)
+        lines = [
+            AreaReturnStockSchema(id=row.id, stock_id=row.stock_id, quantity=row.quantity, project_id=row.project_id)
+            for row in areas.values()
+        ]
+        return stocks, areas, lines
+
+    async def _lock_area_rows(self, area_ids: set[int], *where_clauses) -> dict:
+        return await lock_rows(
+            self.db, AreaModel, area_ids, self.verifier.get_project_filter(), *where_clauses,
+            columns=(AreaModel.id, AreaModel.quantity, AreaModel.project_id, AreaModel.stock_id)
+        )
+
+    async def _lock_stock_rows(self, stock_ids: set[int]) -> dict:
+        return await lock_rows(
+            self.db, StockModel, stock_ids,
+            columns=(StockModel.id, StockModel.project_id, StockModel.warehouse_id)
+        )
+
+    def _check_lines(self, lines: List[AreaReturnStockSchema], areas: dict, stocks: dict) -> List[dict]:
+        quantities = {area_id: row.quantity for area_id, row in areas.items()}
+
+        errors = []
+        logs = []
+        for idx, item in enumerate(lines, start=1):
+            if item.quantity <= 0:
+                errors.append({"row": idx, "id": item.id, "detail": "Quantity must be greater than zero."})
+                continue
+            if item.id not in areas:
+                errors.append({"row": idx, "id": item.id, "detail": f"Area {item.id} not found."})
+                continue
+            if item.quantity > quantities[item.id]:
+                errors.append({"row": idx, "id": item.id, "detail": "Cannot return more than available quantity."})
+                continue
+            if item.stock_id not in stocks:
+                errors.append({"row": idx, "id": item.id, "detail": f"Stock {item.stock_id} not found."})
+                continue
+
+            logs.append({
+                "movement_type": 'return to stock',
+                "old_quantity": quantities[item.id],
+                "return_quantity": item.quantity,
+                "area_id": item.id,
+                "stock_id": item.stock_id,
+                "created_by_id": self.user_id,
+            })
+            quantities[item.id] -= item.quantity
+
+            area = areas[item.id]
+            stock = stocks[item.stock_id]
+            self.recorder.record('area', area.id, area.project_id, stock.warehouse_id,
+                                 -item.quantity, 'return to stock')
+            self.recorder.record('stock', stock.id, stock.project_id, stock.warehouse_id,
+                                 item.quantity, 'return to stock')
+
+        if errors:
+            logger.error(f"Batch return to stock rejected: {errors}")
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=errors)
+
+        return logs
+
+    async def _update_model(self, lines: List[AreaReturnStockSchema], logs: List[dict]) -> None:
+        area_totals = defaultdict(float)
+        stock_totals = defaultdict(float)
+        for item in lines:
+            area_totals[item.id] += item.quantity
+            stock_totals[item.stock_id] += item.quantity
+
+        returns = unnest_rows('returns', {'id': Integer(), 'quantity': Float()}, sorted(area_totals.items()))
+        await self.db.execute(
+            update(AreaModel)
+            .where(AreaModel.id == returns.c.id)
+            .values(quantity=AreaModel.quantity - returns.c.quantity)
+            .execution_options(synchronize_session=False)
+        )
+
+        returns = unnest_rows('returns', {'id': Integer(), 'quantity': Float()}, sorted(stock_totals.items()))
+        await self.db.execute(
+            update(StockModel)
+            .where(StockModel.id == returns.c.id)
+            .values(left_over=StockModel.left_over + returns.c.quantity)
+            .execution_options(synchronize_session=False)
+        )
+
+        await self.db.execute(insert(LogAreaMovementModel), logs)
+        await self.recorder.flush()
 
 
 class AreaFetchRepository:
@@ -331,6 +537,29 @@ class AreaGetByIdRepository:
         self.db = db
         self.item_id = item_id
         self.verifier = ProjectVerify(user_payload=user_payload, model=AreaModel)
+        self.archive_verifier = ProjectVerify(user_payload=user_payload, model=AreaArchiveModel)
+
+    async def etag(self) -> str | None:
+        """ETag of the row and its warehouse from one primary key lookup; None if it isn't visible."""
+        result = await self.db.execute(
+            select(AreaModel.updated_at, WarehouseModel.updated_at)
+            .join(StockModel, StockModel.id == AreaModel.stock_id)
+            .join(WarehouseModel, WarehouseModel.id == StockModel.warehouse_id)
+            .where(AreaModel.id == self.item_id, self.verifier.get_project_filter())
+        )
+        row = result.first()
+        if not row:
+            # The stock row of an archived area may be live or archived too
+            result = await self.db.execute(
+                select(AreaArchiveModel.updated_at, WarehouseModel.updated_at)
+                .outerjoin(StockModel, StockModel.id == AreaArchiveModel.stock_id)
+                .outerjoin(StockArchiveModel, StockArchiveModel.id == AreaArchiveModel.stock_id)
+                .join(WarehouseModel,
+                      WarehouseModel.id == func.coalesce(StockModel.warehouse_id, StockArchiveModel.warehouse_id))
+                .where(AreaArchiveModel.id == self.item_id, self.archive_verifier.get_project_filter())
+            )
+            row = result.first()
+        return make_etag(*row) if row else None
 
     async def get_by_id(self) -> AreaResponseSchema:
         try:
@@ -362,6 +591,13 @@ class AreaGetByIdRepository:
 
         result = data.scalars().first()
 
+        if not result:
+            # Fully consumed rows are moved to the archive by ConsumedArchiveRepository
+            data = await AreaFetchQuery.fetch_archived_query(
+                self.db, 1, self.archive_verifier.get_project_filter(), AreaArchiveModel.id == self.item_id
+            )
+            result = data.scalars().first()
+
         if result:
             temp = [result]
             return AreaStandardResponse.format_response(temp)[0]
@@ -369,8 +605,65 @@ class AreaGetByIdRepository:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Area id not available")
 
 
+class AreaChangesRepository(ChangeFeedRepository):
+
+    model = AreaModel
+    resource = 'area'
+
+    async def fetch(self, ids: list[int]) -> List[AreaResponseSchema]:
+        data = await AreaFetchQuery.fetch_query(self.db, len(ids), any_of(AreaModel.id, ids))
+        return AreaStandardResponse.format_response(list(data.scalars().all()))
+
+
+def _filter_base(model):
+    # Joined for the warehouse fields; the loader options join their own aliases
+    if model is AreaArchiveModel:
+        # The stock row of an archived area may be live or archived too
+        return (
+            select(AreaArchiveModel)
+            .outerjoin(StockModel, StockModel.id == AreaArchiveModel.stock_id)
+            .outerjoin(StockArchiveModel, StockArchiveModel.id == AreaArchiveModel.stock_id)
+            .outerjoin(WarehouseModel,
+                       WarehouseModel.id == func.coalesce(StockModel.warehouse_id, StockArchiveModel.warehouse_id))
+            .options(*AreaFetchQuery.archived_options())
+        )
+
+    return (
+        select(AreaModel)
+        .outerjoin(StockModel, StockModel.id == AreaModel.stock_id)
+        .outerjoin(WarehouseModel, WarehouseModel.id == StockModel.warehouse_id)
+        .options(
+            joinedload(AreaModel.stock).
+            joinedload(StockModel.warehouses).joinedload(WarehouseModel.category).load_only(
+                MaterialCategoryModel.category_name),
+            joinedload(AreaModel.group).load_only(GroupModel.group_name),
+            joinedload(AreaModel.project).load_only(ProjectModel.project_name)
+        )
+    )
+
+
+def _filter_fields(model):
+    return {
+        "material_name": contains(WarehouseModel.material_name),
+        "quantity": equals(model.quantity),
+        "serial_number": contains(model.serial_number),
+        "material_id": contains(model.material_id),
+        "username": contains(model.username),
+        "provide_type": contains(model.provide_type),
+        "card_number": contains(model.card_number),
+        "created_at": on_date(model.created_at),
+        "group_id": equals(model.group_id),
+        "stock_id": equals(model.stock_id),
+        "project_id": equals(model.project_id),
+        "category_id": equals(WarehouseModel.category_id),
+        "scope_project_id": equals(model.project_id),
+    }
+
+
 class AreaFilterRepository:
 
+    query = FilterQuery(_filter_base, _filter_fields)
+
     def __init__(self, db: AsyncSession, filter_data: AreaFilterSchema, user_payload: UserTokenSchema):
         self.db = db
         self.filter_data = filter_data
@@ -380,65 +673,30 @@ class AreaFilterRepository:
     async def filter(self):
 
         try:
-            data = await self.db.execute(self._build_query())
-            temp = data.unique().scalars().all()
-            result = AreaStandardResponse.format_response(list(temp))
+            data = await self.db.execute(*self._build_query(AreaModel))
+            temp = list(data.unique().scalars().all())
+            if self.filter_data.include_archived:
+                data = await self.db.execute(*self._build_query(AreaArchiveModel))
+                temp.extend(data.unique().scalars().all())
+            result = AreaStandardResponse.format_response(temp)
             return result
 
         except Exception as ex:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"{ex}")
 
-    def _build_query(self):
-
-        ALLOWED_FIELDS = {
-            "material_name": lambda val : WarehouseModel.material_name.ilike(f'%{val}%'),
-            "quantity": lambda val : AreaModel.quantity.ilike(f'%{val}%'),
-            "serial_number": lambda val : AreaModel.serial_number.ilike(f'%{val}%'),
-            "material_id": lambda val : AreaModel.material_id.ilike(f'%{val}%'),
-            "username": lambda val : AreaModel.username.ilike(f'%{val}%'),
-            "provide_type": lambda val : AreaModel.provide_type.ilike(f'%{val}%'),
-            "card_number": lambda val : AreaModel.card_number.ilike(f'%{val}%'),
-            "created_at": lambda val : func.date(AreaModel.created_at) == val,
-            "group_id": lambda val : GroupModel.id == val,
-            "stock_id": lambda val : AreaModel.stock_id == val,
-            "project_id": lambda val : AreaModel.project_id == val,
-            "category_id": lambda val : MaterialCategoryModel.id == val
-        }
-
-        filters = []
-
-        for field, value in self.filter_data.filter_data.__dict__.items():
-            if value is not None and field in ALLOWED_FIELDS:
-                condition = ALLOWED_FIELDS[field](value)
-                filters.append(condition)
-
-        project = self._verify_project()
-        if project is not None:
-            filters.append(project)
-
-        stmt = (
-            select(AreaModel)
-            .where(*filters)
-            .options(
-                joinedload(AreaModel.stock).
-                joinedload(StockModel.warehouses).joinedload(WarehouseModel.category).load_only(
-                    MaterialCategoryModel.category_name),
-                joinedload(AreaModel.group).load_only(GroupModel.group_name),
-                joinedload(AreaModel.project).load_only(ProjectModel.project_name)
-            )
-        )
-        # print('-----------------------------------------')
-        # print(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
-        # print('-----------------------------------------')
+    def _build_query(self, model):
+        values = dict(self.filter_data.filter_data.__dict__)
+        values['scope_project_id'] = self._verify_project(model)
+        return self.query.build(model, values)
 
-        return stmt
-
-    def _verify_project(self):
+    def _verify_project(self, model) -> int | None:
         project_id: int = self.user_payload.get('project_id')
         if not project_id:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Project ID required.")
 
         if project_id == 1:
             return None
+        if row_security.filters_project(model.__tablename__):
+            return None
 
-        return AreaModel.project_id == project_id
+        return project_id
@@ -0,0 +1,110 @@
+import os
+from abc import ABC, abstractmethod
+
+from fastapi import HTTPException, status
+
+from sqlalchemy import select, func, tuple_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.dependencies.verify_project import ProjectVerify
+from src.models.change_models import InventoryTombstoneModel
+from src.schemas.user_schemas import UserTokenSchema
+
+from src.logging_config import setup_logger
+logger = setup_logger(__name__, 'change_feed.log')
+
+
+CHANGE_FEED_LIMIT = int(os.getenv('CHANGE_FEED_LIMIT', '500'))
+
+
+def parse_cursor(cursor: str) -> tuple[int, int]:
+    txid, _, item_id = cursor.partition('.')
+    try:
+        return int(txid), int(item_id or 0)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+class ChangeFeedRepository(ABC):
+    """Rows of one resource written after a cursor, and the ids removed meanwhile, for one project.
+
+    Inserts and updates stamp change_txid with the writing transaction's id, and a page only
+    reaches up to the xmin of the current snapshot: every transaction below it has finished,
+    so one that commits late can't land behind a cursor a client already holds. The price is
+    that a long-running transaction holds the feed back until it ends. The cursor is
+    "txid.id"; pages are ordered by (change_txid, id). Subclasses set model and resource and
+    load the full rows in fetch.
+    """
+
+    model: type
+    resource: str
+
+    def __init__(self, db: AsyncSession, user_payload: UserTokenSchema, since: str | None,
+                 limit: int = CHANGE_FEED_LIMIT):
+        self.db = db
+        self.since = since
+        self.limit = limit
+        self.verifier = ProjectVerify(user_payload=user_payload, model=self.model)
+        self.tombstone_verifier = ProjectVerify(user_payload=user_payload, model=InventoryTombstoneModel)
+
+    async def changes(self) -> dict:
+        try:
+            return await self._changes()
+        except HTTPException as ex:
+            raise ex
+        except SQLAlchemyError as ex:
+            logger.exception(f"Database operation failed {ex}")
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid {self.resource} data")
+        except Exception as ex:
+            logger.error(f'{self.resource} changes error {ex}')
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"{self.resource} changes error")
+
+    async def _changes(self) -> dict:
+        start = parse_cursor(self.since) if self.since else (0, 0)
+        horizon = await self.db.scalar(select(func.txid_snapshot_xmin(func.txid_current_snapshot())))
+
+        M = self.model
+        result = await self.db.execute(
+            select(M.id, M.change_txid)
+            .where(tuple_(M.change_txid, M.id) > tuple_(*start),
+                   M.change_txid < horizon,
+                   self.verifier.get_project_filter())
+            .order_by(M.change_txid, M.id)
+            .limit(self.limit + 1)
+        )
+        rows = result.all()
+        has_more = len(rows) > self.limit
+        rows = rows[:self.limit]
+        end = (rows[-1].change_txid, rows[-1].id) if has_more else max(start, (horizon, 0))
+
+        changes = []
+        if rows:
+            # The full rows may have changed again since; the next page then carries them once more
+            by_id = {item.id: item for item in await self.fetch([row.id for row in rows])}
+            changes = [by_id[row.id] for row in rows if row.id in by_id]
+
+        deleted = []
+        # A first sync has nothing to delete; later pages cover each txid of [start, end) once
+        if self.since and start[0] < end[0]:
+            T = InventoryTombstoneModel
+            result = await self.db.execute(
+                select(T.item_id)
+                .where(T.resource == self.resource,
+                       T.change_txid >= start[0],
+                       T.change_txid < end[0],
+                       self.tombstone_verifier.get_project_filter())
+                .order_by(T.change_txid, T.id)
+            )
+            deleted = list(result.scalars())
+
+        return {
+            'cursor': f'{end[0]}.{end[1]}',
+            'has_more': has_more,
+            'changes': changes,
+            'deleted': deleted,
+        }
+
+    @abstractmethod
+    async def fetch(self, ids: list[int]) -> list:
+        pass
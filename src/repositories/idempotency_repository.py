@@ -0,0 +1,188 @@
+
+import asyncio
+import hashlib
+import os
+import uuid
+from datetime import timedelta
+from typing import Any, Awaitable, Callable
+
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from sqlalchemy import select, update, delete, func, null
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.setup import SessionLocal
+from src.models.idempotency_model import IdempotencyKeyModel
+
+from src.logging_config import setup_logger
+logger = setup_logger(__name__, 'idempotency.log')
+
+
+IDEMPOTENCY_TTL = timedelta(hours=int(os.getenv('IDEMPOTENCY_TTL_HOURS', '24')))
+# An in-progress claim older than this belongs to a crashed request and can be taken over
+IN_PROGRESS_LEASE = timedelta(seconds=int(os.getenv('IDEMPOTENCY_LEASE_SECONDS', '120')))
+WAIT_TIMEOUT = float(os.getenv('IDEMPOTENCY_WAIT_SECONDS', '30'))
+POLL_INTERVAL = 0.2
+
+REPLAY_HEADER = 'Idempotent-Replayed'
+
+
+class IdempotencyRepository:
+    """Runs a write at most once per (user, Idempotency-Key) and replays its stored response.
+
+    The key is claimed in its own committed transaction so that concurrent duplicates see it
+    and wait, while the response is stored inside the write's own transaction, so a key is
+    never marked completed for a write that rolled back.
+    """
+
+    def __init__(self, user_id: int, key: str | None, route: str, payload: BaseModel,
+                 status_code: int = status.HTTP_201_CREATED):
+        self.user_id = user_id
+        self.key = key
+        self.route = route
+        self.status_code = status_code
+        self.request_hash = hashlib.sha256(payload.model_dump_json().encode()).hexdigest()
+        self.claim_token: uuid.UUID | None = None
+
+    async def run(self, db: AsyncSession, work: Callable[[], Awaitable[Any]]) -> Any:
+        if not self.key:
+            return await work()
+
+        replay = await self._claim()
+        if replay is not None:
+            return replay
+
+        db.info['before_commit'] = self._complete
+        try:
+            return await work()
+        except BaseException:
+            await self._release()
+            raise
+        finally:
+            db.info.pop('before_commit', None)
+
+    async def _claim(self) -> JSONResponse | None:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + WAIT_TIMEOUT
+        I = IdempotencyKeyModel
+
+        while True:
+            self.claim_token = uuid.uuid4()
+            async with SessionLocal() as session:
+                stmt = insert(I).values(
+                    user_id=self.user_id,
+                    key=self.key,
+                    route=self.route,
+                    request_hash=self.request_hash,
+                    status='in_progress',
+                    claim_token=self.claim_token,
+                    expires_at=func.now() + IN_PROGRESS_LEASE,
+                )
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=['user_id', 'key'],
+                    set_={
+                        'route': stmt.excluded.route,
+                        'request_hash': stmt.excluded.request_hash,
+                        'status': stmt.excluded.status,
+                        'claim_token': stmt.excluded.claim_token,
+                        'response_status': None,
+                        'response_body': null(),
+                        'created_at': func.now(),
+                        'expires_at': stmt.excluded.expires_at,
+                    },
+                    # Only an expired key (stale lease or finished replay window) is taken over
+                    where=I.expires_at < func.now(),
+                ).returning(I.key)
+
+                claimed = await session.scalar(stmt)
+                existing = None
+                if claimed is None:
+                    existing = (await session.execute(
+                        select(I.route, I.request_hash, I.status, I.response_status, I.response_body)
+                        .where(I.user_id == self.user_id, I.key == self.key)
+                    )).first()
+                await session.commit()
+
+            if claimed is not None:
+                return None
+
+            if existing is None:
+                # The first attempt failed and released the key in between; claim it again
+                continue
+
+            if existing.route != self.route or existing.request_hash != self.request_hash:
+                logger.warning(f"Idempotency-Key {self.key} of user {self.user_id} reused for a different request")
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail="Idempotency-Key was already used for a different request"
+                )
+
+            if existing.status == 'completed':
+                logger.info(f"Replaying {self.route} for Idempotency-Key {self.key} of user {self.user_id}")
+                return JSONResponse(
+                    status_code=existing.response_status,
+                    content=existing.response_body,
+                    headers={REPLAY_HEADER: 'true'},
+                )
+
+            if loop.time() >= deadline:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="A request with this Idempotency-Key is still in progress"
+                )
+            await asyncio.sleep(POLL_INTERVAL)
+
+    def _owned(self):
+        # A request that outlived its lease may have lost the key to a retry
+        I = IdempotencyKeyModel
+        return (I.user_id == self.user_id, I.key == self.key,
+                I.status == 'in_progress', I.claim_token == self.claim_token)
+
+    async def _complete(self, db: AsyncSession, result: Any) -> None:
+        I = IdempotencyKeyModel
+        completed = await db.scalar(
+            update(I)
+            .where(*self._owned())
+            .values(
+                status='completed',
+                response_status=self.status_code,
+                response_body=jsonable_encoder(result),
+                expires_at=func.now() + IDEMPOTENCY_TTL,
+            )
+            .returning(I.key)
+            .execution_options(synchronize_session=False)
+        )
+        if completed is None:
+            # Raised before the commit, so the write of the stale claim rolls back
+            logger.error(f"Idempotency-Key {self.key} of user {self.user_id} was taken over before completing")
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="The Idempotency-Key lease expired and another request took it over"
+            )
+
+    async def _release(self) -> None:
+        I = IdempotencyKeyModel
+        try:
+            async with SessionLocal() as session:
+                await session.execute(delete(I).where(*self._owned()))
+                await session.commit()
+        except Exception as ex:
+            # The lease expires on its own; a retry just waits for it
+            logger.error(f"Release Idempotency-Key {self.key} error : {ex}")
+
+
+class IdempotencyPurgeRepository:
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def purge_expired(self) -> int:
+        result = await self.db.execute(
+            delete(IdempotencyKeyModel).where(IdempotencyKeyModel.expires_at < func.now())
+        )
+        await self.db.commit()
+        return result.rowcount
@@ -0,0 +1,514 @@
+
+from datetime import date, datetime, timedelta, timezone
+from typing import List
+
+from fastapi import HTTPException, status
+
+from sqlalchemy import select, delete, func, tuple_, literal, union_all, true, text, cast, Date, Integer, Float, String
+from sqlalchemy.dialects.postgresql import insert, aggregate_order_by, ARRAY
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.bulk import unnest_rows
+from src.database.change_events import notify_changes
+from src.dependencies.verify_project import ProjectVerify
+from src.models.area_model import AreaModel
+from src.models.inventory_models import StockSummaryModel, InventoryLedgerModel, InventoryCheckpointModel, \
+    InventoryDailyRollupModel
+from src.models.logging_models import LogStockMovementModel, LogAreaMovementModel, LogUpdateWarehouseQtyModel
+from src.models.stock_models import StockModel
+from src.models.warehouse_model import WarehouseModel
+from src.repositories.archive_repository import with_archived
+from src.schemas.inventory_schemas import StockSummaryResponseSchema, LedgerBalanceResponseSchema
+from src.schemas.user_schemas import UserTokenSchema
+
+from src.logging_config import setup_logger
+logger = setup_logger(__name__, 'inventory.log')
+
+
+SUMMARY_COLUMNS = {
+    'warehouse': 'warehouse_left_over',
+    'stock': 'stock_left_over',
+    'area': 'area_quantity',
+}
+
+# Each movement is recorded on both locations it touches; only one side feeds the daily
+# rollup, with the sign that makes the column positive. A warehouse row moving to another
+# project ('move project') isn't rolled up: rebuild() attributes each row's history to its
+# current project, so a row received and moved within a rebuilt range is booked to the new
+# project there, while the live rollup keeps the days before the move under the old one.
+ROLLUP_COLUMNS = {
+    ('warehouse', 'receipt'): ('received', 1),
+    ('warehouse', 'update qty'): ('adjusted', 1),
+    ('stock', 'issue to stock'): ('issued_to_stock', 1),
+    ('area', 'issue to area'): ('issued_to_area', 1),
+    ('area', 'return to stock'): ('returned_to_stock', -1),
+    ('stock', 'return to warehouse'): ('returned_to_warehouse', -1),
+}
+
+
+class InventoryMovementRecorder:
+    """Collects the quantity changes of one transaction and writes the derived tables before commit.
+
+    The movements are also NOTIFYed for the SSE stream of GET /api/inventory/events.
+    """
+
+    def __init__(self, db: AsyncSession, user_id: int):
+        self.db = db
+        self.user_id = user_id
+        self.movements: list[dict] = []
+        # Projects whose area quantities changed, for invalidating cached reports after commit
+        self.area_project_ids: set[int] = set()
+
+    def record(self, location: str, item_id: int, project_id: int, warehouse_id: int,
+               quantity: float, movement_type: str) -> None:
+        if quantity:
+            self.movements.append({
+                'location': location,
+                'item_id': item_id,
+                'project_id': project_id,
+                'warehouse_id': warehouse_id,
+                'quantity': quantity,
+                'movement_type': movement_type,
+                'created_by_id': self.user_id,
+            })
+            if location == 'area':
+                self.area_project_ids.add(project_id)
+
+    def reset(self) -> None:
+        self.movements = []
+        self.area_project_ids = set()
+
+    async def flush(self) -> None:
+        if not self.movements:
+            return
+        await self.db.execute(insert(InventoryLedgerModel), self.movements)
+        await StockSummaryRepository(self.db).apply(self.movements)
+        await DailyRollupRepository(self.db).apply(self.movements)
+        await notify_changes(self.db, self.movements)
+        self.movements = []
+
+
+class StockSummaryRepository:
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def apply(self, movements: list[dict]) -> None:
+        rows = [
+            (
+                item['project_id'],
+                item['warehouse_id'],
+                item['quantity'] if item['location'] == 'warehouse' else 0.0,
+                item['quantity'] if item['location'] == 'stock' else 0.0,
+                item['quantity'] if item['location'] == 'area' else 0.0,
+            )
+            for item in movements
+        ]
+        deltas = unnest_rows('movements', {
+            'project_id': Integer(),
+            'warehouse_id': Integer(),
+            'warehouse_left_over': Float(),
+            'stock_left_over': Float(),
+            'area_quantity': Float(),
+        }, rows)
+
+        key = (deltas.c.project_id, WarehouseModel.material_code_id, WarehouseModel.category_id)
+        source = (
+            select(
+                *key,
+                func.sum(deltas.c.warehouse_left_over),
+                func.sum(deltas.c.stock_left_over),
+                func.sum(deltas.c.area_quantity),
+            )
+            .select_from(deltas)
+            .join(WarehouseModel, WarehouseModel.id == deltas.c.warehouse_id)
+            .group_by(*key)
+            # Summary rows are always locked in key order, so two movements can't deadlock on them
+            .order_by(*key)
+        )
+        await self.db.execute(self._upsert(source, accumulate=True))
+
+    async def refresh(self, keys: set[tuple[int, int]]) -> None:
+        """Recompute every project's summary rows for the given (material_code_id, category_id) pairs."""
+        if not keys:
+            return
+        await self.db.execute(
+            delete(StockSummaryModel)
+            .where(tuple_(StockSummaryModel.material_code_id, StockSummaryModel.category_id).in_(keys))
+        )
+        source = self._aggregate(
+            tuple_(WarehouseModel.material_code_id, WarehouseModel.category_id).in_(keys)
+        )
+        await self.db.execute(self._upsert(source, accumulate=False))
+
+    async def rebuild(self) -> None:
+        await self.db.execute(delete(StockSummaryModel))
+        await self.db.execute(self._upsert(self._aggregate(), accumulate=False))
+
+    @staticmethod
+    def _aggregate(*where_clauses):
+        zero = literal(0.0, Float())
+        balances = union_all(
+            select(WarehouseModel.project_id, WarehouseModel.material_code_id, WarehouseModel.category_id,
+                   WarehouseModel.left_over.label('warehouse_left_over'),
+                   zero.label('stock_left_over'),
+                   zero.label('area_quantity'))
+            .where(*where_clauses),
+            select(StockModel.project_id, WarehouseModel.material_code_id, WarehouseModel.category_id,
+                   zero, StockModel.left_over, zero)
+            .join(WarehouseModel, WarehouseModel.id == StockModel.warehouse_id)
+            .where(*where_clauses),
+            select(AreaModel.project_id, WarehouseModel.material_code_id, WarehouseModel.category_id,
+                   zero, zero, AreaModel.quantity)
+            .join(StockModel, StockModel.id == AreaModel.stock_id)
+            .join(WarehouseModel, WarehouseModel.id == StockModel.warehouse_id)
+            .where(*where_clauses),
+        ).subquery('balances')
+
+        key = (balances.c.project_id, balances.c.material_code_id, balances.c.category_id)
+        return (
+            select(
+                *key,
+                func.sum(balances.c.warehouse_left_over),
+                func.sum(balances.c.stock_left_over),
+                func.sum(balances.c.area_quantity),
+            )
+            .group_by(*key)
+            .order_by(*key)
+        )
+
+    @staticmethod
+    def _upsert(source, accumulate: bool):
+        stmt = insert(StockSummaryModel).from_select(
+            ['project_id', 'material_code_id', 'category_id',
+             'warehouse_left_over', 'stock_left_over', 'area_quantity'],
+            source,
+        )
+        if accumulate:
+            values = {
+                name: getattr(StockSummaryModel, name) + getattr(stmt.excluded, name)
+                for name in SUMMARY_COLUMNS.values()
+            }
+        else:
+            values = {name: getattr(stmt.excluded, name) for name in SUMMARY_COLUMNS.values()}
+
+        return stmt.on_conflict_do_update(
+            index_elements=['project_id', 'material_code_id', 'category_id'],
+            set_={**values, 'updated_at': func.now()},
+        )
+
+
+class DailyRollupRepository:
+    """Per-day, per-project, per-material movement totals in inventory_daily_rollup."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def apply(self, movements: list[dict]) -> None:
+        rows = []
+        for item in movements:
+            target = ROLLUP_COLUMNS.get((item['location'], item['movement_type']))
+            if target:
+                name, sign = target
+                rows.append((item['project_id'], item['warehouse_id'], name, sign * item['quantity']))
+        if not rows:
+            return
+
+        amounts = unnest_rows('movements', {
+            'project_id': Integer(),
+            'warehouse_id': Integer(),
+            'kind': String(),
+            'amount': Float(),
+        }, rows)
+
+        key = (amounts.c.project_id, WarehouseModel.material_code_id)
+        source = (
+            select(func.current_date(), *key, *self._sums(amounts.c.kind, amounts.c.amount))
+            .select_from(amounts)
+            .join(WarehouseModel, WarehouseModel.id == amounts.c.warehouse_id)
+            .group_by(*key)
+            # Same key order in every transaction, so concurrent movements can't deadlock on rollup rows
+            .order_by(*key)
+        )
+        await self.db.execute(self._upsert(source, accumulate=True))
+
+    async def rebuild(self, date_from: date | None = None, date_to: date | None = None) -> int:
+        """Recompute the rollup days in [date_from, date_to] (open ends for all history) from the source tables.
+
+        Idempotent: the range is deleted and written again in the caller's transaction. The table
+        lock makes movements committing meanwhile wait, so none is counted twice or lost. History
+        is attributed to each row's current project and material code.
+        """
+        R = InventoryDailyRollupModel
+
+        await self.db.execute(text('LOCK TABLE inventory_daily_rollup IN SHARE ROW EXCLUSIVE MODE'))
+
+        window = []
+        if date_from:
+            window.append(R.day >= date_from)
+        if date_to:
+            window.append(R.day <= date_to)
+        await self.db.execute(delete(R).where(*window))
+
+        movements = self._history(date_from, date_to).subquery('movements')
+        key = (movements.c.day, movements.c.project_id, movements.c.material_code_id)
+        source = (
+            select(*key, *self._sums(movements.c.kind, movements.c.amount))
+            .group_by(*key)
+            .order_by(*key)
+        )
+        result = await self.db.execute(self._upsert(source, accumulate=False))
+        return result.rowcount
+
+    @staticmethod
+    def _history(date_from: date | None, date_to: date | None):
+        W = WarehouseModel
+        # Consumed stock and area rows move to the archive tables, their history with them
+        S = with_archived(StockModel)
+        A = with_archived(AreaModel)
+        LW = LogUpdateWarehouseQtyModel
+        LS = with_archived(LogStockMovementModel)
+        LA = with_archived(LogAreaMovementModel)
+
+        def window(created_at):
+            clauses = []
+            if date_from:
+                clauses.append(created_at >= date_from)
+            if date_to:
+                clauses.append(created_at < date_to + timedelta(days=1))
+            return clauses
+
+        def day(created_at):
+            return cast(created_at, Date).label('day')
+
+        def kind(name):
+            return literal(name, String()).label('kind')
+
+        # Quantities as first received/issued: later updates and returns changed the rows since
+        first_quantity = (
+            select(LW.old_quantity).where(LW.warehouse_id == W.id).order_by(LW.id).limit(1)
+        ).scalar_subquery()
+        stock_returned = select(func.sum(LS.return_quantity)).where(LS.stock_id == S.id).scalar_subquery()
+        area_returned = select(func.sum(LA.return_quantity)).where(LA.area_id == A.id).scalar_subquery()
+
+        return union_all(
+            select(day(W.created_at), W.project_id, W.material_code_id, kind('received'),
+                   func.coalesce(first_quantity, W.qty).label('amount'))
+            .where(*window(W.created_at)),
+            select(day(LW.created_at), W.project_id, W.material_code_id, kind('adjusted'),
+                   LW.new_left_over - LW.old_left_over)
+            .join(W, W.id == LW.warehouse_id)
+            .where(*window(LW.created_at)),
+            select(day(S.created_at), S.project_id, W.material_code_id, kind('issued_to_stock'),
+                   S.quantity + func.coalesce(stock_returned, 0))
+            .join(W, W.id == S.warehouse_id)
+            .where(*window(S.created_at)),
+            select(day(A.created_at), A.project_id, W.material_code_id, kind('issued_to_area'),
+                   A.quantity + func.coalesce(area_returned, 0))
+            .join(S, S.id == A.stock_id)
+            .join(W, W.id == S.warehouse_id)
+            .where(*window(A.created_at)),
+            select(day(LA.created_at), A.project_id, W.material_code_id, kind('returned_to_stock'),
+                   LA.return_quantity)
+            .join(A, A.id == LA.area_id)
+            .join(S, S.id == LA.stock_id)
+            .join(W, W.id == S.warehouse_id)
+            .where(*window(LA.created_at)),
+            select(day(LS.created_at), S.project_id, W.material_code_id, kind('returned_to_warehouse'),
+                   LS.return_quantity)
+            .join(S, S.id == LS.stock_id)
+            .join(W, W.id == LS.warehouse_id)
+            .where(*window(LS.created_at)),
+        )
+
+    @staticmethod
+    def _sums(kind, amount):
+        return [
+            func.coalesce(func.sum(amount).filter(kind == name), 0.0)
+            for name, _ in ROLLUP_COLUMNS.values()
+        ]
+
+    @staticmethod
+    def _upsert(source, accumulate: bool):
+        columns = [name for name, _ in ROLLUP_COLUMNS.values()]
+        stmt = insert(InventoryDailyRollupModel).from_select(['day', 'project_id', 'material_code_id', *columns], source)
+        if accumulate:
+            values = {
+                name: getattr(InventoryDailyRollupModel, name) + getattr(stmt.excluded, name)
+                for name in columns
+            }
+        else:
+            values = {name: getattr(stmt.excluded, name) for name in columns}
+
+        return stmt.on_conflict_do_update(
+            index_elements=['day', 'project_id', 'material_code_id'],
+            set_={**values, 'updated_at': func.now()},
+        )
+
+
+class StockSummaryFetchRepository:
+
+    def __init__(self, db: AsyncSession, payload: UserTokenSchema):
+        self.db = db
+        self.verifier = ProjectVerify(user_payload=payload, model=StockSummaryModel)
+
+    async def fetch(self,
+                    project_id: int | None = None,
+                    material_code_id: int | None = None,
+                    category_id: int | None = None) -> List[StockSummaryResponseSchema]:
+        try:
+            filters = []
+
+            project_filter = self.verifier.get_project_filter()
+            if project_filter is not True:
+                filters.append(project_filter)
+            if self.verifier.is_admin() and project_id is not None:
+                filters.append(StockSummaryModel.project_id == project_id)
+
+            if material_code_id is not None:
+                filters.append(StockSummaryModel.material_code_id == material_code_id)
+            if category_id is not None:
+                filters.append(StockSummaryModel.category_id == category_id)
+
+            result = await self.db.execute(
+                select(StockSummaryModel)
+                .where(*filters)
+                .order_by(StockSummaryModel.project_id,
+                          StockSummaryModel.material_code_id,
+                          StockSummaryModel.category_id)
+            )
+            return [StockSummaryResponseSchema.model_validate(row) for row in result.scalars().all()]
+
+        except SQLAlchemyError as ex:
+            logger.exception(f"Database operation failed {ex}")
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid summary data"
+            )
+        except Exception as ex:
+            logger.error(f"Fetch stock summary error : {ex}")
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Fetch stock summary error")
+
+
+class LedgerCheckpointRepository:
+
+    # Ledger rows carry their transaction start time, so a transaction still open at checkpoint
+    # time may commit rows dated before it. Checkpoints stay this far behind now() to cover that.
+    SAFETY_MARGIN = timedelta(hours=1)
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def create_checkpoints(self, until: datetime | None = None) -> dict[str, str]:
+        """Checkpoint every item that moved since the previous run.
+
+        Each item's latest checkpoint covers all of its rows up to the previous run, so the new
+        balance is that checkpoint plus the rows between the two runs - a BRIN range over created_at.
+        """
+        latest = datetime.now(timezone.utc) - self.SAFETY_MARGIN
+        until = min(until, latest) if until else latest
+
+        since = await self.db.scalar(select(func.max(InventoryCheckpointModel.checkpoint_at)))
+        if since and since >= until:
+            return {"detail": "Checkpoints are up to date"}
+
+        L = InventoryLedgerModel
+        C = InventoryCheckpointModel
+
+        window = [L.created_at <= until]
+        if since:
+            window.append(L.created_at > since)
+
+        deltas = (
+            select(
+                L.location,
+                L.item_id,
+                func.array_agg(aggregate_order_by(L.project_id, L.id.desc()), type_=ARRAY(Integer))[1].label('project_id'),
+                func.sum(L.quantity).label('quantity'),
+            )
+            .where(*window)
+            .group_by(L.location, L.item_id)
+        ).subquery('deltas')
+
+        previous = (
+            select(C.balance)
+            .where(C.location == deltas.c.location, C.item_id == deltas.c.item_id)
+            .order_by(C.checkpoint_at.desc())
+            .limit(1)
+        ).lateral('previous')
+
+        source = (
+            select(
+                deltas.c.location,
+                deltas.c.item_id,
+                deltas.c.project_id,
+                literal(until, C.checkpoint_at.type),
+                func.coalesce(previous.c.balance, 0) + deltas.c.quantity,
+            )
+            .select_from(deltas.outerjoin(previous, true()))
+        )
+
+        try:
+            await self.db.execute(
+                insert(C).from_select(['location', 'item_id', 'project_id', 'checkpoint_at', 'balance'], source)
+            )
+            await self.db.commit()
+            logger.info(f"Ledger checkpoint created at {until}")
+            return {"detail": f"Checkpoint created at {until.isoformat()}"}
+        except SQLAlchemyError as ex:
+            await self.db.rollback()
+            logger.exception(f"Ledger checkpoint failed {ex}")
+            raise HTTPException(status_code=500, detail="Ledger checkpoint failed")
+
+
+class LedgerBalanceRepository:
+
+    def __init__(self, db: AsyncSession, payload: UserTokenSchema):
+        self.db = db
+        self.ledger_verifier = ProjectVerify(user_payload=payload, model=InventoryLedgerModel)
+        self.checkpoint_verifier = ProjectVerify(user_payload=payload, model=InventoryCheckpointModel)
+
+    async def balance_at(self, location: str, item_id: int, at: datetime) -> LedgerBalanceResponseSchema:
+        L = InventoryLedgerModel
+        C = InventoryCheckpointModel
+
+        try:
+            checkpoint = (
+                await self.db.execute(
+                    select(C.checkpoint_at, C.balance)
+                    .where(C.location == location,
+                           C.item_id == item_id,
+                           C.checkpoint_at <= at,
+                           self.checkpoint_verifier.get_project_filter())
+                    .order_by(C.checkpoint_at.desc())
+                    .limit(1)
+                )
+            ).first()
+
+            window = [L.location == location, L.item_id == item_id, L.created_at <= at,
+                      self.ledger_verifier.get_project_filter()]
+            if checkpoint:
+                window.append(L.created_at > checkpoint.checkpoint_at)
+
+            deltas = (await self.db.execute(select(func.sum(L.quantity), func.count()).where(*window))).one()
+
+            if not checkpoint and not deltas[1]:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No ledger history for item")
+
+            return LedgerBalanceResponseSchema(
+                location=location,
+                item_id=item_id,
+                at=at,
+                balance=(checkpoint.balance if checkpoint else 0) + (deltas[0] or 0),
+                checkpoint_at=checkpoint.checkpoint_at if checkpoint else None,
+            )
+
+        except HTTPException as ex:
+            raise ex
+        except SQLAlchemyError as ex:
+            logger.exception(f"Database operation failed {ex}")
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid ledger data")
+        except Exception as ex:
+            logger.error(f"Ledger balance error : {ex}")
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Ledger balance error")
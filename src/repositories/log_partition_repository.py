@@ -0,0 +1,146 @@
+import asyncio
+import gzip
+import os
+import re
+from datetime import date
+from pathlib import Path
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.logging_config import setup_logger
+logger = setup_logger(__name__, 'log_partitions.log')
+
+
+# RANGE partitioned on created_at by month since migration 68c59cb7386d
+LOG_TABLES = ('log_warehouse_movement', 'log_stock_movement', 'log_area_movement')
+
+PARTITION_NAME = re.compile(r'^(?P<table>log_\w+)_y(?P<year>\d{4})m(?P<month>\d{2})$')
+
+MONTHS_AHEAD = int(os.getenv('LOG_PARTITION_MONTHS_AHEAD', '3'))
+# Months kept attached; older ones are exported to ARCHIVE_DIR and dropped. 0 keeps everything
+RETENTION_MONTHS = int(os.getenv('LOG_RETENTION_MONTHS', '24'))
+ARCHIVE_DIR = Path(os.getenv('LOG_ARCHIVE_DIR', 'archive/logs'))
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f'{table}_y{month.year}m{month.month:02d}'
+
+
+class LogPartitionRepository:
+    """Monthly partitions of the movement logs: created ahead of time, archived past retention.
+
+    Archived months are gone from the database, so DailyRollupRepository.rebuild can no
+    longer re-derive days older than the retention window.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def create_partitions(self, months_ahead: int = MONTHS_AHEAD, since: date | None = None) -> list[str]:
+        """Create the missing partitions from since (default: this month) to months_ahead.
+
+        Inserts only ever route by created_at, so as long as the current month exists they
+        never touch more than one partition. Commits.
+        """
+        this_month = date.today().replace(day=1)
+        attached = {name for name, _ in await self._attached()}
+
+        created = []
+        month = (since or this_month).replace(day=1)
+        while month <= add_months(this_month, months_ahead):
+            for table in LOG_TABLES:
+                name = partition_name(table, month)
+                if name in attached:
+                    continue
+                # UTC bounds, so the partitions don't depend on the session time zone
+                await self.db.execute(text(
+                    f"CREATE TABLE {name} PARTITION OF {table} "
+                    f"FOR VALUES FROM ('{month} 00:00:00+00') TO ('{add_months(month, 1)} 00:00:00+00')"
+                ))
+                created.append(name)
+            month = add_months(month, 1)
+
+        for table in LOG_TABLES:
+            if await self.db.scalar(text(f'SELECT EXISTS (SELECT 1 FROM {table}_default)')):
+                logger.warning(f'{table}_default has rows; create partitions for their months')
+
+        await self.db.commit()
+        return created
+
+    async def archive_expired(self, retention_months: int = RETENTION_MONTHS,
+                              archive_dir: Path = ARCHIVE_DIR) -> list[str]:
+        """Detach the months older than retention, export each to gzipped CSV and drop it.
+
+        Every step commits on its own, so the parent is only locked for the detach. A month
+        whose export failed stays detached and is picked up again by the next run.
+        """
+        if retention_months <= 0:
+            return []
+
+        cutoff = add_months(date.today().replace(day=1), -retention_months)
+
+        for name, parent in await self._attached():
+            if self._month(name) < cutoff:
+                await self.db.execute(text(f'ALTER TABLE {parent} DETACH PARTITION {name}'))
+                await self.db.commit()
+                logger.info(f'Detached {name} from {parent}')
+
+        archived = []
+        archive_dir.mkdir(parents=True, exist_ok=True)
+        for name in await self._detached():
+            path = archive_dir / f'{name}.csv.gz'
+            rows = await self._export(name, path)
+            await self.db.execute(text(f'DROP TABLE {name}'))
+            await self.db.commit()
+            logger.info(f'Archived {rows} rows of {name} to {path}')
+            archived.append(name)
+        return archived
+
+    async def _export(self, name: str, path: Path) -> int:
+        connection = await self.db.connection()
+        raw = await connection.get_raw_connection()
+        partial = path.with_name(path.name + '.part')
+
+        # Compression runs in a thread; the scheduler shares the event loop with the API
+        file = await asyncio.to_thread(gzip.open, partial, 'wb')
+        try:
+            async def write(chunk: bytes) -> None:
+                await asyncio.to_thread(file.write, chunk)
+
+            status = await raw.driver_connection.copy_from_table(name, output=write, format='csv', header=True)
+        finally:
+            await asyncio.to_thread(file.close)
+
+        os.replace(partial, path)
+        await self.db.commit()
+        return int(status.split()[-1])
+
+    async def _attached(self) -> list[tuple[str, str]]:
+        result = await self.db.execute(text(
+            "SELECT c.relname, p.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = ANY(:tables) AND p.relnamespace = 'public'::regnamespace"
+        ), {'tables': list(LOG_TABLES)})
+        return [(name, parent) for name, parent in result if PARTITION_NAME.match(name)]
+
+    async def _detached(self) -> list[str]:
+        result = await self.db.execute(text(
+            "SELECT c.relname FROM pg_class c "
+            "WHERE c.relnamespace = 'public'::regnamespace AND c.relkind = 'r' "
+            "AND NOT EXISTS (SELECT 1 FROM pg_inherits i WHERE i.inhrelid = c.oid)"
+        ))
+        return sorted(
+            name for name in result.scalars()
+            if (match := PARTITION_NAME.match(name)) and match['table'] in LOG_TABLES
+        )
+
+    @staticmethod
+    def _month(name: str) -> date:
+        match = PARTITION_NAME.match(name)
+        return date(int(match['year']), int(match['month']), 1)
@@ -0,0 +1,216 @@
+import os
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Iterable, List
+
+from fastapi import HTTPException, status
+
+from sqlalchemy import select, func, cast, null, literal_column, Date
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.dependencies.verify_project import ProjectVerify
+from src.models import ProjectModel
+from src.models.area_model import AreaModel
+from src.models.inventory_models import InventoryDailyRollupModel
+from src.models.ordered_model import GroupModel
+from src.models.stock_models import StockModel
+from src.models.warehouse_model import WarehouseModel, MaterialCategoryModel
+from src.schemas.report_schemas import ConsumptionReportSchema, ConsumptionReportRowSchema, DailyRollupResponseSchema
+from src.schemas.user_schemas import UserTokenSchema
+
+from src.logging_config import setup_logger
+logger = setup_logger(__name__, 'report.log')
+
+
+REPORT_CACHE_TTL = float(os.getenv('REPORT_CACHE_TTL_SECONDS', '300'))
+REPORT_CACHE_MAX_ENTRIES = 1000
+
+
+class ReportCache:
+    """Per-process TTL cache of report results keyed by (project, report, range, filters).
+
+    Entries are dropped when an area movement of their project commits in this process;
+    the TTL bounds how stale a report can be when the movement went through another worker.
+    Entries of project None (all projects) are dropped on every invalidation.
+    """
+
+    def __init__(self, ttl: float = REPORT_CACHE_TTL, max_entries: int = REPORT_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries: OrderedDict[tuple, tuple[float, list]] = OrderedDict()
+
+    def get(self, key: tuple) -> list | None:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires < time.monotonic():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return value
+
+    def set(self, key: tuple, value: list) -> None:
+        if self.ttl <= 0:
+            return
+        self.entries[key] = (time.monotonic() + self.ttl, value)
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def invalidate(self, project_ids: Iterable[int]) -> None:
+        projects = {None, *project_ids}
+        for key in [key for key in self.entries if key[0] in projects]:
+            del self.entries[key]
+
+
+report_cache = ReportCache()
+
+
+class ConsumptionReportRepository:
+    """Quantity issued to site, summed server-side per group, category, project, day or week.
+
+    Sums are split by unit as well, since adding metres to pieces means nothing.
+    """
+
+    FILTERS = {
+        "material_name": lambda val: WarehouseModel.material_name.ilike(f'%{val}%'),
+        "quantity": lambda val: AreaModel.quantity == val,
+        "unit": lambda val: WarehouseModel.unit == val,
+        "serial_number": lambda val: AreaModel.serial_number.ilike(f'%{val}%'),
+        "material_id": lambda val: AreaModel.material_id.ilike(f'%{val}%'),
+        "username": lambda val: AreaModel.username.ilike(f'%{val}%'),
+        "provide_type": lambda val: AreaModel.provide_type.ilike(f'%{val}%'),
+        "project_name": lambda val: ProjectModel.project_name.ilike(f'%{val}%'),
+        "card_number": lambda val: AreaModel.card_number.ilike(f'%{val}%'),
+        "created_at": lambda val: func.date(AreaModel.created_at) == val,
+        "group_id": lambda val: AreaModel.group_id == val,
+        "stock_id": lambda val: AreaModel.stock_id == val,
+        "project_id": lambda val: AreaModel.project_id == val,
+        "category_id": lambda val: WarehouseModel.category_id == val,
+    }
+
+    def __init__(self, db: AsyncSession, user_payload: UserTokenSchema):
+        self.db = db
+        self.user_payload = user_payload
+        self.verifier = ProjectVerify(user_payload=user_payload, model=AreaModel)
+
+    async def report(self, report_data: ConsumptionReportSchema) -> List[ConsumptionReportRowSchema]:
+        project_filter = self.verifier.get_project_filter()
+        # Only the admin's reports may be shared by the project they ask for
+        if self.verifier.is_admin():
+            project_id = report_data.filter_data.project_id
+        else:
+            project_id = self.user_payload.get('project_id')
+
+        cache_key = (
+            project_id,
+            report_data.group_by,
+            report_data.date_from,
+            report_data.date_to,
+            report_data.filter_data.model_dump_json(exclude_none=True),
+        )
+        cached = report_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        try:
+            result = await self.db.execute(self._build_query(report_data, project_filter))
+            rows = [
+                ConsumptionReportRowSchema(key=row.key, label=row.label or str(row.key), unit=row.unit,
+                                           quantity=row.quantity, lines=row.lines)
+                for row in result
+            ]
+        except SQLAlchemyError as ex:
+            logger.exception(f"Database operation failed {ex}")
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid report data")
+
+        report_cache.set(cache_key, rows)
+        return rows
+
+    def _build_query(self, report_data: ConsumptionReportSchema, project_filter):
+        filters = [
+            self.FILTERS[field](value)
+            for field, value in report_data.filter_data.__dict__.items()
+            if value is not None and field in self.FILTERS
+        ]
+        if project_filter is not True:
+            filters.append(project_filter)
+        if report_data.date_from:
+            filters.append(AreaModel.created_at >= report_data.date_from)
+        if report_data.date_to:
+            filters.append(AreaModel.created_at < report_data.date_to + timedelta(days=1))
+
+        stmt = (
+            select()
+            .select_from(AreaModel)
+            .join(StockModel, StockModel.id == AreaModel.stock_id)
+            .join(WarehouseModel, WarehouseModel.id == StockModel.warehouse_id)
+        )
+        if report_data.filter_data.project_name is not None or report_data.group_by == 'project':
+            stmt = stmt.join(ProjectModel, ProjectModel.id == AreaModel.project_id)
+
+        if report_data.group_by == 'group':
+            stmt = stmt.join(GroupModel, GroupModel.id == AreaModel.group_id)
+            key, label = AreaModel.group_id, GroupModel.group_name
+        elif report_data.group_by == 'category':
+            stmt = stmt.join(MaterialCategoryModel, MaterialCategoryModel.id == WarehouseModel.category_id)
+            key, label = WarehouseModel.category_id, MaterialCategoryModel.category_name
+        elif report_data.group_by == 'project':
+            key, label = AreaModel.project_id, ProjectModel.project_name
+        else:
+            # Inlined rather than bound: the SELECT and GROUP BY expressions must match exactly
+            key = cast(func.date_trunc(literal_column(f"'{report_data.group_by}'"), AreaModel.created_at), Date)
+            label = null()
+
+        return (
+            stmt.add_columns(
+                key.label('key'),
+                label.label('label'),
+                WarehouseModel.unit.label('unit'),
+                func.sum(AreaModel.quantity).label('quantity'),
+                func.count().label('lines'),
+            )
+            .where(*filters)
+            .group_by(key, label, WarehouseModel.unit)
+            .order_by(key, WarehouseModel.unit)
+        )
+
+
+class DailyRollupFetchRepository:
+
+    def __init__(self, db: AsyncSession, payload: UserTokenSchema):
+        self.db = db
+        self.verifier = ProjectVerify(user_payload=payload, model=InventoryDailyRollupModel)
+
+    async def fetch(self,
+                    date_from: date,
+                    date_to: date,
+                    project_id: int | None = None,
+                    material_code_id: int | None = None) -> List[DailyRollupResponseSchema]:
+        R = InventoryDailyRollupModel
+
+        if date_from > date_to:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="date_from must not be after date_to")
+
+        filters = [R.day >= date_from, R.day <= date_to]
+
+        project_filter = self.verifier.get_project_filter()
+        if project_filter is not True:
+            filters.append(project_filter)
+        if self.verifier.is_admin() and project_id is not None:
+            filters.append(R.project_id == project_id)
+
+        if material_code_id is not None:
+            filters.append(R.material_code_id == material_code_id)
+
+        try:
+            result = await self.db.execute(
+                select(R).where(*filters).order_by(R.day, R.project_id, R.material_code_id)
+            )
+            return [DailyRollupResponseSchema.model_validate(row) for row in result.scalars().all()]
+        except SQLAlchemyError as ex:
+            logger.exception(f"Database operation failed {ex}")
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid rollup data")
@@ -1,26 +1,34 @@
 
+from collections import defaultdict
 from typing import List, Tuple
 
 from fastapi import HTTPException, status
-from sqlalchemy.dialects import postgresql
 
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import update, select, insert, func
+from sqlalchemy import update, select, insert, Integer, Float
 from sqlalchemy.orm import joinedload, aliased
 
 from src.schemas.stock_schema import StockFilterSchema
-from src.schemas.stock_schema import StockReturnToWarehouseSchema
+from src.schemas.stock_schema import StockReturnToWarehouseSchema, StockReturnToWarehouseBatchSchema
+from src.database.bulk import unnest_rows, any_of, fetch_by_ids
+from src.database.filter_query import FilterQuery, contains, equals, on_date
+from src.database import row_security
+from src.database.transaction import run_transaction, lock_rows, apply_deltas
 from src.dependencies.verify_project import ProjectVerify
+from src.models.archive_models import StockArchiveModel
 from src.models.common_models import CompanyModel, ProjectModel
 from src.models.ordered_model import OrderedModel
 from src.models.stock_models import StockModel
 from src.models.warehouse_model import WarehouseModel, MaterialCategoryModel, MaterialCodeModel
 from src.models.logging_models import LogStockMovementModel
+from src.repositories.change_feed_repository import ChangeFeedRepository
+from src.repositories.inventory_repository import InventoryMovementRecorder
 from src.schemas.stock_schema import StockAddSchema, StockListRequest, StockStandardFetchResponse
 
 from src.logging_config import setup_logger
 from src.schemas.user_schemas import UserTokenSchema
+from src.utils.etag import make_etag
 
 logger = setup_logger(__name__, 'stock.log')
 
@@ -65,6 +73,16 @@ class StockStandardResponse:
 
 class StockFetchQuery:
 
+    @staticmethod
+    def warehouse_options(relationship):
+        return joinedload(relationship).options(
+            joinedload(WarehouseModel.ordered).load_only(OrderedModel.f_name, OrderedModel.m_name, OrderedModel.l_name),
+            joinedload(WarehouseModel.category).load_only(MaterialCategoryModel.category_name),
+            joinedload(WarehouseModel.company).load_only(CompanyModel.company_name),
+            joinedload(WarehouseModel.material_code).load_only(MaterialCodeModel.description),
+            joinedload(WarehouseModel.project).load_only(ProjectModel.project_name),
+        )
+
     @staticmethod
     async def fetch_query(session: AsyncSession, limit: int, *where_clauses):
         filters = [ i for i in where_clauses if i is not None and i is not True ]
@@ -73,15 +91,19 @@ class StockFetchQuery:
 
         stmt = stmt.where(*filters)
 
-        stmt = stmt.limit(limit).options(
-            joinedload(StockModel.warehouses)
-            .options(
-                joinedload(WarehouseModel.ordered).load_only(OrderedModel.f_name, OrderedModel.m_name, OrderedModel.l_name),
-                joinedload(WarehouseModel.category).load_only(MaterialCategoryModel.category_name),
-                joinedload(WarehouseModel.company).load_only(CompanyModel.company_name),
-                joinedload(WarehouseModel.material_code).load_only(MaterialCodeModel.description),
-                joinedload(WarehouseModel.project).load_only(ProjectModel.project_name),
-            )
+        stmt = stmt.limit(limit).options(StockFetchQuery.warehouse_options(StockModel.warehouses))
+
+        return await session.execute(stmt)
+
+    @staticmethod
+    async def fetch_archived_query(session: AsyncSession, limit: int, *where_clauses):
+        filters = [ i for i in where_clauses if i is not None and i is not True ]
+
+        stmt = (
+            select(StockArchiveModel)
+            .where(*filters)
+            .limit(limit)
+            .options(StockFetchQuery.warehouse_options(StockArchiveModel.warehouses))
         )
 
         return await session.execute(stmt)
@@ -94,25 +116,36 @@ class StockAddRepository:
         self.stock_data: List[StockAddSchema] = stock_data.stock_data_list
         self.project_id:int = stock_data.project_id
         self.user_id: int = user_id
+        self.recorder = InventoryMovementRecorder(db, user_id)
 
     async def add_stock_list(self) -> dict[str, str]:
         try:
 
             self.check_project()
 
-            async with self.db.begin_nested() if self.db.in_transaction() else self.db.begin():
-                warehouse_update_list, ready_stock_data = await self._check_quantity()
-                await self._update_model(warehouse_update_list, ready_stock_data)
-                return {"detail": "New Stock successfully created"}
+            return await run_transaction(self.db, self._add_stock_list, 'stock.add')
 
         except ValueError as ex:
             logger.error(f'{ex}')
             raise HTTPException(status_code=400, detail=str(ex))
 
-        except Exception as ex:
-            logger.error(f'{ex}')
+        except HTTPException as ex:
             raise ex
 
+        except SQLAlchemyError as ex:
+            logger.exception(f"Database error during stock update {ex}")
+            raise HTTPException(500, "Failed to update inventory")
+
+        except Exception as ex:
+            logger.exception(f"Unexpected error {ex}")
+            raise HTTPException(500, "Internal Server Error")
+
+    async def _add_stock_list(self) -> dict[str, str]:
+        self.recorder.reset()
+        warehouses = await self._check_quantity()
+        await self._update_model(warehouses)
+        return {"detail": "New Stock successfully created"}
+
     def check_project(self):
         if len(self.stock_data):
             first_project_id: int = self.stock_data[0].project_id
@@ -124,61 +157,66 @@ class StockAddRepository:
         else:
             raise ValueError("Please add item for operation")
 
-    async def _check_quantity(self) -> Tuple[List[dict], List[StockModel]]:
+    async def _check_quantity(self) -> dict:
         row: int = 0
-        warehouse_data = []
-        stock_data = []
+        totals = defaultdict(float)
+
         for i in self.stock_data:
             row += 1
             if i.quantity <= 0:
                 raise ValueError(f'In {row} Entering quantity Cant be negative or 0')
+            totals[i.warehouse_id] += i.quantity
 
-            w_data = await self.db.get(
-                WarehouseModel,
-                i.warehouse_id,
-                with_for_update=True
-            )
+        # Deduct and check in one statement; only a failed deduction pays for the lookup below
+        warehouses = await apply_deltas(
+            self.db, WarehouseModel.left_over, {w_id: -qty for w_id, qty in totals.items()},
+            returning=(WarehouseModel.project_id,)
+        )
+        if len(warehouses) != len(totals):
+            await self._raise_shortage(totals, warehouses)
+
+        return warehouses
+
+    async def _raise_shortage(self, totals: dict[int, float], deducted: dict) -> None:
+        result = await self.db.execute(
+            select(WarehouseModel.id, WarehouseModel.left_over)
+            .where(WarehouseModel.id.in_(totals))
+        )
+        # Rows the guarded update did reach already show their deducted value
+        left_overs = {i.id: i.left_over + (totals[i.id] if i.id in deducted else 0) for i in result}
 
-            if not w_data:
+        for row, i in enumerate(self.stock_data, start=1):
+            if i.warehouse_id not in left_overs:
                 raise ValueError(f"Row {row}: Warehouse not found")
-            if w_data.left_over < i.quantity:
+            if left_overs[i.warehouse_id] < i.quantity:
                 raise ValueError(
-                    f"Row {row}: Not enough stock (has {w_data.left_over}, need {i.quantity})"
+                    f"Row {row}: Not enough stock (has {left_overs[i.warehouse_id]}, need {i.quantity})"
                 )
-            else:
-                warehouse_data.append({
-                    "id": w_data.id,
-                    "left_over": i.quantity
-                })
-                stock_data.append(StockModel(
-                    **StockAddSchema.model_dump(i),
-                    left_over = i.quantity,
-                    created_by_id = self.user_id,
-                ))
-        return warehouse_data, stock_data
-
-    async def _update_model(self, warehouse_data: List[dict], stock_data: List[StockModel] ) -> None:
+            left_overs[i.warehouse_id] -= i.quantity
 
-        try:
+        raise ValueError("Not enough stock")
 
-            [
-                await self.db.execute(
-                    update(WarehouseModel)
-                    .where(WarehouseModel.id == i['id'])
-                    .values(left_over=WarehouseModel.left_over - i['left_over'])
-                )
-                for i in warehouse_data
-            ]
+    async def _update_model(self, warehouses: dict) -> None:
 
-            self.db.add_all(stock_data)
-            await self.db.commit()
+        stock_data = [
+            StockModel(
+                **StockAddSchema.model_dump(i),
+                left_over = i.quantity,
+                created_by_id = self.user_id,
+            )
+            for i in self.stock_data
+        ]
 
-        except SQLAlchemyError as ex:
-            logger.exception(f"Database error during stock update {ex}")
-            raise HTTPException(500, "Failed to update inventory")
-        except Exception as ex:
-            logger.exception(f"Unexpected error {ex}")
-            raise HTTPException(500, "Internal Server Error")
+        self.db.add_all(stock_data)
+        await self.db.flush()
+
+        for s_item in stock_data:
+            warehouse = warehouses[s_item.warehouse_id]
+            self.recorder.record('warehouse', warehouse.id, warehouse.project_id, warehouse.id,
+                                 -s_item.left_over, 'issue to stock')
+            self.recorder.record('stock', s_item.id, s_item.project_id, warehouse.id,
+                                 s_item.left_over, 'issue to stock')
+        await self.recorder.flush()
 
 
 class StockReturnToWarehouseRepository:
@@ -187,6 +225,7 @@ class StockReturnToWarehouseRepository:
         self.db = db
         self.return_data = return_data
         self.user_id = user_id
+        self.recorder = InventoryMovementRecorder(db, user_id)
 
     async def return_to_warehouse(self) -> dict[str, str]:
         return_qty = self.return_data.quantity
@@ -199,94 +238,219 @@ class StockReturnToWarehouseRepository:
             )
 
         try:
-            # Lock both rows to prevent concurrent updates
-            result = await self.db.execute(
-                select(StockModel)
-                .where(StockModel.id == self.return_data.id)
-                .with_for_update()
+            return await run_transaction(self.db, self._return_to_warehouse, 'stock.return_to_warehouse')
+
+        except HTTPException as ex:
+            raise ex
+
+        except SQLAlchemyError as ex:
+            await self.db.rollback()
+            logger.exception("Database error during warehouse return")
+            raise HTTPException(status_code=500, detail="Failed to return to warehouse") from ex
+
+        except Exception as ex:
+            await self.db.rollback()
+            logger.exception("Unexpected error during warehouse return")
+            raise HTTPException(status_code=500, detail="Internal Server Error") from ex
+
+    async def _return_to_warehouse(self) -> dict[str, str]:
+        return_qty = self.return_data.quantity
+        self.recorder.reset()
+
+        # Guarded updates, warehouse first to keep the global lock order; a failed
+        # stock deduction rolls the warehouse credit back with the transaction
+        warehouses = await apply_deltas(
+            self.db, WarehouseModel.left_over, {self.return_data.warehouse_id: return_qty},
+            returning=(WarehouseModel.project_id,)
+        )
+        warehouse = warehouses.get(self.return_data.warehouse_id)
+
+        if not warehouse:
+            logger.error(f"Warehouse {self.return_data.warehouse_id} not found.")
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Warehouse not found."
             )
-            stock = result.scalars().first()
 
-            if not stock:
+        stocks = await apply_deltas(
+            self.db, StockModel.left_over, {self.return_data.id: -return_qty},
+            returning=(StockModel.quantity, StockModel.left_over, StockModel.project_id, StockModel.warehouse_id),
+            also=(StockModel.quantity,)
+        )
+        stock = stocks.get(self.return_data.id)
+
+        if not stock:
+            left_over = await self.db.scalar(select(StockModel.left_over).where(StockModel.id == self.return_data.id))
+            if left_over is None:
                 logger.error(f"Stock {self.return_data.id} not found.")
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail="Stock not found."
                 )
 
-            if return_qty > stock.left_over:
-                logger.error(f"Requested return ({return_qty}) exceeds available left_over ({stock.left_over})")
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Cannot return more than available left_over stock."
-                )
-
-            result = await self.db.execute(
-                select(WarehouseModel)
-                .where(WarehouseModel.id == self.return_data.warehouse_id)
-                .with_for_update()
+            logger.error(f"Requested return ({return_qty}) exceeds available left_over ({left_over})")
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cannot return more than available left_over stock."
             )
-            warehouse = result.scalars().first()
 
-            if not warehouse:
-                logger.error(f"Warehouse {self.return_data.warehouse_id} not found.")
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Warehouse not found."
-                )
+        # Create a new stock
+        await self.insert_stock_movement_log(
+            stock_id=stock.id,
+            old_quantity=stock.quantity + return_qty,
+            old_left_over=stock.left_over + return_qty,
+        )
+
+        self.recorder.record('stock', stock.id, stock.project_id, stock.warehouse_id,
+                             -return_qty, 'return to warehouse')
+        self.recorder.record('warehouse', warehouse.id, warehouse.project_id, warehouse.id,
+                             return_qty, 'return to warehouse')
+        await self.recorder.flush()
 
-            # Create a new stock
-            await self.insert_stock_movement_log(finded_data=stock)
+        return {"detail": "Successfully Returned"}
 
-            # Perform updates
+    async def insert_stock_movement_log(self, stock_id: int, old_quantity: float, old_left_over: float):
+        try:
             await self.db.execute(
-                update(StockModel)
-                .where(StockModel.id == self.return_data.id)
-                .values(
-                    left_over=StockModel.left_over - return_qty,
-                    quantity=StockModel.quantity - return_qty
+                insert(LogStockMovementModel).values(
+                    movement_type = 'return to warehouse',
+                    old_quantity = old_quantity,
+                    old_left_over = old_left_over,
+                    return_quantity = self.return_data.quantity,
+                    new_left_over = old_left_over - self.return_data.quantity,
+                    stock_id = stock_id,
+                    warehouse_id = self.return_data.warehouse_id,
+                    created_by_id = self.user_id
                 )
             )
+        except Exception as ex:
+            logger.error(f'Stock log error : {ex}')
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f'Can insert stock log {ex}')
 
-            await self.db.execute(
-                update(WarehouseModel)
-                .where(WarehouseModel.id == self.return_data.warehouse_id)
-                .values(left_over=WarehouseModel.left_over + return_qty)
-            )
 
-            await self.db.commit()
-            return {"detail": "Successfully Returned"}
+class StockReturnToWarehouseBatchRepository:
+
+    def __init__(self, db: AsyncSession, return_data: StockReturnToWarehouseBatchSchema, user_id: int):
+        self.db = db
+        self.return_data: List[StockReturnToWarehouseSchema] = return_data.return_data_list
+        self.user_id = user_id
+        self.recorder = InventoryMovementRecorder(db, user_id)
+
+    async def return_to_warehouse(self) -> dict[str, str]:
+        if not self.return_data:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Please add item for operation")
+
+        try:
+            return await run_transaction(self.db, self._return_to_warehouse, 'stock.return_to_warehouse_batch')
 
         except HTTPException as ex:
             raise ex
 
         except SQLAlchemyError as ex:
             await self.db.rollback()
-            logger.exception("Database error during warehouse return")
+            logger.exception("Database error during batch warehouse return")
             raise HTTPException(status_code=500, detail="Failed to return to warehouse") from ex
 
         except Exception as ex:
             await self.db.rollback()
-            logger.exception("Unexpected error during warehouse return")
+            logger.exception("Unexpected error during batch warehouse return")
             raise HTTPException(status_code=500, detail="Internal Server Error") from ex
 
-    async def insert_stock_movement_log(self, finded_data: StockModel):
-        try:
-            await self.db.execute(
-                insert(LogStockMovementModel).values(
-                    movement_type = 'return to warehouse',
-                    old_quantity = finded_data.quantity,
-                    old_left_over = finded_data.left_over,
-                    return_quantity = self.return_data.quantity,
-                    new_left_over = finded_data.left_over - self.return_data.quantity,
-                    stock_id = finded_data.id,
-                    warehouse_id = self.return_data.warehouse_id,
-                    created_by_id = self.user_id
-                )
+    async def _return_to_warehouse(self) -> dict[str, str]:
+        self.recorder.reset()
+        stocks, warehouses = await self._lock_rows()
+        logs = self._check_lines(stocks, warehouses)
+        await self._update_model(logs)
+        return {"detail": f"{len(self.return_data)} items successfully returned"}
+
+    async def _lock_rows(self) -> Tuple[dict, dict]:
+        # One sorted statement per table, so concurrent batches always lock rows in the same order
+        warehouses = await lock_rows(
+            self.db, WarehouseModel, {i.warehouse_id for i in self.return_data},
+            columns=(WarehouseModel.id, WarehouseModel.project_id)
+        )
+        stocks = await lock_rows(
+            self.db, StockModel, {i.id for i in self.return_data},
+            columns=(StockModel.id, StockModel.quantity, StockModel.left_over,
+                     StockModel.project_id, StockModel.warehouse_id)
+        )
+        return stocks, warehouses
+
+    def _check_lines(self, stocks: dict, warehouses: dict) -> List[dict]:
+        # Lines are applied in request order, exactly as repeated single returns would be
+        quantities = {stock_id: row.quantity for stock_id, row in stocks.items()}
+        left_overs = {stock_id: row.left_over for stock_id, row in stocks.items()}
+
+        errors = []
+        logs = []
+        for idx, item in enumerate(self.return_data, start=1):
+            if item.quantity <= 0:
+                errors.append({"row": idx, "id": item.id, "detail": f"Quantity must be greater than zero. Got: {item.quantity}"})
+                continue
+            if item.id not in stocks:
+                errors.append({"row": idx, "id": item.id, "detail": "Stock not found."})
+                continue
+            if item.quantity > left_overs[item.id]:
+                errors.append({"row": idx, "id": item.id, "detail": "Cannot return more than available left_over stock."})
+                continue
+            if item.warehouse_id not in warehouses:
+                errors.append({"row": idx, "id": item.id, "detail": "Warehouse not found."})
+                continue
+
+            logs.append({
+                "movement_type": 'return to warehouse',
+                "old_quantity": quantities[item.id],
+                "old_left_over": left_overs[item.id],
+                "return_quantity": item.quantity,
+                "new_left_over": left_overs[item.id] - item.quantity,
+                "stock_id": item.id,
+                "warehouse_id": item.warehouse_id,
+                "created_by_id": self.user_id,
+            })
+            quantities[item.id] -= item.quantity
+            left_overs[item.id] -= item.quantity
+
+            stock = stocks[item.id]
+            warehouse = warehouses[item.warehouse_id]
+            self.recorder.record('stock', stock.id, stock.project_id, stock.warehouse_id,
+                                 -item.quantity, 'return to warehouse')
+            self.recorder.record('warehouse', warehouse.id, warehouse.project_id, warehouse.id,
+                                 item.quantity, 'return to warehouse')
+
+        if errors:
+            logger.error(f"Batch return to warehouse rejected: {errors}")
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=errors)
+
+        return logs
+
+    async def _update_model(self, logs: List[dict]) -> None:
+        stock_totals = defaultdict(float)
+        warehouse_totals = defaultdict(float)
+        for item in self.return_data:
+            stock_totals[item.id] += item.quantity
+            warehouse_totals[item.warehouse_id] += item.quantity
+
+        returns = unnest_rows('returns', {'id': Integer(), 'quantity': Float()}, sorted(stock_totals.items()))
+        await self.db.execute(
+            update(StockModel)
+            .where(StockModel.id == returns.c.id)
+            .values(
+                left_over=StockModel.left_over - returns.c.quantity,
+                quantity=StockModel.quantity - returns.c.quantity
             )
-        except Exception as ex:
-            logger.error(f'Stock log error : {ex}')
-            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f'Can insert stock log {ex}')
+            .execution_options(synchronize_session=False)
+        )
+
+        returns = unnest_rows('returns', {'id': Integer(), 'quantity': Float()}, sorted(warehouse_totals.items()))
+        await self.db.execute(
+            update(WarehouseModel)
+            .where(WarehouseModel.id == returns.c.id)
+            .values(left_over=WarehouseModel.left_over + returns.c.quantity)
+            .execution_options(synchronize_session=False)
+        )
+
+        await self.db.execute(insert(LogStockMovementModel), logs)
+        await self.recorder.flush()
 
 
 class StockFetchRepository:
@@ -334,18 +498,10 @@ class StockFetchSelectedByIDSRepository:
     async def fetch_selected_ids(self) -> List[StockStandardFetchResponse]:
 
         try:
+            return await fetch_by_ids(self.db, self.ids, self._fetch_chunk)
 
-            project_verify = self.verifier.get_project_filter()
-
-            filters = []
-            if project_verify is not True:
-                filters.append(project_verify)
-            filters.append(StockModel.id.in_(self.ids))
-            result = await StockFetchQuery.fetch_query(self.db, len(self.ids), *filters)
-            stocks = result.unique().scalars().all()
-
-            return StockStandardResponse.format_response(list(stocks))
-
+        except HTTPException as ex:
+            raise ex
         except SQLAlchemyError as ex:
             logger.exception(f"Database operation failed {ex}")
             raise HTTPException(
@@ -357,6 +513,17 @@ class StockFetchSelectedByIDSRepository:
             logger.error(f"Fetch stock list error : {ex}")
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Fetch stock list error")
 
+    async def _fetch_chunk(self, session: AsyncSession, ids: list[int]) -> List[StockStandardFetchResponse]:
+        project_verify = self.verifier.get_project_filter()
+
+        filters = []
+        if project_verify is not True:
+            filters.append(project_verify)
+        filters.append(any_of(StockModel.id, ids))
+        result = await StockFetchQuery.fetch_query(session, len(ids), *filters)
+
+        return StockStandardResponse.format_response(list(result.unique().scalars().all()))
+
 
 class StockGetByIdRepository:
 
@@ -364,6 +531,20 @@ class StockGetByIdRepository:
         self.db = db
         self.item_id = item_id
         self.verifier = ProjectVerify(user_payload=user_payload, model=StockModel)
+        self.archive_verifier = ProjectVerify(user_payload=user_payload, model=StockArchiveModel)
+
+    async def etag(self) -> str | None:
+        """ETag of the row and its warehouse from one primary key lookup; None if it isn't visible."""
+        for model, verifier in ((StockModel, self.verifier), (StockArchiveModel, self.archive_verifier)):
+            result = await self.db.execute(
+                select(model.updated_at, WarehouseModel.updated_at)
+                .join(WarehouseModel, WarehouseModel.id == model.warehouse_id)
+                .where(model.id == self.item_id, verifier.get_project_filter())
+            )
+            row = result.first()
+            if row:
+                return make_etag(*row)
+        return None
 
     async def get_by_id(self) -> StockStandardFetchResponse:
         try:
@@ -391,6 +572,13 @@ class StockGetByIdRepository:
 
         stock = result.scalars().first()
 
+        if not stock:
+            # Fully consumed rows are moved to the archive by ConsumedArchiveRepository
+            result = await StockFetchQuery.fetch_archived_query(
+                self.db, 1, self.archive_verifier.get_project_filter(), StockArchiveModel.id == self.item_id
+            )
+            stock = result.scalars().first()
+
         if stock:
             temp = [stock]
             return StockStandardResponse.format_response(temp)[0]
@@ -398,8 +586,49 @@ class StockGetByIdRepository:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Stock id not available")
 
 
+class StockChangesRepository(ChangeFeedRepository):
+
+    model = StockModel
+    resource = 'stock'
+
+    async def fetch(self, ids: list[int]) -> List[StockStandardFetchResponse]:
+        result = await StockFetchQuery.fetch_query(self.db, len(ids), any_of(StockModel.id, ids))
+        return StockStandardResponse.format_response(list(result.unique().scalars().all()))
+
+
+def _filter_base(model):
+    return (
+        select(model)
+        .join(WarehouseModel, model.warehouse_id == WarehouseModel.id, isouter=True)
+        .options(StockFetchQuery.warehouse_options(model.warehouses))
+    )
+
+
+def _filter_fields(model):
+    return {
+        "material_name": contains(WarehouseModel.material_name),
+        "quantity": equals(model.quantity),
+        "unit": contains(WarehouseModel.unit),
+        "price": equals(WarehouseModel.price),
+        "currency": equals(WarehouseModel.currency),
+        "category_id": equals(WarehouseModel.category_id),
+        "po_num": contains(WarehouseModel.po_num),
+        "doc_num": contains(WarehouseModel.doc_num),
+        "material_code_id": equals(WarehouseModel.material_code_id),
+        "project_id": equals(model.project_id),
+        "ordered_id": equals(WarehouseModel.ordered_id),
+        "company_id": equals(WarehouseModel.company_id),
+        "created_at": on_date(model.created_at),
+        "serial_number": equals(model.serial_number),
+        "material_id": equals(model.material_id),
+        "scope_project_id": equals(model.project_id),
+    }
+
+
 class StockFilterRepository:
 
+    query = FilterQuery(_filter_base, _filter_fields)
+
     def __init__(self, db: AsyncSession, filter_data: StockFilterSchema, user_payload: UserTokenSchema):
         self.db = db
         self.filter_data = filter_data
@@ -409,69 +638,30 @@ class StockFilterRepository:
     async def filter(self):
 
         try:
-            data = await self.db.execute(self._build_query())
-            temp = data.scalars().all()
-            result = StockStandardResponse.format_response(list(temp))
+            data = await self.db.execute(*self._build_query(StockModel))
+            temp = list(data.scalars().all())
+            if self.filter_data.include_archived:
+                data = await self.db.execute(*self._build_query(StockArchiveModel))
+                temp.extend(data.scalars().all())
+            result = StockStandardResponse.format_response(temp)
             return result
 
         except Exception as ex:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"{ex}")
 
-    def _build_query(self):
-        ALLOWED_FIELDS = {
-            "material_name": lambda val: WarehouseModel.material_name.ilike(f'%{val}%'),
-            "quantity": lambda val: StockModel.quantity == val,
-            "unit": lambda val: WarehouseModel.unit.ilike(f'%{val}%'),
-            "price": lambda val: WarehouseModel.price == val,
-            "currency": lambda val: WarehouseModel.currency == val,
-            "category_id": lambda val: WarehouseModel.category_id == val,
-            "po_num": lambda val: WarehouseModel.po_num.ilike(f'%{val}%'),
-            "doc_num": lambda val: WarehouseModel.doc_num.ilike(f'%{val}%'),
-            "material_code_id": lambda val: WarehouseModel.material_code_id == val,
-            "project_id": lambda val: StockModel.project_id == val,
-            "ordered_id": lambda val: StockModel.warehouses.ordered_id == val,
-            "company_id": lambda val: WarehouseModel.company_id == val,
-            "created_at": lambda val: func.date(StockModel.created_at) == val,
-            "serial_number": lambda val: StockModel.serial_number == val,
-            "material_id": lambda val: StockModel.material_id == val,
-        }
-
-        filters = []
-
-        for field, value in self.filter_data.filter_data.__dict__.items():
-            if value is not None and field in ALLOWED_FIELDS:
-                condition = ALLOWED_FIELDS[field](value)
-                filters.append(condition)
+    def _build_query(self, model):
+        values = dict(self.filter_data.filter_data.__dict__)
+        values['scope_project_id'] = self._verify_project(model)
+        return self.query.build(model, values)
 
-        project = self._verify_project()
-        if project is not None:
-            filters.append(project)
-
-        stmt = (
-            select(StockModel)
-            .join(WarehouseModel, StockModel.warehouse_id == WarehouseModel.id, isouter=True)
-            .where(*filters)
-            .options(
-                joinedload(StockModel.warehouses).options(
-                    joinedload(WarehouseModel.ordered).load_only(OrderedModel.f_name, OrderedModel.m_name,
-                                                                 OrderedModel.l_name),
-                    joinedload(WarehouseModel.category).load_only(MaterialCategoryModel.category_name),
-                    joinedload(WarehouseModel.company).load_only(CompanyModel.company_name),
-                    joinedload(WarehouseModel.material_code).load_only(MaterialCodeModel.description),
-                    joinedload(WarehouseModel.project).load_only(ProjectModel.project_name)
-                ),
-            )
-        )
-
-        return stmt
-
-    def _verify_project(self):
+    def _verify_project(self, model) -> int | None:
         project_id: int = self.user_payload.get('project_id')
         if not project_id:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Project ID required.")
 
         if project_id == 1:
             return None
+        if row_security.filters_project(model.__tablename__):
+            return None
 
-        return StockModel.project_id == project_id
-
+        return project_id
@@ -1,9 +1,10 @@
 
-from typing import Any, Coroutine, Union
+import hashlib
 
 from fastapi import HTTPException
 
-from sqlalchemy import insert, select, delete
+from sqlalchemy import select, delete, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.schemas.user_schemas import UserLoginSchema
@@ -24,52 +25,39 @@ class RefreshTokenRepository:
     def __init__(self, db: AsyncSession):
         self.db = db
 
-    async def manage_refresh_token(self, user_id:int, refresh_token) -> None:
+    @staticmethod
+    def hash_token(refresh_token: str) -> str:
+        return hashlib.sha256(refresh_token.encode()).hexdigest()
+
+    async def manage_refresh_token(self, user_id:int, refresh_token: str) -> None:
 
         try:
-            token = await self.find_refresh_token(user_id)
-            if token:
-                await self.delete_refresh_token(user_id)
-            await self.save_refresh_token(user_id, refresh_token)
+            stmt = insert(TokenModel).values(user_id=user_id, token_hash=self.hash_token(refresh_token))
+            await self.db.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=['user_id'],
+                    set_={'token_hash': stmt.excluded.token_hash},
+                )
+            )
+            await self.db.commit()
         except Exception as ex:
+            await self.db.rollback()
             logger.error(f'For {user_id}, manage refresh token error {ex}')
             raise HTTPException(status_code=404, detail=f'Manage refresh token error ')
 
-    async def find_refresh_token(self, user_id: int) -> Union[TokenModel, None]:
-        try:
-            token = await self.db.execute(select(TokenModel).where(TokenModel.user_id == user_id))
-            data = token.scalar()
-            if data:
-                return data
-            else:
-                return None
-        except Exception as ex:
-            logger.error(f'For {user_id}, refresh token not found {ex}')
-            raise HTTPException(status_code=404, detail=f"Refresh token not found")
-
-    async def delete_refresh_token(self, user_id: int) -> None:
-        try:
+    async def rotate_refresh_token(self, user_id: int, old_token: str, new_token: str) -> bool:
+        """Swap the stored hash only if it still matches old_token, in one statement."""
+        rotated = await self.db.scalar(
+            update(TokenModel)
+            .where(TokenModel.user_id == user_id, TokenModel.token_hash == self.hash_token(old_token))
+            .values(token_hash=self.hash_token(new_token))
+            .returning(TokenModel.id)
+        )
+        if rotated is None:
+            # A superseded token was replayed: revoke the current one too, forcing a new login
             await self.db.execute(delete(TokenModel).where(TokenModel.user_id == user_id))
-        except Exception as ex:
-            logger.error(f'For {user_id},  not found in token model {ex}')
-            raise HTTPException(status_code=404, detail=f'User id not found ')
-
-    async def save_refresh_token(self,user_id: int, refresh_token: str) -> Coroutine[Any, Any, None]:
-        try:
-            if refresh_token:
-                data = await self.db.execute(insert(TokenModel).values(
-                    user_id = user_id,
-                    tokens = refresh_token
-                ))
-                await self.db.commit()
-                data = self.db.refresh(data)
-                return data
-            else:
-                logger.error(f'For {user_id}, Refresh token can\'t find ')
-                raise ValueError("Refresh token can't find")
-        except Exception as ex:
-            logger.error(f'For {user_id}, Refresh token can\'t save ')
-            raise HTTPException(status_code=404, detail=f'Refresh Token can\'t save {str(ex)}')
+        await self.db.commit()
+        return rotated is not None
 
 
 class CheckUserAvailable:
@@ -142,6 +130,37 @@ class UserLoginRepository:
         }
 
 
+class UserRefreshRepository:
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.refresh_token_repo = RefreshTokenRepository(self.db)
+
+    async def refresh(self, refresh_token: str | None) -> dict:
+        payload = TokenHandler.verify_refresh_token(refresh_token)
+
+        try:
+            user_id = int(payload.get('sub'))
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=401, detail='Authorization Error')
+
+        user = await self.db.get(UserModel, user_id)
+        if not user:
+            logger.error(f'Refresh token of missing user {user_id}')
+            raise HTTPException(status_code=401, detail='Authorization Error')
+
+        # Rebuilt from the user row, so a changed project is picked up on refresh
+        token_data = {
+            'sub': str(user.id),
+            'email': user.email,
+            'project_id': user.project_id
+        }
 
+        access_token = TokenHandler.generate_access_token(token_data)
+        new_refresh_token = TokenHandler.generate_refresh_token(token_data)
 
+        if not await self.refresh_token_repo.rotate_refresh_token(user.id, refresh_token, new_refresh_token):
+            logger.warning(f'For {user.id}, refresh token was already used or revoked')
+            raise HTTPException(status_code=401, detail='Refresh token is no longer valid')
 
+        return UserLoginRepository.return_data(user, access_token, new_refresh_token)
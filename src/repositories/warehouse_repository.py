@@ -1,13 +1,14 @@
 from fastapi import HTTPException, status
 
-from sqlalchemy.dialects import postgresql
-
-from sqlalchemy import select, update, insert, text, func
+from sqlalchemy import select, update, insert, text
 from sqlalchemy.orm import joinedload
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
-from watchfiles import awatch
 
+from src.database import row_security
+from src.database.bulk import any_of, fetch_by_ids
+from src.database.filter_query import FilterQuery, contains, equals, on_date
+from src.database.transaction import run_transaction, lock_rows
 from src.schemas.warehouse_schema import WarehouseUpdateSchema
 from src.dependencies.verify_project import ProjectVerify
 from src.models import ProjectModel
@@ -16,7 +17,10 @@ from src.models.ordered_model import OrderedModel
 from src.models.warehouse_model import WarehouseModel, MaterialCategoryModel, MaterialCodeModel
 from src.schemas.user_schemas import UserTokenSchema
 from src.models.logging_models import LogUpdateWarehouseQtyModel
+from src.repositories.change_feed_repository import ChangeFeedRepository
+from src.repositories.inventory_repository import InventoryMovementRecorder, StockSummaryRepository
 from src.schemas.warehouse_schema import WarehouseListCreateSchema, WarehouseStandartFetchResponseSchema, WarehouseFilterSchema
+from src.utils.etag import make_etag
 
 from src.logging_config import setup_logger
 logger = setup_logger(__name__, 'warehouse.log')
@@ -97,34 +101,12 @@ class WarehouseCreateRepository:
         self.db = db
         self.warehouse_data = warehouse_data
         self.user_id = user_id
+        self.recorder = InventoryMovementRecorder(db, user_id)
 
     async def create_warehouse_list(self, ) -> dict[str, str]:
 
         try:
-            common_data = {
-                "po_num": self.warehouse_data.po_num,
-                "doc_num": self.warehouse_data.doc_num,
-                "project_id": self.warehouse_data.project_id,
-                "ordered_id": self.warehouse_data.ordered_id,
-                "company_id": self.warehouse_data.company_id
-            }
-
-            records = []
-            for idx, item in enumerate(self.warehouse_data.data_list, start=1):
-                if item.qty <= 0:
-                    raise ValueError(f'In {idx} quantity: {item.qty} is equal or less than 0')
-                else:
-                    temp = WarehouseModel(
-                        created_by_id = self.user_id,
-                        left_over = item.qty,
-                        **item.model_dump(),
-                        **common_data,
-                    )
-                    records.append(temp)
-
-            self.db.add_all(records)
-            await self.db.commit()
-            return {"detail": "New data successfully created"}
+            return await run_transaction(self.db, self._create_warehouse_list, 'warehouse.create')
 
         except SQLAlchemyError as ex:
             logger.exception(f"Database operation failed {ex}")
@@ -142,6 +124,39 @@ class WarehouseCreateRepository:
             logger.error(f"Create warehouse error {ex}")
             raise HTTPException(status_code=400, detail="Create warehouse error ")
 
+    async def _create_warehouse_list(self) -> dict[str, str]:
+        self.recorder.reset()
+        common_data = {
+            "po_num": self.warehouse_data.po_num,
+            "doc_num": self.warehouse_data.doc_num,
+            "project_id": self.warehouse_data.project_id,
+            "ordered_id": self.warehouse_data.ordered_id,
+            "company_id": self.warehouse_data.company_id
+        }
+
+        records = []
+        for idx, item in enumerate(self.warehouse_data.data_list, start=1):
+            if item.qty <= 0:
+                raise ValueError(f'In {idx} quantity: {item.qty} is equal or less than 0')
+            else:
+                temp = WarehouseModel(
+                    created_by_id = self.user_id,
+                    left_over = item.qty,
+                    **item.model_dump(),
+                    **common_data,
+                )
+                records.append(temp)
+
+        self.db.add_all(records)
+        await self.db.flush()
+
+        for record in records:
+            self.recorder.record('warehouse', record.id, record.project_id, record.id,
+                                 record.left_over, 'receipt')
+        await self.recorder.flush()
+
+        return {"detail": "New data successfully created"}
+
 
 class WarehouseUpdateRepository:
 
@@ -149,6 +164,7 @@ class WarehouseUpdateRepository:
         self.db = db
         self.update_data = update_data
         self.user_id = user_id
+        self.recorder = InventoryMovementRecorder(db, user_id)
 
     async def update_warehouse(self) -> dict[str, str]:
 
@@ -160,34 +176,7 @@ class WarehouseUpdateRepository:
             )
 
         try:
-
-            result = await self.db.execute(
-                select(WarehouseModel)
-                .where(WarehouseModel.id == self.update_data.id)
-                .with_for_update()
-            )
-            find_data = result.scalars().first()
-
-            if find_data:
-                self.check_qty(find_data.qty, find_data.left_over, self.update_data.qty)
-
-                temp: dict = self.update_data.__dict__
-
-                if self.update_data.qty != find_data.qty:
-                    temp['left_over'] = self.update_data.qty - (find_data.qty - find_data.left_over)
-                    await self.insert_warehouse_update_log(find_data)
-
-                await self.db.execute(
-                    update(WarehouseModel)
-                    .where(WarehouseModel.id == self.update_data.id)
-                    .values(**temp)
-                )
-                await self.db.commit()
-                return {'detail':'Successfully updated'}
-
-            else:
-                logger.error('Warehouse data not found')
-                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Warehouse not found')
+            return await run_transaction(self.db, self._update_warehouse, 'warehouse.update')
 
         except HTTPException as ex:
             raise
@@ -199,6 +188,54 @@ class WarehouseUpdateRepository:
             raise HTTPException(500, f"Internal Server Error 2 {ex}")
 
 
+    async def _update_warehouse(self) -> dict[str, str]:
+        self.recorder.reset()
+
+        warehouses = await lock_rows(self.db, WarehouseModel, [self.update_data.id])
+        find_data = warehouses.get(self.update_data.id)
+
+        if find_data:
+            self.check_qty(find_data.qty, find_data.left_over, self.update_data.qty)
+
+            temp: dict = dict(self.update_data.__dict__)
+            previous = (find_data.project_id, find_data.material_code_id, find_data.category_id, find_data.left_over)
+
+            if self.update_data.qty != find_data.qty:
+                temp['left_over'] = self.update_data.qty - (find_data.qty - find_data.left_over)
+                await self.insert_warehouse_update_log(find_data)
+
+            await self.db.execute(
+                update(WarehouseModel)
+                .where(WarehouseModel.id == self.update_data.id)
+                .values(**temp)
+            )
+            await self._update_summary(previous, temp.get('left_over', previous[3]))
+            return {'detail':'Successfully updated'}
+
+        else:
+            logger.error('Warehouse data not found')
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Warehouse not found')
+
+    async def _update_summary(self, previous: tuple[int, int, int, float], new_left_over: float) -> None:
+        project_id, material_code_id, category_id, left_over = previous
+        warehouse_id = self.update_data.id
+
+        if project_id != self.update_data.project_id:
+            # The row moves with what is left of it; the daily rollup doesn't count the move,
+            # as its rebuild books a row's whole history to the current project
+            self.recorder.record('warehouse', warehouse_id, project_id, warehouse_id, -left_over, 'move project')
+            self.recorder.record('warehouse', warehouse_id, self.update_data.project_id, warehouse_id,
+                                 left_over, 'move project')
+        self.recorder.record('warehouse', warehouse_id, self.update_data.project_id, warehouse_id,
+                             new_left_over - left_over, 'update qty')
+        await self.recorder.flush()
+
+        old_key = (material_code_id, category_id)
+        new_key = (self.update_data.material_code_id, self.update_data.category_id)
+        if old_key != new_key:
+            # Stock and area rows follow their warehouse row to the new key
+            await StockSummaryRepository(self.db).refresh({old_key, new_key})
+
     def check_qty(self, inventor_qty: float, left_over_qty: float, updated_qty: float):
         print(f'difference is {inventor_qty} {type(left_over_qty)} {updated_qty}')
         if updated_qty < inventor_qty - left_over_qty:
@@ -232,6 +269,14 @@ class WarehouseGetByIdRepository:
         self.item_id = item_id
         self.verifier = ProjectVerify(user_payload=user_payload, model=WarehouseModel)
 
+    async def etag(self) -> str | None:
+        """ETag of the row from one primary key lookup; None if it isn't visible to the user."""
+        updated_at = await self.db.scalar(
+            select(WarehouseModel.updated_at)
+            .where(WarehouseModel.id == self.item_id, self.verifier.get_project_filter())
+        )
+        return make_etag(updated_at) if updated_at else None
+
     async def get_by_id(self) -> WarehouseStandartFetchResponseSchema:
         try:
 
@@ -308,19 +353,10 @@ class WarehouseSelectedByIDSRepository:
     async def fetch_selected_ids(self, ids: list[int]) -> list[WarehouseStandartFetchResponseSchema]:
 
         try:
+            return await fetch_by_ids(self.db, ids, self._fetch_chunk)
 
-            project_filter = self.verifier.get_project_filter()
-
-            filters = []
-            if project_filter is not True and project_filter is not None:
-                filters.append(project_filter)
-            filters.append(WarehouseModel.id.in_(ids))
-
-            result = await WarehouseFetchQuery.fetch_query(self.db, len(ids), *filters)
-            warehouses = result.scalars().all()
-
-            return WarehouseStandardResponse.format_response(list(warehouses))
-
+        except HTTPException as ex:
+            raise ex
         except SQLAlchemyError as ex:
             logger.exception(f"Database operation failed {ex}")
             raise HTTPException(
@@ -331,9 +367,73 @@ class WarehouseSelectedByIDSRepository:
             logger.error(f'Fetch Warehouse By ids error {ex}')
             raise HTTPException(status_code=400, detail=f"Fetch warehouse by ids error {ex}")
 
+    async def _fetch_chunk(self, session: AsyncSession, ids: list[int]) -> list[WarehouseStandartFetchResponseSchema]:
+        project_filter = self.verifier.get_project_filter()
+
+        filters = []
+        if project_filter is not True and project_filter is not None:
+            filters.append(project_filter)
+        filters.append(any_of(WarehouseModel.id, ids))
+
+        result = await WarehouseFetchQuery.fetch_query(session, len(ids), *filters)
+        return WarehouseStandardResponse.format_response(list(result.scalars().all()))
+
+
+class WarehouseChangesRepository(ChangeFeedRepository):
+
+    model = WarehouseModel
+    resource = 'warehouse'
+
+    async def fetch(self, ids: list[int]) -> list[WarehouseStandartFetchResponseSchema]:
+        result = await WarehouseFetchQuery.fetch_query(self.db, len(ids), any_of(WarehouseModel.id, ids))
+        return WarehouseStandardResponse.format_response(list(result.scalars().all()))
+
+
+def _filter_base(model):
+    return select(model).options(
+        joinedload(model.ordered).load_only(
+            OrderedModel.f_name,
+            OrderedModel.m_name,
+            OrderedModel.l_name
+        ),
+        joinedload(model.category).load_only(
+            MaterialCategoryModel.category_name
+        ),
+        joinedload(model.project).load_only(
+            ProjectModel.project_name
+        ),
+        joinedload(model.material_code).load_only(
+            MaterialCodeModel.description
+        ),
+        joinedload(model.company).load_only(
+            CompanyModel.company_name
+        )
+    )
+
+
+def _filter_fields(model):
+    return {
+        "material_name": contains(model.material_name),
+        "qty": equals(model.qty),
+        "unit": contains(model.unit),
+        "price": equals(model.price),
+        "currency": contains(model.currency),
+        "category_id": equals(model.category_id),
+        "po_num": contains(model.po_num),
+        "doc_num": contains(model.doc_num),
+        "material_code_id": equals(model.material_code_id),
+        "project_id": equals(model.project_id),
+        "ordered_id": equals(model.ordered_id),
+        "company_id": equals(model.company_id),
+        "created_at": on_date(model.created_at),
+        "scope_project_id": equals(model.project_id),
+    }
+
 
 class WarehouseFilterRepository:
 
+    query = FilterQuery(_filter_base, _filter_fields)
+
     def __init__(self, db: AsyncSession, filter_data: WarehouseFilterSchema, user_payload: UserTokenSchema):
         self.db = db
         self.filter_data = filter_data
@@ -342,7 +442,7 @@ class WarehouseFilterRepository:
 
     async def filter(self):
         try:
-            data = await self.db.execute(self._build_filter_query())
+            data = await self.db.execute(*self._build_filter_query())
             temp = data.scalars().all()
             # print(f'............{temp}')
             result = WarehouseStandardResponse.format_response(list(temp))
@@ -353,64 +453,18 @@ class WarehouseFilterRepository:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"{ex}")
 
     def _build_filter_query(self):
+        values = dict(self.filter_data.filter_data.__dict__)
+        values['scope_project_id'] = self._verify_project()
+        return self.query.build(WarehouseModel, values)
 
-        ALLOWED_FILTER_FIELDS = {
-            "material_name": lambda val: WarehouseModel.material_name.ilike(f'%{val}%'),
-            "qty": lambda val: WarehouseModel.qty == val,
-            "unit": lambda val: WarehouseModel.unit.ilike(f'%{val}%'),
-            "price": lambda val: WarehouseModel.price == val,
-            "currency": lambda val: WarehouseModel.currency.ilike(f'%{val}%'),
-            "category_id": lambda val: WarehouseModel.category_id == val,
-            "po_num": lambda val: WarehouseModel.po_num.ilike(f'%{val}%'),
-            "doc_num": lambda val: WarehouseModel.doc_num.ilike(f'%{val}%'),
-            "material_code_id": lambda val: WarehouseModel.material_code_id == val,
-            "project_id": lambda val: WarehouseModel.project_id == val,
-            "ordered_id": lambda val: WarehouseModel.ordered_id == val,
-            "company_id": lambda val: WarehouseModel.company_id == val,
-            "created_at": lambda val: func.date(WarehouseModel.created_at) == val,
-        }
-
-        filters = []
-
-        for field, value in self.filter_data.filter_data.__dict__.items():
-            if value is not None and field in ALLOWED_FILTER_FIELDS:
-                condition = ALLOWED_FILTER_FIELDS[field](value)
-                if condition is not None:
-                    filters.append(condition)
-
-        project = self._verify_project()
-        if project is not None:
-            filters.append(project)
-        stmt = select(WarehouseModel).where(*filters)
-        stmt = stmt.options(
-                joinedload(WarehouseModel.ordered).load_only(
-                    OrderedModel.f_name,
-                    OrderedModel.m_name,
-                    OrderedModel.l_name
-                ),
-                joinedload(WarehouseModel.category).load_only(
-                    MaterialCategoryModel.category_name
-                ),
-                joinedload(WarehouseModel.project).load_only(
-                    ProjectModel.project_name
-                ),
-                joinedload(WarehouseModel.material_code).load_only(
-                    MaterialCodeModel.description
-                ),
-                joinedload(WarehouseModel.company).load_only(
-                    CompanyModel.company_name
-                )
-            )
-        # this will give to us exact writing row query for testing
-        # print(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
-        return stmt
-
-    def _verify_project(self) :
+    def _verify_project(self) -> int | None:
         project_id: int = self.user_payload.get('project_id')
         if not project_id:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Project ID required.")
 
         if project_id == 1:
             return None  # no filter needed
+        if row_security.filters_project(WarehouseModel.__tablename__):
+            return None
 
-        return WarehouseModel.project_id == project_id
+        return project_id
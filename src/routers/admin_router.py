@@ -5,11 +5,13 @@ from fastapi import HTTPException, APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database.setup import get_db
+from src.database.transaction import retry_stats
 
 from src.schemas.admin_schemas import UserRegisterSchema, ProjectCreateSchema, GroupCreateSchema, CategoryCreateSchema
 
 from src.repositories.admin_repository import UserRegisterRepository, CreateProjectRepository, CreateGroupRepository, \
     CreateCategoryRepository
+from src.repositories.inventory_repository import LedgerCheckpointRepository
 
 from src.dependencies.admin_required import verify_admin
 
@@ -83,3 +85,20 @@ async def create_group(
     except Exception as e:
         logger.exception("Category creation failed")
         raise HTTPException(500, "Internal server error")
+
+
+@router.post('/ledger-checkpoint', status_code=201, dependencies=[Depends(verify_admin)])
+async def ledger_checkpoint(db_session: Annotated[AsyncSession,  Depends(get_db)]):
+    repository = LedgerCheckpointRepository(db_session)
+    try:
+        return await repository.create_checkpoints()
+    except HTTPException as ex:
+        raise ex
+    except Exception as e:
+        logger.exception("Ledger checkpoint failed")
+        raise HTTPException(500, "Internal server error")
+
+
+@router.get('/retry-stats', status_code=200, dependencies=[Depends(verify_admin)])
+async def transaction_retry_stats():
+    return retry_stats.snapshot()
@@ -1,16 +1,21 @@
 from typing import List, Annotated
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, status, Header, Response, Query
 from fastapi.params import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.core.types.numeric import UnsignedInt
 from src.auth.token_handler import TokenHandler
 from src.database.setup import get_db
+from src.dependencies.rate_limit import batch_rate_limit, heavy_rate_limit
 from src.dependencies.roles_authorization import project_role_based_authorization
-from src.repositories.area_repository import AreaAddRepository, AreaFetchRepository, AreaReturnToStockRepository, \
-    AreaGetByIdRepository, AreaFilterRepository
-from src.schemas.area_schemas import AreaListAddSchema, AreaResponseSchema, AreaReturnStockSchema, AreaFilterSchema
+from src.repositories.area_repository import AreaAddRepository, AreaChangesRepository, AreaFetchRepository, AreaReturnToStockRepository, \
+    AreaGetByIdRepository, AreaFilterRepository, AreaReturnToStockBatchRepository
+from src.schemas.area_schemas import AreaListAddSchema, AreaResponseSchema, AreaReturnStockSchema, AreaFilterSchema, \
+    AreaReturnStockBatchSchema
+from src.repositories.idempotency_repository import IdempotencyRepository
+from src.schemas.change_feed_schemas import ChangeFeedResponseSchema
+from src.utils.etag import etag_matches
 from src.schemas.user_schemas import UserTokenSchema
 
 router = APIRouter()
@@ -20,14 +25,16 @@ logger = setup_logger(__name__, "area.log")
 
 
 # Tested
-@router.post('/add_area', status_code=201)
+@router.post('/add_area', dependencies=[Depends(batch_rate_limit)], status_code=201)
 async def add_area(area_data: AreaListAddSchema,
                    db: Annotated[AsyncSession,  Depends(get_db)],
-                   user_id: int = Depends(project_role_based_authorization)):
+                   user_id: int = Depends(project_role_based_authorization),
+                   idempotency_key: Annotated[str | None, Header(max_length=100)] = None):
     repository = AreaAddRepository(db, area_data, user_id)
+    idempotency = IdempotencyRepository(user_id, idempotency_key, '/api/area/add_area', area_data)
 
     try:
-        data = await repository.add_area()
+        data = await idempotency.run(db, repository.add_area)
         return data
     except HTTPException as ex:
         raise ex
@@ -56,8 +63,27 @@ async def return_to_stock(return_data: AreaReturnStockSchema,
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal server error")
 
 
+@router.post('/return_to_stock_batch', dependencies=[Depends(batch_rate_limit)],
+             status_code = status.HTTP_201_CREATED)
+async def return_to_stock_batch(return_data: AreaReturnStockBatchSchema,
+                                user_payload: Annotated[UserTokenSchema, Depends(TokenHandler.verify_access_token)],
+                                db: Annotated[AsyncSession,  Depends(get_db)]
+                                ):
+    repository = AreaReturnToStockBatchRepository(db, return_data, int(user_payload.get('sub')), user_payload)
+
+    try:
+        data = await repository.return_to_stock()
+        return data
+    except HTTPException as ex:
+        logger.warning(f"Batch return to stock failed: {ex.detail}")
+        raise
+    except Exception as ex:
+        logger.error(f"Batch return to stock error : {ex}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal server error")
+
+
 # Tested
-@router.get('/fetch_area', status_code=200,
+@router.get('/fetch_area', dependencies=[Depends(heavy_rate_limit)], status_code=200,
             response_model=List[AreaResponseSchema])
 async def fetch_area(db: Annotated[AsyncSession,  Depends(get_db)],
                      payload: UserTokenSchema = Depends(TokenHandler.verify_access_token)):
@@ -73,6 +99,25 @@ async def fetch_area(db: Annotated[AsyncSession,  Depends(get_db)],
         return HTTPException(status_code=500, detail="Internal server error")
 
 
+# Declared before /{item_id}, which would otherwise capture it
+@router.get('/changes',
+            status_code=status.HTTP_200_OK,
+            response_model=ChangeFeedResponseSchema[AreaResponseSchema]
+            )
+async def changes(user_payload: Annotated[UserTokenSchema, Depends(TokenHandler.verify_access_token)],
+                  db: Annotated[AsyncSession,  Depends(get_db)],
+                  since: Annotated[str | None, Query(max_length=50)] = None):
+    repository = AreaChangesRepository(db, user_payload, since)
+    try:
+        data = await repository.changes()
+        return data
+    except HTTPException as ex:
+        raise ex
+    except Exception as ex:
+        logger.error(f"Area changes error {ex}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
 # Tested
 @router.get('/{item_id}',
             status_code=status.HTTP_200_OK,
@@ -80,10 +125,18 @@ async def fetch_area(db: Annotated[AsyncSession,  Depends(get_db)],
             )
 async def get_stock_by_id(item_id: UnsignedInt,
                                 user_payload: Annotated[UserTokenSchema, Depends(TokenHandler.verify_access_token)],
-                              db: Annotated[AsyncSession,  Depends(get_db)]):
+                              db: Annotated[AsyncSession,  Depends(get_db)],
+                              response: Response,
+                              if_none_match: Annotated[str | None, Header()] = None):
     repository = AreaGetByIdRepository(db, item_id, user_payload)
     try:
+        # Taken before the data, so a change in between only costs the client one more full fetch
+        etag = await repository.etag()
+        if etag and etag_matches(if_none_match, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
         data = await repository.get_by_id()
+        response.headers['ETag'] = etag
         return data
     except HTTPException as ex:
         raise ex
@@ -93,7 +146,7 @@ async def get_stock_by_id(item_id: UnsignedInt,
 
 
 
-@router.post('/filter', status_code=status.HTTP_200_OK,
+@router.post('/filter', dependencies=[Depends(heavy_rate_limit)], status_code=status.HTTP_200_OK,
              response_model=list[AreaResponseSchema])
 async def filter(filter_data: AreaFilterSchema,
                  user_payload: Annotated[UserTokenSchema, Depends(TokenHandler.verify_access_token)],
@@ -0,0 +1,70 @@
+from datetime import datetime
+from typing import Annotated, List, Literal
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.auth.token_handler import TokenHandler
+from src.database.change_events import broadcaster, stream_events
+from src.database.setup import get_db
+from src.dependencies.rate_limit import heavy_rate_limit
+from src.core.types.numeric import UnsignedInt
+from src.repositories.inventory_repository import StockSummaryFetchRepository, LedgerBalanceRepository
+from src.schemas.inventory_schemas import StockSummaryResponseSchema, LedgerBalanceResponseSchema
+from src.schemas.user_schemas import UserTokenSchema
+
+from src.logging_config import setup_logger
+logger = setup_logger(__name__, 'inventory.log')
+
+router = APIRouter()
+
+
+@router.get('/summary', dependencies=[Depends(heavy_rate_limit)],
+            status_code=status.HTTP_200_OK,
+            response_model=List[StockSummaryResponseSchema])
+async def fetch_summary(db: Annotated[AsyncSession,  Depends(get_db)],
+                        payload: Annotated[UserTokenSchema, Depends(TokenHandler.verify_access_token)],
+                        project_id: int | None = None,
+                        material_code_id: int | None = None,
+                        category_id: int | None = None):
+
+    repository = StockSummaryFetchRepository(db, payload)
+    try:
+        return await repository.fetch(project_id, material_code_id, category_id)
+    except HTTPException as ex:
+        raise ex
+    except Exception as ex:
+        logger.error(f"Fetch stock summary error {ex}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+@router.get('/ledger/{location}/{item_id}/balance',
+            status_code=status.HTTP_200_OK,
+            response_model=LedgerBalanceResponseSchema)
+async def ledger_balance(location: Literal['warehouse', 'stock', 'area'],
+                         item_id: UnsignedInt,
+                         at: datetime,
+                         db: Annotated[AsyncSession,  Depends(get_db)],
+                         payload: Annotated[UserTokenSchema, Depends(TokenHandler.verify_access_token)]):
+
+    repository = LedgerBalanceRepository(db, payload)
+    try:
+        return await repository.balance_at(location, item_id, at)
+    except HTTPException as ex:
+        raise ex
+    except Exception as ex:
+        logger.error(f"Ledger balance error {ex}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+@router.get('/events', status_code=status.HTTP_200_OK)
+async def inventory_events(payload: Annotated[UserTokenSchema, Depends(TokenHandler.verify_access_token)]):
+    # Movements of the user's project (all projects for project 1) as Server-Sent Events.
+    # On "resync" or "evicted" events may have been missed: catch up through /changes.
+    subscriber = broadcaster.subscribe(payload.get('project_id'))
+    return StreamingResponse(
+        stream_events(subscriber),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
@@ -0,0 +1,53 @@
+from datetime import date
+from typing import Annotated, List
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.auth.token_handler import TokenHandler
+from src.database.setup import get_db
+from src.dependencies.rate_limit import heavy_rate_limit
+from src.repositories.report_repository import ConsumptionReportRepository, DailyRollupFetchRepository
+from src.schemas.report_schemas import ConsumptionReportSchema, ConsumptionReportRowSchema, DailyRollupResponseSchema
+from src.schemas.user_schemas import UserTokenSchema
+
+from src.logging_config import setup_logger
+logger = setup_logger(__name__, 'report.log')
+
+router = APIRouter()
+
+
+@router.post('/consumption', dependencies=[Depends(heavy_rate_limit)],
+             status_code=status.HTTP_200_OK,
+             response_model=List[ConsumptionReportRowSchema])
+async def consumption(report_data: ConsumptionReportSchema,
+                      user_payload: Annotated[UserTokenSchema, Depends(TokenHandler.verify_access_token)],
+                      db: Annotated[AsyncSession,  Depends(get_db)]):
+
+    repository = ConsumptionReportRepository(db, user_payload)
+    try:
+        return await repository.report(report_data)
+    except HTTPException as ex:
+        raise ex
+    except Exception as ex:
+        logger.error(f"Consumption report error {ex}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+@router.get('/daily', status_code=status.HTTP_200_OK,
+            response_model=List[DailyRollupResponseSchema])
+async def daily(date_from: date,
+                date_to: date,
+                user_payload: Annotated[UserTokenSchema, Depends(TokenHandler.verify_access_token)],
+                db: Annotated[AsyncSession,  Depends(get_db)],
+                project_id: int | None = None,
+                material_code_id: int | None = None):
+
+    repository = DailyRollupFetchRepository(db, user_payload)
+    try:
+        return await repository.fetch(date_from, date_to, project_id, material_code_id)
+    except HTTPException as ex:
+        raise ex
+    except Exception as ex:
+        logger.error(f"Daily rollup error {ex}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
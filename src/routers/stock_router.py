@@ -1,24 +1,31 @@
 from typing import List, Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Response, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.database.setup import get_db
+from src.dependencies.rate_limit import batch_rate_limit, heavy_rate_limit
 from src.core.types.numeric import UnsignedInt
 from src.dependencies.roles_authorization import project_role_based_authorization
 from src.auth.token_handler import TokenHandler
 
 from src.schemas.stock_schema import (StockReturnToWarehouseSchema,
+                                      StockReturnToWarehouseBatchSchema,
                                       StockFilterSchema,
                                       StockListRequest,
                                       StockStandardFetchResponse,
                                       StockListSelectByIDS)
 
 from src.repositories.stock_repository import (StockAddRepository,
+                                               StockChangesRepository,
                                                StockFetchRepository,
                                                StockFetchSelectedByIDSRepository,
                                                StockFilterRepository,
                                                StockReturnToWarehouseRepository,
+                                               StockReturnToWarehouseBatchRepository,
                                                StockGetByIdRepository)
+from src.repositories.idempotency_repository import IdempotencyRepository
+from src.schemas.change_feed_schemas import ChangeFeedResponseSchema
+from src.utils.etag import etag_matches
 
 
 from src.logging_config import setup_logger
@@ -29,15 +36,17 @@ logger = setup_logger(__name__, 'stock.log')
 router = APIRouter()
 
 # Tested
-@router.post('/add_stock_data_list', status_code=201, response_model=dict[str, str])
+@router.post('/add_stock_data_list', dependencies=[Depends(batch_rate_limit)], status_code=201, response_model=dict[str, str])
 async def add_stock_list(request: StockListRequest,
                          db: Annotated[AsyncSession,  Depends(get_db)],
-                         user_id = Depends(project_role_based_authorization)):
+                         user_id = Depends(project_role_based_authorization),
+                         idempotency_key: Annotated[str | None, Header(max_length=100)] = None):
 
     repository = StockAddRepository(db, request, user_id)
+    idempotency = IdempotencyRepository(user_id, idempotency_key, '/api/stock/add_stock_data_list', request)
 
     try:
-        data = await repository.add_stock_list()
+        data = await idempotency.run(db, repository.add_stock_list)
         return data
     except HTTPException as ex:
         raise ex
@@ -66,8 +75,28 @@ async def return_to_warehouse(return_data: StockReturnToWarehouseSchema,
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail='Internal Server Error')
 
 
+@router.post('/return_to_warehouse_batch', dependencies=[Depends(batch_rate_limit)],
+             status_code=201,
+             response_model=dict[str, str])
+async def return_to_warehouse_batch(return_data: StockReturnToWarehouseBatchSchema,
+                                    db: Annotated[AsyncSession,  Depends(get_db)],
+                                    user_id: int = Depends(project_role_based_authorization)):
+
+    repository = StockReturnToWarehouseBatchRepository(db, return_data, user_id)
+
+    try:
+        data = await repository.return_to_warehouse()
+        return data
+    except HTTPException as ex:
+        logger.error(f'Batch Return Warehouse Error {ex}')
+        raise ex
+    except Exception as ex:
+        logger.error(f'Batch Return Warehouse Error {ex}')
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail='Internal Server Error')
+
+
 # Tested
-@router.get('/fetch-stock_list', status_code=200,
+@router.get('/fetch-stock_list', dependencies=[Depends(heavy_rate_limit)], status_code=200,
             # response_model=List[StockListResponse]
             )
 async def fetch_stock_list(db: Annotated[AsyncSession,  Depends(get_db)],
@@ -86,7 +115,7 @@ async def fetch_stock_list(db: Annotated[AsyncSession,  Depends(get_db)],
 
 
 # Tested
-@router.post('/fetch-selected-ids', status_code=200,)
+@router.post('/fetch-selected-ids', dependencies=[Depends(heavy_rate_limit)], status_code=200,)
 async def fetch_selected_ids(request: StockListSelectByIDS,
                              db: Annotated[AsyncSession,  Depends(get_db)],
                              payload:UserTokenSchema = Depends(TokenHandler.verify_access_token)
@@ -103,6 +132,25 @@ async def fetch_selected_ids(request: StockListSelectByIDS,
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 
+# Declared before /{item_id}, which would otherwise capture it
+@router.get('/changes',
+            status_code=status.HTTP_200_OK,
+            response_model=ChangeFeedResponseSchema[StockStandardFetchResponse]
+            )
+async def changes(user_payload: Annotated[UserTokenSchema, Depends(TokenHandler.verify_access_token)],
+                  db: Annotated[AsyncSession,  Depends(get_db)],
+                  since: Annotated[str | None, Query(max_length=50)] = None):
+    repository = StockChangesRepository(db, user_payload, since)
+    try:
+        data = await repository.changes()
+        return data
+    except HTTPException as ex:
+        raise ex
+    except Exception as ex:
+        logger.error(f"Stock changes error {ex}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
 # Tested
 @router.get('/{item_id}',
             status_code=status.HTTP_200_OK,
@@ -110,11 +158,19 @@ async def fetch_selected_ids(request: StockListSelectByIDS,
             )
 async def get_by_id(item_id: UnsignedInt,
                             user_payload: Annotated[UserTokenSchema, Depends(TokenHandler.verify_access_token)],
-                            db: Annotated[AsyncSession,  Depends(get_db)]
+                            db: Annotated[AsyncSession,  Depends(get_db)],
+                            response: Response,
+                            if_none_match: Annotated[str | None, Header()] = None
                     ):
     repository = StockGetByIdRepository(db, item_id, user_payload)
     try:
+        # Taken before the data, so a change in between only costs the client one more full fetch
+        etag = await repository.etag()
+        if etag and etag_matches(if_none_match, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
         data = await repository.get_by_id()
+        response.headers['ETag'] = etag
         return data
     except HTTPException as ex:
         raise ex
@@ -125,7 +181,7 @@ async def get_by_id(item_id: UnsignedInt,
 
 
 
-@router.post('/filter', status_code=status.HTTP_200_OK,
+@router.post('/filter', dependencies=[Depends(heavy_rate_limit)], status_code=status.HTTP_200_OK,
              response_model=list[StockStandardFetchResponse])
 async def filter(filter_data: StockFilterSchema,
                  user_payload: Annotated[UserTokenSchema, Depends(TokenHandler.verify_access_token)],
@@ -1,14 +1,15 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Cookie
 # from fastapi.dependencies import
 from fastapi.responses import Response
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database.setup import get_db
+from src.dependencies.rate_limit import login_rate_limit
 
-from src.repositories.user_repository import UserLoginRepository
+from src.repositories.user_repository import UserLoginRepository, UserRefreshRepository
 from src.schemas.user_schemas import UserLoginSchema
 
 
@@ -18,7 +19,7 @@ logger = setup_logger(__name__, "user.log")
 router = APIRouter()
 
 # Tested
-@router.post('/login', status_code=201)
+@router.post('/login', dependencies=[Depends(login_rate_limit)], status_code=201)
 async def login(response: Response, login_data: UserLoginSchema, db_session: Annotated[AsyncSession,  Depends(get_db)]):
 
     repository = UserLoginRepository(db_session)
@@ -46,3 +47,31 @@ async def login(response: Response, login_data: UserLoginSchema, db_session: Ann
         raise HTTPException(500, 'Internal server error')
 
 
+@router.post('/refresh', status_code=201)
+async def refresh(response: Response,
+                  db_session: Annotated[AsyncSession,  Depends(get_db)],
+                  refresh_token: Annotated[str | None, Cookie()] = None):
+
+    repository = UserRefreshRepository(db_session)
+
+    try:
+        data = await repository.refresh(refresh_token)
+
+        response.headers["X-Content-Type-Options"] = "nosniff"
+        response.headers["X-Frame-Options"] = "DENY"
+
+        response.set_cookie('refresh_token', data.get('refresh_token'),
+                            httponly=True,
+                            secure=True,
+                            samesite="none"
+                            )
+        return {
+            'user': data.get('user'),
+            'access_token': data.get('access_token')
+        }
+
+    except HTTPException as ex:
+        raise ex
+    except Exception as ex:
+        logger.exception("Unexpected error refresh token: %s", ex)
+        raise HTTPException(500, 'Internal server error')
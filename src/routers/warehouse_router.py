@@ -3,19 +3,24 @@ from typing import Annotated
 
 from src.core.types.numeric import UnsignedInt
 
-from fastapi import APIRouter, status, Depends, HTTPException
+from fastapi import APIRouter, status, Depends, HTTPException, Header, Response, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database.setup import get_db
+from src.dependencies.rate_limit import batch_rate_limit, heavy_rate_limit
 from src.auth.token_handler import TokenHandler
 
 from src.dependencies.roles_authorization import project_role_based_authorization
 from src.repositories.warehouse_repository import (WarehouseCreateRepository,
+                                                   WarehouseChangesRepository,
                                                    WarehouseSelectedByIDSRepository,
                                                    WarehouseFetchRepository,
                                                    WarehouseUpdateRepository,
                                                    WarehouseGetByIdRepository,
                                                    WarehouseFilterRepository)
+from src.repositories.idempotency_repository import IdempotencyRepository
+from src.schemas.change_feed_schemas import ChangeFeedResponseSchema
+from src.utils.etag import etag_matches
 
 from src.schemas.user_schemas import UserTokenSchema
 
@@ -30,16 +35,18 @@ router = APIRouter()
 
 
 # Tested
-@router.post('/create-warehouse_list',
+@router.post('/create-warehouse_list', dependencies=[Depends(batch_rate_limit)],
              status_code=status.HTTP_201_CREATED,
              response_model=dict[str, str])
 async def create_warehouse_list(warehouse_list: WarehouseListCreateSchema,
                                 db: Annotated[AsyncSession,  Depends(get_db)],
-                                user_id = Depends(project_role_based_authorization)):
+                                user_id = Depends(project_role_based_authorization),
+                                idempotency_key: Annotated[str | None, Header(max_length=100)] = None):
 
     repository = WarehouseCreateRepository(db, warehouse_list, user_id)
+    idempotency = IdempotencyRepository(user_id, idempotency_key, '/api/warehouse/create-warehouse_list', warehouse_list)
     try:
-        data = await repository.create_warehouse_list()
+        data = await idempotency.run(db, repository.create_warehouse_list)
         return data
     except HTTPException as ex:
         raise ex
@@ -69,7 +76,7 @@ async def update_warehouse_list(update_data: WarehouseUpdateSchema,
 
 
 # Tested
-@router.get('/fetch-warehouse_list',
+@router.get('/fetch-warehouse_list', dependencies=[Depends(heavy_rate_limit)],
             status_code=200,
             response_model=list[WarehouseStandartFetchResponseSchema])
 async def fetch_warehouse(db: Annotated[AsyncSession,  Depends(get_db)],
@@ -88,7 +95,7 @@ async def fetch_warehouse(db: Annotated[AsyncSession,  Depends(get_db)],
 
 
 # Tested
-@router.post('/fetch-selected-ids', status_code=200,
+@router.post('/fetch-selected-ids', dependencies=[Depends(heavy_rate_limit)], status_code=200,
              response_model=list[WarehouseStandartFetchResponseSchema])
 async def fetch_selected_ids(request: WarehouseListSelectByIDS,
                              db: Annotated[AsyncSession,  Depends(get_db)],
@@ -105,6 +112,25 @@ async def fetch_selected_ids(request: WarehouseListSelectByIDS,
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 
+# Declared before /{item_id}, which would otherwise capture it
+@router.get('/changes',
+            status_code=status.HTTP_200_OK,
+            response_model=ChangeFeedResponseSchema[WarehouseStandartFetchResponseSchema]
+            )
+async def changes(user_payload: Annotated[UserTokenSchema, Depends(TokenHandler.verify_access_token)],
+                  db: Annotated[AsyncSession,  Depends(get_db)],
+                  since: Annotated[str | None, Query(max_length=50)] = None):
+    repository = WarehouseChangesRepository(db, user_payload, since)
+    try:
+        data = await repository.changes()
+        return data
+    except HTTPException as ex:
+        raise ex
+    except Exception as ex:
+        logger.error(f"Warehouse changes error {ex}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
 # Tested
 @router.get('/{item_id}',
             status_code=status.HTTP_200_OK,
@@ -112,10 +138,18 @@ async def fetch_selected_ids(request: WarehouseListSelectByIDS,
             )
 async def get_by_id(item_id: UnsignedInt,
                     user_payload: Annotated[UserTokenSchema, Depends(TokenHandler.verify_access_token)],
-                    db: Annotated[AsyncSession,  Depends(get_db)]):
+                    db: Annotated[AsyncSession,  Depends(get_db)],
+                    response: Response,
+                    if_none_match: Annotated[str | None, Header()] = None):
     repository = WarehouseGetByIdRepository(db, item_id, user_payload)
     try:
+        # Taken before the data, so a change in between only costs the client one more full fetch
+        etag = await repository.etag()
+        if etag and etag_matches(if_none_match, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
         data = await repository.get_by_id()
+        response.headers['ETag'] = etag
         return data
     except HTTPException as ex:
         raise ex
@@ -126,7 +160,7 @@ async def get_by_id(item_id: UnsignedInt,
 
 
 
-@router.post('/filter', status_code=status.HTTP_200_OK,
+@router.post('/filter', dependencies=[Depends(heavy_rate_limit)], status_code=status.HTTP_200_OK,
              response_model=list[WarehouseStandartFetchResponseSchema])
 async def filter(filter_data: WarehouseFilterSchema,
                  user_payload: Annotated[UserTokenSchema, Depends(TokenHandler.verify_access_token)],
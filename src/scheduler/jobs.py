@@ -0,0 +1,57 @@
+import os
+from datetime import date, timedelta
+
+from src.database.setup import SessionLocal
+from src.repositories.archive_repository import ConsumedArchiveRepository
+from src.repositories.idempotency_repository import IdempotencyPurgeRepository
+from src.repositories.inventory_repository import LedgerCheckpointRepository, DailyRollupRepository
+from src.repositories.log_partition_repository import LogPartitionRepository
+from src.scheduler.scheduler import Job, Scheduler
+
+
+async def ledger_checkpoint():
+    async with SessionLocal() as db:
+        return (await LedgerCheckpointRepository(db).create_checkpoints()).get('detail')
+
+
+async def idempotency_purge():
+    async with SessionLocal() as db:
+        return f'{await IdempotencyPurgeRepository(db).purge_expired()} keys purged'
+
+
+async def rollup_reconcile():
+    # Re-derives the last two days from the source tables, correcting any drift in the live upserts
+    today = date.today()
+    async with SessionLocal() as db:
+        rows = await DailyRollupRepository(db).rebuild(today - timedelta(days=1), today)
+        await db.commit()
+    return f'{rows} rollup rows rebuilt'
+
+
+async def log_partitions():
+    async with SessionLocal() as db:
+        repository = LogPartitionRepository(db)
+        created = await repository.create_partitions()
+        archived = await repository.archive_expired()
+    return f'{len(created)} log partitions created, {len(archived)} archived'
+
+
+async def consumed_archive():
+    async with SessionLocal() as db:
+        archived = await ConsumedArchiveRepository(db).archive()
+    return f"{archived['area']} area and {archived['stock']} stock rows archived"
+
+
+JOBS = [
+    Job('ledger_checkpoint', ledger_checkpoint, interval=6 * 3600),
+    Job('idempotency_purge', idempotency_purge, interval=3600),
+    Job('rollup_reconcile', rollup_reconcile, interval=24 * 3600),
+    Job('log_partitions', log_partitions, interval=24 * 3600),
+    Job('consumed_archive', consumed_archive, interval=24 * 3600),
+]
+
+
+def create_scheduler() -> Scheduler | None:
+    if os.getenv('SCHEDULER_ENABLED', 'true').lower() == 'false':
+        return None
+    return Scheduler(JOBS)
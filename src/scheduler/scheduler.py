@@ -0,0 +1,128 @@
+import asyncio
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable
+
+from sqlalchemy import select, insert, func
+
+from src.database.setup import SessionLocal, engine
+from src.models.job_model import JobRunModel
+
+from src.logging_config import setup_logger
+logger = setup_logger(__name__, 'scheduler.log')
+
+
+# First runs are spread over this window after startup instead of all firing at once
+STARTUP_DELAY = float(os.getenv('SCHEDULER_STARTUP_DELAY', '60'))
+
+
+class Job:
+    """A coroutine run every `interval` seconds, give or take `jitter` (a fraction of the interval).
+
+    The interval can be overridden with JOB_<NAME>_INTERVAL.
+    """
+
+    def __init__(self, name: str, func: Callable[[], Awaitable[object]], interval: float, jitter: float = 0.1):
+        self.name = name
+        self.func = func
+        self.interval = float(os.getenv(f'JOB_{name.upper()}_INTERVAL', interval))
+        self.jitter = jitter
+
+    def next_delay(self) -> float:
+        return self.interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+
+class Scheduler:
+    """Periodic jobs running as tasks of the app's event loop.
+
+    Every worker runs the same schedule. A job runs under a Postgres advisory lock, so only
+    one worker at a time executes it, and is skipped when another worker already started it
+    within the current interval; each run is recorded in job_runs with its duration.
+    """
+
+    def __init__(self, jobs: list[Job]):
+        self.jobs = jobs
+        self.tasks: list[asyncio.Task] = []
+
+    def start(self) -> None:
+        for job in self.jobs:
+            self.tasks.append(asyncio.create_task(self._loop(job), name=f'job:{job.name}'))
+        logger.info(f"Scheduler started: {', '.join(job.name for job in self.jobs)}")
+
+    async def stop(self) -> None:
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        logger.info("Scheduler stopped")
+
+    async def _loop(self, job: Job) -> None:
+        await asyncio.sleep(random.uniform(0, min(STARTUP_DELAY, job.interval)))
+        while True:
+            try:
+                await self.run_once(job)
+            except Exception as ex:
+                # A broken database must not kill the loop; the next tick tries again
+                logger.error(f"Job {job.name} could not run : {ex}")
+            await asyncio.sleep(job.next_delay())
+
+    async def run_once(self, job: Job) -> str:
+        async with engine.connect() as lock_connection:
+            # Session-level lock on its own connection: held while the job commits in its own
+            # sessions, and released by Postgres if this process dies
+            lock_key = func.hashtext(f'job:{job.name}')
+            locked = await lock_connection.scalar(select(func.pg_try_advisory_lock(lock_key)))
+            await lock_connection.commit()
+            if not locked:
+                return 'locked'
+
+            try:
+                if await self._ran_recently(job):
+                    return 'skipped'
+                return await self._run(job)
+            finally:
+                try:
+                    await lock_connection.execute(select(func.pg_advisory_unlock(lock_key)))
+                    await lock_connection.commit()
+                except BaseException:
+                    # Never hand a connection that may still hold the lock back to the pool
+                    await lock_connection.invalidate()
+                    raise
+
+    @staticmethod
+    async def _ran_recently(job: Job) -> bool:
+        since = datetime.now(timezone.utc) - timedelta(seconds=job.interval * (1 - job.jitter))
+        async with SessionLocal() as db:
+            last = await db.scalar(
+                select(func.max(JobRunModel.started_at)).where(JobRunModel.job_name == job.name)
+            )
+        return last is not None and last > since
+
+    @staticmethod
+    async def _run(job: Job) -> str:
+        started_at = datetime.now(timezone.utc)
+        started = time.perf_counter()
+        try:
+            detail = await job.func()
+            status = 'succeeded'
+        except Exception as ex:
+            logger.exception(f"Job {job.name} failed")
+            detail = f'{type(ex).__name__}: {ex}'
+            status = 'failed'
+        duration_ms = int((time.perf_counter() - started) * 1000)
+
+        async with SessionLocal() as db:
+            await db.execute(insert(JobRunModel).values(
+                job_name=job.name,
+                status=status,
+                started_at=started_at,
+                finished_at=datetime.now(timezone.utc),
+                duration_ms=duration_ms,
+                detail=None if detail is None else str(detail)[:1000],
+            ))
+            await db.commit()
+
+        logger.info(f"Job {job.name} {status} in {duration_ms} ms")
+        return status
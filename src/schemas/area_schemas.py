@@ -63,6 +63,20 @@ class AreaReturnStockSchema(BaseModel):
     project_id: int
 
 
+class AreaReturnStockBatchSchema(BaseModel):
+    project_id: int
+    return_data_list: List[AreaReturnStockSchema] = []
+    # Return everything still held by this card instead of listing the lines
+    card_number: str | None = None
+
+    @field_validator('card_number')
+    @classmethod
+    def validate_card_number(cls, v: str | None):
+        if v is None:
+            return None
+        return v.strip().lower()
+
+
 
 class AreaFilterFieldSchema(BaseModel):
     material_name: str | None = None
@@ -83,4 +97,6 @@ class AreaFilterFieldSchema(BaseModel):
 
 class AreaFilterSchema(BaseModel):
     project_id: int
-    filter_data: AreaFilterFieldSchema
\ No newline at end of file
+    filter_data: AreaFilterFieldSchema
+    # Also search the consumed rows moved to the archive tables
+    include_archived: bool = False
\ No newline at end of file
@@ -0,0 +1,13 @@
+from typing import Generic, List, TypeVar
+
+from pydantic import BaseModel
+
+T = TypeVar('T')
+
+
+class ChangeFeedResponseSchema(BaseModel, Generic[T]):
+    # Pass back as ?since= to get what changed after this page
+    cursor: str
+    has_more: bool
+    changes: List[T]
+    deleted: List[int]
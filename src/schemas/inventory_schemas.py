@@ -0,0 +1,24 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class StockSummaryResponseSchema(BaseModel):
+    project_id: int
+    material_code_id: int
+    category_id: int
+    warehouse_left_over: float
+    stock_left_over: float
+    area_quantity: float
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class LedgerBalanceResponseSchema(BaseModel):
+    location: str
+    item_id: int
+    at: datetime
+    balance: float
+    checkpoint_at: datetime | None = None
@@ -0,0 +1,43 @@
+from datetime import date
+from typing import Literal
+
+from pydantic import BaseModel, model_validator
+
+from src.schemas.area_schemas import AreaFilterFieldSchema
+
+
+class ConsumptionReportSchema(BaseModel):
+    project_id: int
+    group_by: Literal['group', 'category', 'project', 'day', 'week']
+    date_from: date | None = None
+    date_to: date | None = None
+    filter_data: AreaFilterFieldSchema = AreaFilterFieldSchema()
+
+    @model_validator(mode='after')
+    def check_range(self):
+        if self.date_from and self.date_to and self.date_from > self.date_to:
+            raise ValueError('date_from must not be after date_to')
+        return self
+
+
+class ConsumptionReportRowSchema(BaseModel):
+    key: int | date | None
+    label: str | None
+    unit: str
+    quantity: float
+    lines: int
+
+
+class DailyRollupResponseSchema(BaseModel):
+    day: date
+    project_id: int
+    material_code_id: int
+    received: float
+    adjusted: float
+    issued_to_stock: float
+    issued_to_area: float
+    returned_to_stock: float
+    returned_to_warehouse: float
+
+    class Config:
+        from_attributes = True
@@ -50,6 +50,11 @@ class StockReturnToWarehouseSchema(BaseModel):
     project_id: int
 
 
+class StockReturnToWarehouseBatchSchema(BaseModel):
+    project_id: int
+    return_data_list: List[StockReturnToWarehouseSchema]
+
+
 class StockFilterFieldSchema(BaseModel):
     material_name: str | None = None
     quantity: float | None = None
@@ -68,4 +73,6 @@ class StockFilterFieldSchema(BaseModel):
 
 class StockFilterSchema(BaseModel):
     project_id: int
-    filter_data: StockFilterFieldSchema
\ No newline at end of file
+    filter_data: StockFilterFieldSchema
+    # Also search the consumed rows moved to the archive tables
+    include_archived: bool = False
\ No newline at end of file
@@ -0,0 +1,16 @@
+from datetime import datetime
+
+
+def make_etag(*stamps: datetime | None) -> str:
+    """Strong ETag from the updated_at of a row and of the rows its response embeds."""
+    parts = [format(int(i.timestamp() * 1_000_000), 'x') if i else '0' for i in stamps]
+    return f'"{"-".join(parts)}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    # Weak comparison, as RFC 9110 asks for If-None-Match
+    return any(i.strip().removeprefix('W/') == etag for i in if_none_match.split(','))